@@ -1,6 +1,8 @@
 import hvplot.pandas
 import panel as pn
+from Crime_Profiler import profiled
 
+@profiled("render")
 def create_bar_chart(df, x_col, y_col, title, xlabel, ylabel, height=570, width=660):
     """
     Generate a visually improved bar chart with better colors, fonts, and axis formatting.
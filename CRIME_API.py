@@ -4,30 +4,565 @@ DS3500
 1/31/2025
 Homework 3: Build dashboard (This is my Crime API)
 """
+import asyncio
+import functools
+import json
+import os
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd
+from Query_Cache import SHARED_CACHE
+from Crime_Profiler import profiled, profiled_query
+from Crime_Storage import CODED_COLUMNS, load_dimensions
+from Heatmap_Tiles import ALL_CRIMES, TILE_CELL_PIXELS, TILE_ZOOMS, grid_cell_size
+from Hotspot_Forecast import FEATURES, score_features, week_number
+from Offense_Dictionary import fts_query, match_offenses
+from Time_Cube import WEEKDAYS, load_time_cube
+
+# PRAGMAs applied to every pooled connection. The dashboard only reads, so we can let SQLite
+# memory-map the file, keep a bigger page cache and sort/group in memory instead of temp files.
+READ_PRAGMAS = {
+    "mmap_size": 268435456,  # 256 MB
+    "cache_size": -65536,    # negative means KiB, so 64 MB per connection
+    "temp_store": "MEMORY",
+}
+
+# Async fetches run their queries on this pool so the Panel/Tornado event loop stays free.
+# It is sized like the default connection pool, so a query thread never waits for a connection.
+QUERY_WORKERS = 8
+QUERY_EXECUTOR = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="crime-query")
+
+WEEKDAY_DTYPE = pd.CategoricalDtype(WEEKDAYS, ordered=True)
+
+# Columns of the crime_hotspots table that fetch_hotspots returns
+HOTSPOT_COLUMNS = ["RANK", "Lat", "Long", "crime_count", "STREET", "DISTRICT"]
+
+# crime_incidents stores offenses as IDs; this matches every spelling of one lower-cased offense
+OFFENSE_FILTER = "OFFENSE_DESCRIPTION_ID IN (SELECT ID FROM dim_offense_description WHERE LOWER(VALUE) = LOWER(?))"
+
+# Smallest SQLite integer, the open end of an OCCURRED_TS range
+EARLIEST_TS = -2 ** 63
+
+# Columns of the incident list (fetch_incidents, iter_incidents) with their Arrow types for exports.
+# DISTRICT, OFFENSE_DESCRIPTION, STREET and SHOOTING come back as pandas categoricals.
+INCIDENT_LIST_COLUMNS = {
+    "INCIDENT_NUMBER": "string",
+    "OCCURRED_ON_DATE": "string",
+    "OCCURRED_TS": "int64",
+    "DISTRICT": "string",
+    "OFFENSE_DESCRIPTION": "string",
+    "STREET": "string",
+    "SHOOTING": "string",
+    "Lat": "double",
+    "Long": "double",
+}
+
+
+class ConnectionPool:
+    """A small thread-safe pool of read-only SQLite connections."""
+
+    def __init__(self, db_path, max_size=8, cached_statements=256, timeout=30.0):
+        """
+        Parameters:
+            db_path (str): Path to the SQLite database file.
+            max_size (int): Maximum number of connections the pool will ever open.
+            cached_statements (int): Size of each connection's prepared-statement cache.
+            timeout (float): Seconds to wait for a free connection before giving up.
+        """
+        self.db_path = db_path
+        self.max_size = max_size
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._opened = 0
+        self._file_ids = {}  # connection -> file_id() of the file it was opened on
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Open one read-only connection and apply the read PRAGMAs."""
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,  # connections move between threads, but only one uses it at a time
+            cached_statements=self.cached_statements,
+        )
+        for name, value in READ_PRAGMAS.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def file_id(self):
+        """Identify the database file, so we notice when Read_Replica.py swaps a new copy in."""
+        try:
+            info = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        return info.st_dev, info.st_ino
+
+    def acquire(self):
+        """Take an idle connection, opening a new one if the pool is not full yet."""
+        if self._closed:
+            raise RuntimeError("pool is closed")
+        current = self.file_id()
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._file_ids.get(conn) == current:
+                return conn
+            # Opened on a file that has since been replaced, so it still reads the old copy
+            self._discard(conn)
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("pool is closed")
+            if self._opened < self.max_size:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+
+        if open_new:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+            with self._lock:
+                self._file_ids[conn] = current
+            return conn
+
+        # The pool is full, so wait for another thread to give a connection back
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection became free within {self.timeout} seconds.")
+        if self._file_ids.get(conn) != current:
+            self._discard(conn)
+            return self.acquire()
+        return conn
+
+    def release(self, conn):
+        """Give a connection back to the pool."""
+        if self._closed:
+            # close() already ran, so nobody will take this one out of the queue again
+            self._discard(conn)
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put_nowait(conn)
+
+    def _discard(self, conn):
+        """Close a connection instead of giving it back, freeing its slot in the pool."""
+        conn.close()
+        with self._lock:
+            self._file_ids.pop(conn, None)
+            self._opened -= 1
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection. Connections that are checked out are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+def complete_weekdays(df):
+    """
+    Put day-of-week counts in Monday-Sunday order, with a zero for any day that has no crimes.
+
+    Parameters:
+        df (pd.DataFrame): Columns DAY_OF_WEEK (lower-case day name) and crime_count.
+
+    Returns:
+        pd.DataFrame: One row per weekday, DAY_OF_WEEK as an ordered categorical.
+    """
+    # Ensure all weekdays are represented, even if some have zero crimes: each row's day becomes a
+    # code 0-6 and bincount adds the counts up per code in one pass (unknown day names are dropped)
+    days = df["DAY_OF_WEEK"].astype("string").str.strip().str.lower()
+    codes = pd.Categorical(days, dtype=WEEKDAY_DTYPE).codes
+    known = codes >= 0
+    counts = df["crime_count"].to_numpy()
+    totals = np.bincount(codes[known], weights=counts[known], minlength=len(WEEKDAYS)).astype(counts.dtype)
+
+    return pd.DataFrame({
+        "DAY_OF_WEEK": pd.Categorical.from_codes(np.arange(len(WEEKDAYS)), dtype=WEEKDAY_DTYPE),
+        "crime_count": totals,
+    })
+
+
+def timestamp_seconds(value):
+    """
+    Turn a date (string, datetime or pd.Timestamp) into OCCURRED_TS seconds, or None for None.
+
+    Like OCCURRED_TS, the wall-clock time is used as it is and a time zone is ignored.
+    """
+    if value is None:
+        return None
+    return int(pd.Timestamp(value).tz_localize(None).timestamp())
+
+
+def hour_window(hours):
+    """
+    Check an hour-of-day window.
+
+    Parameters:
+        hours (tuple): (first, last) hours, both included. first > last wraps past midnight,
+                       e.g. (22, 4) is 10pm to 4:59am.
+
+    Returns:
+        tuple: (first, last) as ints.
+    """
+    first, last = (int(hour) for hour in hours)
+    if not (0 <= first <= 23 and 0 <= last <= 23):
+        raise ValueError(f"Hours must be between 0 and 23, got {hours!r}.")
+    return first, last
+
+
+def incident_filter_sql(start=None, end=None, hours=None, districts=None, crime_type="All Crimes", after=None):
+    """
+    Build the WHERE conditions for the incident filters, on crime_incidents.
+
+    Parameters:
+        start, end: Date range on OCCURRED_ON_DATE, start included and end excluded (None = open).
+        hours (tuple, optional): Hour-of-day window, see hour_window.
+        districts (list, optional): Only these districts.
+        crime_type (str): An offense, or "All Crimes".
+        after (tuple, optional): Only rows after this (OCCURRED_TS, INCIDENT_NUMBER) cursor.
+
+    Returns:
+        list: SQL conditions to AND together.
+        list: Their parameters.
+    """
+    # Rows without a usable date can't be placed in time order, so the incident list leaves them out.
+    # An open start is a range from the smallest integer: it skips NULLs just like IS NOT NULL, but
+    # SQLite plans it as a range on the OCCURRED_TS index (IS NOT NULL made it scan the table).
+    lower = EARLIEST_TS if start is None else timestamp_seconds(start)
+    conditions, params = [], []
+    if after is not None:
+        # SQLite only seeks on one lower bound, so the cursor's time is folded into this one
+        # instead of the index walking from `start` up to the cursor row by row
+        lower = max(lower, int(after[0]))
+        conditions.append("(OCCURRED_TS, INCIDENT_NUMBER) > (?, ?)")
+        params += [int(after[0]), str(after[1])]
+    conditions.append("OCCURRED_TS >= ?")
+    params.append(lower)
+    if end is not None:
+        conditions.append("OCCURRED_TS < ?")
+        params.append(timestamp_seconds(end))
+    if hours is not None:
+        first, last = hour_window(hours)
+        conditions.append("HOUR BETWEEN ? AND ?" if first <= last else "(HOUR >= ? OR HOUR <= ?)")
+        params += [first, last]
+    if districts:
+        districts = [districts] if isinstance(districts, str) else list(districts)
+        conditions.append(f"DISTRICT_ID IN (SELECT ID FROM dim_district WHERE VALUE IN ({', '.join('?' * len(districts))}))")
+        params += districts
+    if crime_type != "All Crimes":
+        conditions.append(OFFENSE_FILTER)
+        params.append(crime_type)
+    return conditions, params
+
+
+def incident_arrow_schema():
+    """Arrow schema of the incident list (pyarrow is only imported when an export asks for it)."""
+    import pyarrow as pa
+    return pa.schema([(name, pa.type_for_alias(alias)) for name, alias in INCIDENT_LIST_COLUMNS.items()])
+
+
+def hashable(value):
+    """Turn list arguments (e.g. districts) into tuples so they can be part of a cache key."""
+    if isinstance(value, (list, tuple, set)):
+        return tuple(hashable(item) for item in value)
+    return value
+
+
+def cached_query(method):
+    """
+    Cache a backend method's result, keyed by the database, method name and arguments.
+
+    The cache is checked against the database file first, so results never outlive a data reload.
+    With CRIME_PROFILE on, every computed (not cached) result is timed.
+    """
+    compute = profiled("fetch")(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return compute(self, *args, **kwargs)
+        self.check_data_version()
+        key = (self.db_path, method.__name__, hashable(args), hashable(sorted(kwargs.items())))
+        return self.cache.get_or_compute(key, lambda: compute(self, *args, **kwargs))
+    return wrapper
+
+
+def _async_variant(name):
+    """Build an async method that runs the backend's <name> method on the query thread pool."""
+    async def method(self, *args, **kwargs):
+        return await self.run_async(getattr(self, name), *args, **kwargs)
+    method.__name__ = method.__qualname__ = f"{name}_async"
+    method.__doc__ = f"Async version of {name}: runs the query on a worker thread and awaits it."
+    return method
+
+
+class Crime_Backend:
+    """
+    What every data backend of the dashboard shares: the result cache and its data version check,
+    the async twins of the fetch methods, and the incident list built on incident_page.
+
+    A backend subclasses this and provides data_signature, incident_page, fetch_offense_counts
+    and the other fetch methods;
+    Crime_API (SQLite) and Parquet_Backend.Parquet_Crime_API are the two there are.
+    """
+
+    def __init__(self, db_path, cache=SHARED_CACHE, check_interval=1.0):
+        """
+        Parameters:
+            db_path (str): Where the data is; the cache uses it to tell backends' results apart.
+            cache (QueryCache or None): Result cache shared across sessions, None turns caching off.
+            check_interval (float): Seconds between checks of the data for changes.
+        """
+        self.db_path = db_path
+        self.cache = cache
+        self.check_interval = check_interval
+        self._last_check = 0.0
+
+    def __init_subclass__(cls, **kwargs):
+        # Every fetch and search method gets an awaitable twin, e.g. fetch_top_districts_async. The
+        # twin looks the method up on the instance, so it always runs the backend's own version.
+        super().__init_subclass__(**kwargs)
+        for name in dir(cls):
+            if name.startswith(("fetch_", "get_unique_", "search_")) and not name.endswith("_async") \
+                    and not hasattr(cls, f"{name}_async"):
+                setattr(cls, f"{name}_async", _async_variant(name))
+
+    def data_signature(self):
+        """Describe the current state of the data; it changes whenever the data does."""
+        raise NotImplementedError
+
+    def check_data_version(self):
+        """Clear this database's cached results if the file changed (checked at most every check_interval)."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        self.cache.check_signature(self.db_path, self.data_signature())
+
+    def cache_stats(self):
+        """Return the shared cache's hit/miss counters, or None when caching is off."""
+        return None if self.cache is None else self.cache.stats()
+
+    def close(self):
+        """Release whatever the backend holds open."""
+
+    async def run_async(self, method, *args, **kwargs):
+        """Run a blocking backend method on the query thread pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(QUERY_EXECUTOR, functools.partial(method, *args, **kwargs))
+
+    @cached_query
+    def search_crime_types(self, text, limit=20):
+        """
+        Find offenses containing every word of a search, most common first.
+
+        This filters the whole fetch_offense_counts list; a backend with a search index can do better.
+
+        Returns:
+            list: Matching offense names (lower case). An empty search returns the most common offenses.
+        """
+        return match_offenses(self.fetch_offense_counts()["Crime"].tolist(), text, limit)
+
+    @cached_query
+    def fetch_incidents(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes",
+                        after=None, limit=100):
+        """
+        Fetch a page of the incident list (see incident_page).
+
+        Returns:
+            dict: "incidents" is the page, "next_after" the cursor for the next page (None on the last page).
+        """
+        # One extra row tells us whether there is a next page without counting everything
+        df = self.incident_page(start, end, hours, districts, crime_type, after, limit + 1)
+        next_after = None
+        if len(df) > limit:
+            df = df.iloc[:limit]
+            last = df.iloc[-1]
+            next_after = (int(last["OCCURRED_TS"]), last["INCIDENT_NUMBER"])
+        return {"incidents": df.reset_index(drop=True), "next_after": next_after}
+
+    def iter_incidents(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes",
+                       batch_size=50_000):
+        """
+        Yield every incident matching the filters as DataFrames of up to batch_size rows.
+
+        Each batch is its own keyset query and nothing is cached, so an export of millions of rows
+        never holds more than one batch in memory or a pooled connection between batches.
+        """
+        after = None
+        while True:
+            df = self.incident_page(start, end, hours, districts, crime_type, after, batch_size)
+            if df.empty:
+                return
+            yield df
+            if len(df) < batch_size:
+                return
+            last = df.iloc[-1]
+            after = (int(last["OCCURRED_TS"]), last["INCIDENT_NUMBER"])
+
+    def iter_incident_batches(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes",
+                              batch_size=50_000):
+        """Yield the incidents matching the filters as Arrow RecordBatches (needs pyarrow)."""
+        import pyarrow as pa  # only needed for Arrow exports
+        schema = incident_arrow_schema()
+        for df in self.iter_incidents(start, end, hours, districts, crime_type, batch_size):
+            yield pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False)
+
+    def export_incidents(self, path, start=None, end=None, hours=None, districts=None, crime_type="All Crimes",
+                         batch_size=50_000):
+        """
+        Write the incidents matching the filters to a Parquet file, one batch at a time.
+
+        Returns:
+            int: Number of incidents written.
+        """
+        import pyarrow.parquet as pq
+        written = 0
+        with pq.ParquetWriter(path, incident_arrow_schema()) as writer:
+            for batch in self.iter_incident_batches(start, end, hours, districts, crime_type, batch_size):
+                writer.write_batch(batch)
+                written += batch.num_rows
+        return written
 
-class Crime_API:
+
+class Crime_API(Crime_Backend):
 
     # this path is for me to get connected to my database
-    def __init__(self, db_path="/Users/nt/Desktop/Crime/crime_dashboard.db"):
-        """Initialize the connection to the SQLite database."""
-        self.db_path = db_path
+    def __init__(self, db_path="/Users/nt/Desktop/Crime/crime_dashboard.db", pool_size=8,
+                 cache=SHARED_CACHE, check_interval=1.0):
+        """
+        Initialize the connection pool for the SQLite database.
+
+        Parameters:
+            db_path (str): Path to the SQLite database file.
+            pool_size (int): Maximum number of open read-only connections.
+            cache (QueryCache or None): Result cache shared across sessions, None turns caching off.
+            check_interval (float): Seconds between checks of the database file for new data.
+        """
+        super().__init__(db_path, cache, check_interval)
+        self.pool = ConnectionPool(db_path, max_size=pool_size)
+        self._cube = None
+        self._cube_signature = None
+        self._cube_lock = threading.Lock()
+        self._dimensions = None
+        self._dimensions_signature = None
+        self._dimensions_lock = threading.Lock()
+
+    def data_signature(self):
+        """
+        Describe the current state of the database file.
+
+        The modification time and size of the database and its WAL file change on every commit,
+        and the inode changes when Read_Replica.py swaps in a new copy, so comparing signatures
+        tells us when cached results are out of date.
+        """
+        signature = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                info = os.stat(path)
+                signature.append((info.st_ino, info.st_mtime_ns, info.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def time_cube(self):
+        """
+        Return the crime_time_cube table as a TimeCube, read again only after the database changed.
+
+        The cube is kept on the instance rather than in the query cache, so it is reused even with
+        caching off, and reading it once serves every time chart.
+        """
+        signature = self.data_signature()
+        with self._cube_lock:
+            if self._cube is None or signature != self._cube_signature:
+                with self.get_db_connection() as conn:
+                    self._cube = load_time_cube(conn)
+                self._cube_signature = signature
+            return self._cube
+
+    def dimensions(self, reload=False):
+        """
+        Return the dimension tables as Dimension objects (see Crime_Storage.py), keyed by column.
+
+        They are read again after the database changed, or when an ID turns up that they don't
+        know (a load that committed in between).
+        """
+        signature = self.data_signature()
+        with self._dimensions_lock:
+            if self._dimensions is None or reload or signature != self._dimensions_signature:
+                with self.get_db_connection() as conn:
+                    self._dimensions = load_dimensions(conn)
+                self._dimensions_signature = signature
+            return self._dimensions
+
+    def decode(self, df):
+        """
+        Replace the <column>_ID columns of a crime_incidents result with their values as categoricals.
+
+        Parameters:
+            df (pd.DataFrame): Query result with ID columns, e.g. DISTRICT_ID.
+
+        Returns:
+            pd.DataFrame: The same frame with DISTRICT etc. in place of the ID columns.
+        """
+        coded = [column for column in CODED_COLUMNS if f"{column}_ID" in df.columns]
+        dimensions = self.dimensions()
+        if not all(dimensions[column].knows(df[f"{column}_ID"].to_numpy()) for column in coded):
+            dimensions = self.dimensions(reload=True)
+        for column in coded:
+            df[f"{column}_ID"] = dimensions[column].decode(df[f"{column}_ID"].to_numpy())
+        return df.rename(columns={f"{column}_ID": column for column in coded})
 
     def get_db_connection(self):
-        """Create and return a connection to the database."""
-        return sqlite3.connect(self.db_path)
+        """Borrow a read-only connection from the pool (use it in a with block)."""
+        return self.pool.connection()
 
+    @profiled_query
     def execute_query(self, query: str, params: tuple = ()) -> pd.DataFrame:
         """Run a SQL query and return a DataFrame."""
         with self.get_db_connection() as conn:
             return pd.read_sql(query, conn, params=params)
 
+    def close(self):
+        """Close all pooled database connections."""
+        self.pool.close()
+
+    @cached_query
     def fetch_boston_top_crimes(self, year: int = None, limit: int = 10) -> pd.DataFrame:
         """Fetch the top N most frequent crimes in Boston for a given year."""
+        # Grouping on the integer ID is cheaper than on the text; the few hundred groups are then
+        # decoded and merged by lower-cased name (one offense can be spelled several ways)
         query = """
-            SELECT LOWER(OFFENSE_DESCRIPTION) AS Crime, COUNT(*) AS crime_count
-            FROM boston_crime
+            SELECT OFFENSE_DESCRIPTION_ID, COUNT(*) AS crime_count
+            FROM crime_incidents
         """
         params = []
 
@@ -35,11 +570,15 @@ class Crime_API:
             query += " WHERE YEAR = ?"
             params.append(year)
 
-        query += " GROUP BY Crime ORDER BY crime_count DESC LIMIT ?;"
-        params.append(limit)
+        query += " GROUP BY OFFENSE_DESCRIPTION_ID;"
 
-        return self.execute_query(query, tuple(params))
+        df = self.decode(self.execute_query(query, tuple(params)))
+        df["Crime"] = df["OFFENSE_DESCRIPTION"].astype(object).str.lower()
+        df = df.groupby("Crime", dropna=False, sort=False, as_index=False)["crime_count"].sum()
+        # A year without incidents sums to an object column, which nlargest rejects
+        return df.astype({"crime_count": "int64"}).nlargest(limit, "crime_count").reset_index(drop=True)
 
+    @cached_query
     def fetch_top_districts(self, year):
         """Fetch the top 5 districts with the highest crime counts in Boston for a given year."""
         query = """
@@ -51,44 +590,57 @@ class Crime_API:
         """
         return self.execute_query(query, (year,))
 
+    @cached_query
     def fetch_crime_by_day_of_week(self, year):
         """Fetch total crime counts grouped by day of the week for a selected year."""
-        query = """
-            SELECT LOWER(DAY_OF_WEEK) AS DAY_OF_WEEK, COUNT(*) AS crime_count
-            FROM boston_crime
-            WHERE YEAR = ?
-            GROUP BY DAY_OF_WEEK
+        df = self.time_cube().total(["DOW"], YEAR=year).rename(columns={"DOW": "DAY_OF_WEEK"})
+        return complete_weekdays(df)
+
+    @cached_query
+    def fetch_year_overview(self, year, top_crimes=10, top_districts=5):
         """
-        df = self.execute_query(query, (year,))
+        Fetch everything the Crime Trends page shows for a year.
 
-        # Ensure all weekdays are represented, even if some have zero crimes
-        weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        crime_dict = {day: 0 for day in weekdays}
+        The districts, weekdays and months are sums over the time cube; only the top crimes need
+        the offense, which the cube does not have, so they come from the indexed top crimes query.
 
-        for _, row in df.iterrows():
-            crime_dict[row["DAY_OF_WEEK"].strip().lower()] = row["crime_count"]
+        Returns:
+            dict: DataFrames shaped like the individual fetch methods return them:
+                "top_crimes" (fetch_boston_top_crimes), "top_districts" (fetch_top_districts),
+                "day_of_week" (fetch_crime_by_day_of_week) and "monthly" (fetch_crime_by_month_all_years
+                for this year only).
+        """
+        cube = self.time_cube()
 
-        final_df = pd.DataFrame(list(crime_dict.items()), columns=["DAY_OF_WEEK", "crime_count"])
-        final_df["DAY_OF_WEEK"] = pd.Categorical(final_df["DAY_OF_WEEK"], categories=weekdays, ordered=True)
+        def year_total(by):
+            # A year the cube doesn't have comes back with an object crime_count column, which
+            # nlargest rejects; int64 makes that an empty chart instead
+            return cube.total(by, YEAR=year).astype({"crime_count": "int64"})
 
-        return final_df.sort_values("DAY_OF_WEEK")
+        district_df = year_total(["DISTRICT"]).nlargest(top_districts, "crime_count")
+        day_df = complete_weekdays(year_total(["DOW"]).rename(columns={"DOW": "DAY_OF_WEEK"}))
 
+        monthly_df = year_total(["MONTH"]).dropna(subset=["MONTH"])
+        monthly_df["MONTH"] = monthly_df["MONTH"].astype(int)
+        monthly_df.insert(0, "YEAR", int(year))
+
+        return {
+            "top_crimes": self.fetch_boston_top_crimes(year, top_crimes),
+            "top_districts": district_df.reset_index(drop=True),
+            "day_of_week": day_df,
+            "monthly": monthly_df.reset_index(drop=True),
+        }
+
+    @cached_query
     def fetch_crime_by_month_all_years(self):
         """Fetch total crime counts grouped by month for all years."""
-        query = """
-            SELECT YEAR, MONTH, COUNT(*) AS crime_count
-            FROM boston_crime
-            GROUP BY YEAR, MONTH
-            ORDER BY YEAR, MONTH
-        """
-        df = self.execute_query(query)
-
-        df = df.dropna(subset=["MONTH"])
+        df = self.time_cube().total(["YEAR", "MONTH"]).dropna(subset=["MONTH"])
         df["YEAR"] = df["YEAR"].astype(int)
         df["MONTH"] = df["MONTH"].astype(int)
 
-        return df
+        return df.reset_index(drop=True)
 
+    @cached_query
     def fetch_crime_category_proportions(self, selected_category: str) -> pd.DataFrame:
         """
         Fetch crime counts for a selected category vs. all other crimes per year.
@@ -113,11 +665,12 @@ class Crime_API:
 
         return df[["YEAR", selected_category, "Other Crimes"]]
 
+    @cached_query
     def fetch_crime_locations(self, year, crime_type="All Crimes"):
         """Fetch crime locations (Lat, Long) for a selected year."""
         query = """
             SELECT Lat, Long
-            FROM boston_crime
+            FROM crime_incidents
             WHERE YEAR = ?
             AND Lat IS NOT NULL 
             AND Long IS NOT NULL
@@ -125,36 +678,159 @@ class Crime_API:
         params = [year]
 
         if crime_type != "All Crimes":
-            query += " AND LOWER(OFFENSE_DESCRIPTION) = LOWER(?)"
+            query += f" AND {OFFENSE_FILTER}"
             params.append(crime_type)
 
         return self.execute_query(query, tuple(params))
 
+    @cached_query
+    def list_tables(self):
+        """Return the names of the tables in the database (optional ones may not be built yet)."""
+        df = self.execute_query("SELECT name FROM sqlite_master WHERE type = 'table'")
+        return df["name"].tolist()
+
+    @cached_query
+    def fetch_crime_density(self, year, crime_type="All Crimes", zoom=13, cell_pixels=TILE_CELL_PIXELS,
+                            bounds=None):
+        """
+        Fetch crime locations for a selected year binned into a grid that matches a map zoom level.
+
+        Each row is one grid cell: the average position of its incidents (so the heatmap spot sits
+        where the crimes are, not at the cell corner) and how many incidents fell in it. When the
+        heatmap_tiles table was built for this zoom level the cells are read from it, otherwise
+        they are computed from crime_incidents.
+
+        Parameters:
+            year (int): Year to show.
+            crime_type (str): Offense to show, or "All Crimes".
+            zoom (int): Map zoom level the cells are sized for.
+            cell_pixels (int): Approximate screen pixels per cell.
+            bounds (tuple, optional): (south, west, north, east) to only fetch the visible area.
+
+        Returns:
+            pd.DataFrame: Columns Lat, Long and crime_count.
+        """
+        lat_step, lon_step = grid_cell_size(zoom, cell_pixels)
+        offense = ALL_CRIMES if crime_type == "All Crimes" else crime_type.lower()
+
+        if zoom in TILE_ZOOMS and cell_pixels == TILE_CELL_PIXELS and "heatmap_tiles" in self.list_tables():
+            query = """
+                SELECT lat_sum / crime_count AS Lat, long_sum / crime_count AS Long, crime_count
+                FROM heatmap_tiles
+                WHERE ZOOM = ? AND YEAR = ? AND OFFENSE_LOWER = ?
+            """
+            params = [zoom, year, offense]
+            if bounds is not None:
+                south, west, north, east = bounds
+                query += " AND CELL_Y BETWEEN ? AND ? AND CELL_X BETWEEN ? AND ?"
+                params += [int((south + 90) / lat_step), int((north + 90) / lat_step),
+                           int((west + 180) / lon_step), int((east + 180) / lon_step)]
+            return self.execute_query(query, tuple(params))
+
+        query = """
+            SELECT AVG(Lat) AS Lat, AVG(Long) AS Long, COUNT(*) AS crime_count
+            FROM crime_incidents
+            WHERE YEAR = ?
+            AND Lat IS NOT NULL
+            AND Long IS NOT NULL
+        """
+        params = [year]
+
+        if offense != ALL_CRIMES:
+            query += f" AND {OFFENSE_FILTER}"
+            params.append(offense)
+
+        if bounds is not None:
+            south, west, north, east = bounds
+            query += " AND Lat BETWEEN ? AND ? AND Long BETWEEN ? AND ?"
+            params += [south, north, west, east]
+
+        # Shift by 90/180 so every cell index is positive and CAST truncation acts like floor
+        query += " GROUP BY CAST((Lat + 90) / ? AS INTEGER), CAST((Long + 180) / ? AS INTEGER)"
+        params += [lat_step, lon_step]
+
+        return self.execute_query(query, tuple(params))
+
+    @cached_query
+    def fetch_hotspots(self, mode="minibatch", limit=10):
+        """
+        Fetch the crime hotspots saved by Hotspot_Clustering.py.
+
+        Parameters:
+            mode (str): "minibatch" or "grid", the clustering the hotspots come from.
+            limit (int): Number of hotspots to return, largest first.
+
+        Returns:
+            pd.DataFrame: Columns RANK, Lat, Long, crime_count, STREET and DISTRICT
+                          (empty until the hotspots have been trained).
+        """
+        if "crime_hotspots" not in self.list_tables():
+            return pd.DataFrame(columns=HOTSPOT_COLUMNS)
+        query = f"""
+            SELECT {', '.join(HOTSPOT_COLUMNS)}
+            FROM crime_hotspots
+            WHERE MODE = ?
+            ORDER BY RANK
+            LIMIT ?
+        """
+        return self.execute_query(query, (mode, limit))
+
+    @cached_query
+    def fetch_forecast(self, year, week):
+        """
+        Fetch the expected number of incidents per map cell for one week (see Hotspot_Forecast.py).
+
+        Parameters:
+            year (int): ISO year.
+            week (int): ISO week number (1-53).
+
+        Returns:
+            pd.DataFrame: Columns Lat, Long, expected_count and crime_count (the actual count,
+                          missing for the week after the newest data), busiest cells first.
+                          Empty for weeks without features or before the forecast is built.
+        """
+        empty = pd.DataFrame(columns=["Lat", "Long", "expected_count", "crime_count"])
+        if "crime_forecast_model" not in self.list_tables():
+            return empty
+        model = dict(self.execute_query(
+            "SELECT NAME, VALUE FROM crime_forecast_model WHERE NAME IN ('weights', 'next_week')"
+        ).itertuples(index=False, name=None))
+        if "weights" not in model:
+            return empty
+        query = f"""
+            SELECT WEEK, CELL_Y, CELL_X, {', '.join(FEATURES)}, crime_count
+            FROM crime_forecast_features
+            WHERE WEEK = ?
+        """
+        features = self.execute_query(query, (week_number(year, week),))
+        return score_features(features, json.loads(model["weights"]), json.loads(model["next_week"]))
+
+    @cached_query
     def get_unique_crime_categories(self):
         """Fetch distinct crime categories from the crime_category_counts table."""
         query = "SELECT DISTINCT CRIME_CATEGORY FROM crime_category_counts ORDER BY CRIME_CATEGORY ASC;"
         df = self.execute_query(query)
         return df["CRIME_CATEGORY"].tolist()
 
+    @cached_query
     def fetch_sankey_data(self, start_year=2020, end_year=2025):
         """Fetch the top 3 crime categories per district per year."""
+        # crime_category_by_district_year already holds one row per (year, district, category),
+        # so ranking runs over a few hundred rows instead of joining the raw incidents
         query = """
             WITH RankedCrimes AS (
                 SELECT
-                    b.YEAR AS Year,
-                    b.DISTRICT AS District,
-                    c.CRIME_CATEGORY AS Crime_Category,
-                    SUM(c.crime_count) AS Crime_Count,
+                    YEAR AS Year,
+                    DISTRICT AS District,
+                    CRIME_CATEGORY AS Crime_Category,
+                    crime_count AS Crime_Count,
                     RANK() OVER (
-                        PARTITION BY b.YEAR, b.DISTRICT 
-                        ORDER BY SUM(c.crime_count) DESC
+                        PARTITION BY YEAR, DISTRICT
+                        ORDER BY crime_count DESC
                     ) AS rank
-                FROM boston_crime b
-                JOIN crime_category_counts c
-                ON b.YEAR = c.YEAR
-                WHERE b.DISTRICT IS NOT NULL
-                AND b.YEAR BETWEEN ? AND ?
-                GROUP BY b.YEAR, b.DISTRICT, c.CRIME_CATEGORY
+                FROM crime_category_by_district_year
+                WHERE DISTRICT IS NOT NULL
+                AND YEAR BETWEEN ? AND ?
             )
             SELECT Year, District, Crime_Category, Crime_Count
             FROM RankedCrimes
@@ -163,6 +839,7 @@ class Crime_API:
         """
         return self.execute_query(query, (start_year, end_year))
 
+    @cached_query
     def fetch_crime_category_trends(self, selected_category):
         """Fetch crime category trends over the years for a specific category."""
         query = """
@@ -177,20 +854,103 @@ class Crime_API:
         """
         return self.execute_query(query, (selected_category,))
 
+    @cached_query
     def get_unique_crime_types(self):
         """
-        Fetches a list of unique crime types from the database.
+        Fetches a list of unique crime types from the offense dictionary.
 
         Returns:
             list: A sorted list of unique crime types with "All Crimes" as the first option.
         """
+        # offense_dictionary has one row per offense, so this never scans boston_crime
+        df = self.execute_query("SELECT OFFENSE_LOWER AS Crime FROM offense_dictionary ORDER BY Crime ASC")
+        return ["All Crimes"] + df["Crime"].tolist()
+
+    @cached_query
+    def fetch_offense_counts(self, limit=None):
+        """
+        Fetch offenses with their incident counts, most common first.
 
-        # SQL query to get distinct crime types (case-insensitive)
-        query = "SELECT DISTINCT LOWER(OFFENSE_DESCRIPTION) AS Crime FROM boston_crime ORDER BY Crime ASC"
+        Parameters:
+            limit (int, optional): Number of offenses to return, all of them when None.
 
-        # Execute the query and store results in a DataFrame
-        df = self.execute_query(query)
+        Returns:
+            pd.DataFrame: Columns Crime and crime_count.
+        """
+        query = """
+            SELECT OFFENSE_LOWER AS Crime, crime_count
+            FROM offense_dictionary
+            ORDER BY crime_count DESC, OFFENSE_LOWER
+        """
+        if limit is None:
+            return self.execute_query(query)
+        return self.execute_query(query + " LIMIT ?", (limit,))
+
+    @cached_query
+    def search_crime_types(self, text, limit=20):
+        """
+        Find offenses containing every word of a search, most common first.
+
+        Parameters:
+            text (str): What the user typed, e.g. "shoplift" or "theft bicycle".
+            limit (int): Maximum number of offenses to return.
+
+        Returns:
+            list: Matching offense names (lower case). An empty search returns the most common offenses.
+        """
+        match = fts_query(text)
+        if match is not None and "offense_search" in self.list_tables():
+            query = """
+                SELECT d.OFFENSE_LOWER AS Crime
+                FROM offense_search s
+                JOIN offense_dictionary d ON d.ID = s.rowid
+                WHERE offense_search MATCH ?
+                ORDER BY d.crime_count DESC, d.OFFENSE_LOWER
+                LIMIT ?
+            """
+            return self.execute_query(query, (match, limit))["Crime"].tolist()
+        # Short words can't use the trigram index; the dictionary is small enough to filter here
+        return match_offenses(self.fetch_offense_counts()["Crime"].tolist(), text, limit)
+
+    @cached_query
+    def get_unique_districts(self):
+        """Fetch the police districts that have incidents, sorted."""
+        query = "SELECT DISTINCT DISTRICT FROM crime_count_by_district_year WHERE DISTRICT IS NOT NULL ORDER BY DISTRICT"
+        return self.execute_query(query)["DISTRICT"].tolist()
+
+    def incident_page(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes",
+                      after=None, limit=100):
+        """
+        Fetch one page of incidents matching the filters, in (OCCURRED_TS, INCIDENT_NUMBER) order.
+
+        Pages use keyset pagination: `after` is the (OCCURRED_TS, INCIDENT_NUMBER) of the last row of
+        the previous page, so every page is an index range scan that starts where the last one
+        stopped, however deep into the results it is (OFFSET would step over all the earlier rows).
+
+        Parameters:
+            start, end, hours, districts, crime_type: Filters, see incident_filter_sql.
+            after (tuple, optional): Cursor from the previous page, None for the first page.
+            limit (int): Rows per page.
+
+        Returns:
+            pd.DataFrame: Up to `limit` rows with the INCIDENT_LIST_COLUMNS.
+        """
+        conditions, params = incident_filter_sql(start, end, hours, districts, crime_type, after)
+        columns = [f"{column}_ID" if column in CODED_COLUMNS else column for column in INCIDENT_LIST_COLUMNS]
+        query = f"""
+            SELECT {', '.join(columns)}
+            FROM crime_incidents
+            WHERE {' AND '.join(conditions)}
+            ORDER BY OCCURRED_TS, INCIDENT_NUMBER
+            LIMIT ?
+        """
+        return self.decode(self.execute_query(query, tuple(params + [limit])))
+
+    @cached_query
+    def fetch_incident_count(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes"):
+        """Count the incidents matching the filters (see incident_filter_sql)."""
+        conditions, params = incident_filter_sql(start, end, hours, districts, crime_type)
+        query = f"SELECT COUNT(*) AS crime_count FROM crime_incidents WHERE {' AND '.join(conditions)}"
+        return int(self.execute_query(query, tuple(params))["crime_count"].iloc[0])
 
-        # Ensure there are no missing values and prepend "All Crimes" for UI dropdown
-        return ["All Crimes"] + df["Crime"].dropna().tolist()
 
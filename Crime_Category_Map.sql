@@ -0,0 +1,101 @@
+-- Maps each OFFENSE_DESCRIPTION to the dashboard's crime category.
+-- Offenses that are not listed here count as 'Uncategorized'. The summary tables built by
+-- Schema_Migration.py and the incremental loads in Crime_ETL.py both join on this table,
+-- so this is the one place to change when a category gains or loses an offense.
+CREATE TABLE IF NOT EXISTS offense_category_map (
+    OFFENSE_DESCRIPTION TEXT PRIMARY KEY,  -- Offense exactly as it appears in boston_crime
+    CRIME_CATEGORY TEXT NOT NULL           -- Crime category classification
+);
+
+-- Fraud-related crimes
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('FRAUD - FALSE PRETENSE / SCHEME', 'Fraud'),
+    ('FRAUD - IMPERSONATION', 'Fraud'),
+    ('FRAUD - WELFARE', 'Fraud'),
+    ('FRAUD - CREDIT CARD / ATM FRAUD', 'Fraud'),
+    ('FRAUD - WIRE', 'Fraud');
+
+-- Crimes involving violence or threats
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('THREATS TO DO BODILY HARM', 'Violent Crimes'),
+    ('ASSAULT - SIMPLE', 'Violent Crimes'),
+    ('ASSAULT - AGGRAVATED', 'Violent Crimes'),
+    ('ROBBERY', 'Violent Crimes'),
+    ('MURDER, NON-NEGLIGENT MANSLAUGHTER', 'Violent Crimes'),
+    ('INTIMIDATING WITNESS', 'Violent Crimes'),
+    ('KIDNAPPING/CUSTODIAL KIDNAPPING/ ABDUCTION', 'Violent Crimes'),
+    ('MANSLAUGHTER - NEGLIGENCE', 'Violent Crimes'),
+    ('MANSLAUGHTER - VEHICLE - NEGLIGENCE', 'Violent Crimes'),
+    ('JUSTIFIABLE HOMICIDE', 'Violent Crimes'),
+    ('AFFRAY', 'Violent Crimes');
+
+-- Theft and burglary-related offenses
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('LARCENY THEFT FROM BUILDING', 'Theft & Burglary'),
+    ('LARCENY SHOPLIFTING', 'Theft & Burglary'),
+    ('LARCENY THEFT FROM MV - NON-ACCESSORY', 'Theft & Burglary'),
+    ('LARCENY ALL OTHERS', 'Theft & Burglary'),
+    ('LARCENY THEFT OF MV PARTS & ACCESSORIES', 'Theft & Burglary'),
+    ('LARCENY THEFT OF BICYCLE', 'Theft & Burglary'),
+    ('AUTO THEFT', 'Theft & Burglary'),
+    ('AUTO THEFT - MOTORCYCLE / SCOOTER', 'Theft & Burglary'),
+    ('AUTO THEFT - LEASED/RENTED VEHICLE', 'Theft & Burglary'),
+    ('BURGLARY - COMMERCIAL', 'Theft & Burglary'),
+    ('BURGLARY - RESIDENTIAL', 'Theft & Burglary'),
+    ('STOLEN PROPERTY - BUYING / RECEIVING / POSSESSING', 'Theft & Burglary');
+
+-- Drug and alcohol-related crimes
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('DRUGS - POSSESSION/ SALE/ MANUFACTURING/ USE', 'Drug & Alcohol Crimes'),
+    ('DRUGS - POSSESSION OF DRUG PARAPHERNALIA', 'Drug & Alcohol Crimes'),
+    ('OPERATING UNDER THE INFLUENCE (OUI) ALCOHOL', 'Drug & Alcohol Crimes'),
+    ('OPERATING UNDER THE INFLUENCE (OUI) DRUGS', 'Drug & Alcohol Crimes'),
+    ('LIQUOR/ALCOHOL - DRINKING IN PUBLIC', 'Drug & Alcohol Crimes'),
+    ('LIQUOR LAW VIOLATION', 'Drug & Alcohol Crimes'),
+    ('DRUNKENNESS', 'Drug & Alcohol Crimes');
+
+-- Crimes related to motor vehicles
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('M/V - LEAVING SCENE - PROPERTY DAMAGE', 'Vehicle-Related Crimes'),
+    ('M/V ACCIDENT - PERSONAL INJURY', 'Vehicle-Related Crimes'),
+    ('M/V ACCIDENT - PROPERTY DAMAGE', 'Vehicle-Related Crimes'),
+    ('M/V ACCIDENT - INVOLVING PEDESTRIAN - INJURY', 'Vehicle-Related Crimes'),
+    ('M/V ACCIDENT - INVOLVING BICYCLE - NO INJURY', 'Vehicle-Related Crimes'),
+    ('M/V ACCIDENT - INVOLVING BICYCLE - INJURY', 'Vehicle-Related Crimes'),
+    ('M/V ACCIDENT - OTHER', 'Vehicle-Related Crimes'),
+    ('TOWED MOTOR VEHICLE', 'Vehicle-Related Crimes');
+
+-- Crimes involving firearms or weapons
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('FIREARM/WEAPON - FOUND OR CONFISCATED', 'Firearm & Weapons Crimes'),
+    ('FIREARM/WEAPON - LOST', 'Firearm & Weapons Crimes'),
+    ('FIREARM/WEAPON - ACCIDENTAL INJURY / DEATH', 'Firearm & Weapons Crimes'),
+    ('WEAPON VIOLATION - CARRY/ POSSESSING/ SALE/ TRAFFICKING/ OTHER', 'Firearm & Weapons Crimes'),
+    ('EXPLOSIVES - POSSESSION OR USE', 'Firearm & Weapons Crimes');
+
+-- Crimes related to prostitution or sexual offenses
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('PROSTITUTION', 'Sex Crimes & Prostitution'),
+    ('PROSTITUTION - SOLICITING', 'Sex Crimes & Prostitution'),
+    ('PROSTITUTION - ASSISTING OR PROMOTING', 'Sex Crimes & Prostitution'),
+    ('SEXUAL ASSAULT', 'Sex Crimes & Prostitution');
+
+-- Cases involving death investigations
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('SUDDEN DEATH', 'Death Investigations'),
+    ('DEATH INVESTIGATION', 'Death Investigations'),
+    ('SUICIDE / SUICIDE ATTEMPT', 'Death Investigations');
+
+-- Arson and explosives-related incidents
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('ARSON', 'Arson & Explosives'),
+    ('BOMB THREAT', 'Arson & Explosives');
+
+-- Crimes involving animals
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('ANIMAL INCIDENTS (DOG BITES, LOST DOG, ETC)', 'Animal Crimes'),
+    ('ANIMAL ABUSE', 'Animal Crimes');
+
+-- Cases involving a person being investigated
+INSERT OR REPLACE INTO offense_category_map (OFFENSE_DESCRIPTION, CRIME_CATEGORY) VALUES
+    ('INVESTIGATE PERSON', 'Investigate Person');
@@ -0,0 +1,49 @@
+"""
+Deployment settings for the crime dashboard, read from environment variables.
+
+    CRIME_BACKEND      "sqlite" (default) or "parquet"
+    CRIME_DB_PATH      SQLite database file (the primary, which Crime_ETL.py writes to)
+    CRIME_REPLICA_PATH Read-only copy made by Read_Replica.py; when set, the dashboard reads this file
+                       and loads into CRIME_DB_PATH never touch the file it is reading
+    CRIME_NUM_PROCS    Number of dashboard server processes (default 1)
+    CRIME_CACHE_PATH   SQLite file for a query cache shared by all server processes (see Query_Cache.py)
+    CRIME_PARQUET_DIR  Directory written by Parquet_Backend.export_parquet
+    CRIME_SNAPSHOT_DIR Directory written by Dashboard_Snapshot.py; when set, the dashboard serves
+                       those pre-rendered views and never opens the database
+    CRIME_PROFILE      "1" to time queries and chart building (see Crime_Profiler.py)
+    CRIME_PROFILE_LOG  File the profiler appends one JSON line per timed call to
+"""
+import os
+
+BACKEND = os.environ.get("CRIME_BACKEND", "sqlite").lower()
+DB_PATH = os.environ.get("CRIME_DB_PATH", "/Users/nt/Desktop/Crime/crime_dashboard.db")
+PARQUET_DIR = os.environ.get("CRIME_PARQUET_DIR", os.path.join(os.path.dirname(DB_PATH), "crime_parquet"))
+SNAPSHOT_DIR = os.environ.get("CRIME_SNAPSHOT_DIR", "")
+REPLICA_PATH = os.environ.get("CRIME_REPLICA_PATH", "")
+NUM_PROCS = int(os.environ.get("CRIME_NUM_PROCS", "1"))
+CACHE_PATH = os.environ.get("CRIME_CACHE_PATH", "")
+PROFILE = os.environ.get("CRIME_PROFILE", "") not in ("", "0")
+PROFILE_LOG = os.environ.get("CRIME_PROFILE_LOG", "")
+
+# Years offered by the dashboard's year widgets (and pre-rendered by Dashboard_Snapshot.py)
+DASHBOARD_YEARS = list(range(2020, 2026))
+
+
+def create_crime_api(**kwargs):
+    """
+    Create the Crime_API for the configured backend.
+
+    Parameters:
+        **kwargs: Passed on to the Crime_API constructor (e.g. cache).
+
+    Returns:
+        Crime_Backend: A SQLite-backed Crime_API or a Parquet_Crime_API; both have the same fetch methods.
+    """
+    if BACKEND == "parquet":
+        from Parquet_Backend import Parquet_Crime_API  # pyarrow is only needed for this backend
+        return Parquet_Crime_API(PARQUET_DIR, **kwargs)
+    if BACKEND != "sqlite":
+        raise ValueError(f"Unknown CRIME_BACKEND {BACKEND!r}, expected 'sqlite' or 'parquet'.")
+
+    from CRIME_API import Crime_API
+    return Crime_API(REPLICA_PATH or DB_PATH, **kwargs)
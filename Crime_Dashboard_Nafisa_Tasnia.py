@@ -4,161 +4,360 @@ DS3500
 1/31/2025
 Homework 3: Build dashboard (This is my frontend code for visualizing the dashboard)
 """
+import datetime as dt
+import functools
 import panel as pn
-from Barchart_Temp import create_bar_chart
-from Line_chart_temp import create_line_chart
-from Making_Sankey import make_sankey
-from Heatmap_Template import create_heatmap
-from Stacked_chart_template_V2 import stacked_bar_chart
-from HW3_CRIME_API import Crime_API
+from Crime_Config import DASHBOARD_YEARS, NUM_PROCS, PROFILE, SNAPSHOT_DIR, create_crime_api
+from Crime_Profiler import diagnostics_page, metrics_handler, profiled
+from Dashboard_Snapshot import SNAPSHOT_ROUTE, Snapshots
+from Offense_Dictionary import match_offenses
 
-# Initialize Panel and CrimeAPI instance
-pn.extension(sizing_mode="stretch_width")
-crime_api = Crime_API()
+# The chart templates (hvplot, folium, plotly) are imported inside the chart functions. Those
+# libraries take seconds to import, so a new server process starts without them and each one is
+# loaded the first time a chart needs it.
 
-# Year Dropdown (For Crime Trends)
-year_options = list(range(2020, 2026))
-year_input = pn.widgets.Select(name="Select Year", options=year_options, value=2020)
+# Initialize Panel and CrimeAPI instance (CRIME_BACKEND picks SQLite or Parquet, see Crime_Config.py)
+# loading_indicator shows a spinner over each chart while its async callback is still running
+pn.extension(sizing_mode="stretch_width", loading_indicator=True)
 
-# Year Slider (For Crime Heatmap)
-year_slider = pn.widgets.IntSlider(name="Select Year", start=2020, end=2025, step=1, value=2022)
+# The crime type dropdown lists this many offenses at a time: the most common ones, or the ones
+# matching the search box, so it stays small however many offense types the data has
+CRIME_TYPE_OPTIONS = 50
 
-# Fetch unique crime categories dynamically
-crime_category_options = crime_api.get_unique_crime_categories()
-crime_category_dropdown = pn.widgets.Select(name="Select Crime Category",
-                                            options=crime_category_options, value=crime_category_options[0])
+# Rows per page of the Incident Explorer table
+INCIDENT_PAGE_ROWS = 100
 
-# Dropdown for Crime Type Selection (For Heatmap)
-crime_type_dropdown = pn.widgets.Select(name="Select Crime Type",
-                                        options=crime_api.get_unique_crime_types(), value="All Crimes")
+# Nothing is queried here: the dropdown options are read when a page is first built, from the
+# small summary tables and through the shared query cache, so only the first session pays for them
+if SNAPSHOT_DIR:
+    # Kiosk mode: every view was pre-rendered by Dashboard_Snapshot.py, so we never open the database
+    snapshots = Snapshots(SNAPSHOT_DIR)
+else:
+    crime_api = create_crime_api()
 
-def create_crime_chart(year):
+
+def crime_category_options():
+    """Crime categories for the category dropdown, from the data (or the snapshot manifest)."""
+    return snapshots.categories if SNAPSHOT_DIR else crime_api.get_unique_crime_categories()
+
+
+def crime_type_options(search=""):
+    """Crime type dropdown options: All Crimes, then the offenses matching the search (the most common when empty)."""
+    if SNAPSHOT_DIR:
+        return ["All Crimes"] + match_offenses(snapshots.crime_types[1:], search, CRIME_TYPE_OPTIONS)
+    return ["All Crimes"] + crime_api.search_crime_types(search, CRIME_TYPE_OPTIONS)
+
+
+@profiled("render")
+def stacked_bar_chart(df, x_col, y_cols, title, xlabel, ylabel):
+    """
+    The stacked bar chart template. It lives outside this repo, so it is timed here like the other templates.
+    """
+    from Stacked_chart_template_V2 import stacked_bar_chart as template
+    return template(df=df, x_col=x_col, y_cols=y_cols, title=title, xlabel=xlabel, ylabel=ylabel)
+
+@profiled("view")
+async def create_crime_chart(year):
     """
     Fetches and creates a bar chart of the top crimes in Boston for a given year.
     """
-    df = crime_api.fetch_boston_top_crimes(year)
+    from Barchart_Temp import create_bar_chart
+    df = (await crime_api.fetch_year_overview_async(year))["top_crimes"]
     return create_bar_chart(df=df, x_col="Crime", y_col="crime_count",
                             title=f"Top Crimes in Boston ({year})", xlabel="Crime", ylabel="Crime Count")
 
-def create_district_chart(year):
+@profiled("view")
+async def create_district_chart(year):
     """
     Fetches and creates a bar chart showing the top 5 crime districts in Boston for a given year.
     """
-    df = crime_api.fetch_top_districts(year)
+    from Barchart_Temp import create_bar_chart
+    df = (await crime_api.fetch_year_overview_async(year))["top_districts"]
     return create_bar_chart(df=df, x_col="DISTRICT", y_col="crime_count",
                             title=f"Top 5 Crime Districts ({year})", xlabel="District", ylabel="Crime Count")
 
-def create_day_of_week_chart(year):
+@profiled("view")
+async def create_day_of_week_chart(year):
     """
     Fetches and creates a line chart showing total crime counts by day of the week for a given year.
     """
-    df = crime_api.fetch_crime_by_day_of_week(year)
+    from Line_chart_temp import create_line_chart
+    df = (await crime_api.fetch_year_overview_async(year))["day_of_week"]
     return create_line_chart(df=df, x_col="DAY_OF_WEEK", y_col="crime_count",
                              title=f"Crime by Day of the Week ({year})", xlabel="Day of Week", ylabel="Crime Count")
 
 
-def create_monthly_trend_chart(year):
+@profiled("view")
+async def create_monthly_trend_chart(year):
     """
     Fetches and creates a line chart showing crime trends by month for a given year.
     """
-    df = crime_api.fetch_crime_by_month_all_years()
-    df = df[df["YEAR"] == year]  # Filter data for the selected year
+    from Line_chart_temp import create_line_chart
+    df = (await crime_api.fetch_year_overview_async(year))["monthly"]
     return create_line_chart(df=df, x_col="MONTH", y_col="crime_count",
                              title=f"Monthly Crime Trend ({year})", xlabel="Month", ylabel="Crime Count")
 
 
-def create_crime_category_trend_chart(selected_category):
+@profiled("view")
+async def create_crime_category_trend_chart(selected_category):
     """
     Fetches and creates a line chart showing crime trends over time for a selected crime category.
     """
-    df = crime_api.fetch_crime_category_trends(selected_category)
+    from Line_chart_temp import create_line_chart
+    df = await crime_api.fetch_crime_category_trends_async(selected_category)
     return create_line_chart(df=df, x_col="Year", y_col="Crime Count",
                              title=f"{selected_category} Trends Over Time", xlabel="Year", ylabel="Total Crime Count")
 
 
-def create_stacked_bar_chart(selected_category):
+@profiled("view")
+async def create_stacked_bar_chart(selected_category):
     """
     Fetches and creates a stacked bar chart comparing a selected crime category to all other crimes.
     """
-    df = crime_api.fetch_crime_category_proportions(selected_category)
+    df = await crime_api.fetch_crime_category_proportions_async(selected_category)
     return stacked_bar_chart(df=df, x_col="YEAR", y_cols=[selected_category, "Other Crimes"],
                              title=f"{selected_category} vs. Other Crimes", xlabel="Year", ylabel="Total Crime Count")
 
-def create_crime_heatmap(year, crime_type):
+@profiled("view")
+async def create_crime_heatmap(year, crime_type):
     """
     Fetches and creates a heatmap of crime locations for a given year and crime type.
     """
-    df = crime_api.fetch_crime_locations(year, crime_type)
+    from Heatmap_Template import create_heatmap
+    # Points are binned on the server at one zoom level past the start, so zooming in still looks sharp
+    df = await crime_api.fetch_crime_density_async(year, crime_type, zoom=13)
+    # Saved hotspots from Hotspot_Clustering.py are pinned on top (nothing is retrained here)
+    hotspots = await crime_api.fetch_hotspots_async()
     return create_heatmap(df=df, lat_col="Lat", lon_col="Long", center=[42.3601, -71.0589],
-                          zoom_start=12, height=750, width=1800)
+                          zoom_start=12, height=750, width=1800, weight_col="crime_count", markers=hotspots)
 
-def create_sankey_chart():
+@profiled("view")
+async def create_sankey_chart():
     """
     Fetches and creates a Sankey diagram to visualize the flow of crime categories across districts and years.
     """
-    df = crime_api.fetch_sankey_data()
+    from Making_Sankey import make_sankey
+    df = await crime_api.fetch_sankey_data_async()
     return make_sankey(df, "District", "Year", "Crime_Category", vals="Crime_Count")
 
 
-# to display sankey diagram
-sankey_pane = pn.pane.Plotly(create_sankey_chart())
-
-# Bind Functions to Widgets
-crime_chart_pane = pn.bind(create_crime_chart, year_input.param.value)
-district_chart_pane = pn.bind(create_district_chart, year_input.param.value)
-day_of_week_chart_pane = pn.bind(create_day_of_week_chart, year_input.param.value)
-monthly_trend_chart_pane = pn.bind(create_monthly_trend_chart, year_input.param.value)
-crime_heatmap_pane = pn.bind(create_crime_heatmap, year_slider.param.value, crime_type_dropdown.param.value)
-crime_category_chart_pane = pn.bind(create_stacked_bar_chart, crime_category_dropdown.param.value)
-crime_category_trend_chart_pane = pn.bind(create_crime_category_trend_chart, crime_category_dropdown.param.value)
-
-# Page 1 setup: Crime Trends Dashboard (shows some overall trends in the data)
-crime_dashboard = pn.Column(
-    pn.pane.Markdown("### Select Year to View Crime Trends"), year_input,
-    pn.Row(
-        pn.Card(crime_chart_pane, title="Top 10 Crimes in Boston", height=700, width=700),
-        pn.Card(day_of_week_chart_pane, title="Crime by Day of the Week", height=700, width=700),
-    ),
-    pn.Row(
-        pn.Card(district_chart_pane, title="Top 5 Crime Districts", height=700, width=700),
-        pn.Card(monthly_trend_chart_pane, title="Monthly Crime Trends", height=700, width=700),
+def bind_view(chart_function, *widgets):
+    """
+    Bind a chart function to its widgets, or in kiosk mode to the snapshots rendered from it.
+    """
+    if SNAPSHOT_DIR:
+        return pn.bind(functools.partial(snapshots.pane, chart_function.__name__), *widgets)
+    return pn.bind(chart_function, *widgets)
+
+
+def crime_type_picker(name):
+    """
+    The crime type dropdown and the search box that narrows it down as you type.
+
+    The dropdown only lists CRIME_TYPE_OPTIONS offenses at a time, so the search is how the rest
+    are reached.
+
+    Returns:
+        tuple: (search TextInput, crime type Select)
+    """
+    crime_type_dropdown = pn.widgets.Select(name=name, options=crime_type_options(), value="All Crimes")
+    crime_type_search = pn.widgets.TextInput(name="Search Crime Type", placeholder="e.g. shoplift")
+
+    async def update_crime_type_options(event):
+        """Refill the crime type dropdown with the offenses matching the search box."""
+        if SNAPSHOT_DIR:
+            options = crime_type_options(event.new)
+        else:
+            options = ["All Crimes"] + await crime_api.search_crime_types_async(event.new, CRIME_TYPE_OPTIONS)
+        # Keep the current choice in the list so the chart doesn't change while the user is typing
+        if crime_type_dropdown.value not in options:
+            options.append(crime_type_dropdown.value)
+        crime_type_dropdown.options = options
+
+    crime_type_search.param.watch(update_crime_type_options, "value_input")
+    return crime_type_search, crime_type_dropdown
+
+
+def crime_trends_page():
+    """
+    Page 1: Crime Trends (shows some overall trends in the data for a selected year).
+    """
+    year_input = pn.widgets.Select(name="Select Year", options=DASHBOARD_YEARS, value=2020)
+
+    # The callbacks are async, so Panel awaits them without blocking other sessions. The four charts
+    # share one fetch_year_overview result: the first callback runs the query and the other three
+    # wait for it in the shared cache.
+    return pn.Column(
+        pn.pane.Markdown("### Select Year to View Crime Trends"), year_input,
+        pn.Row(
+            pn.Card(bind_view(create_crime_chart, year_input.param.value),
+                    title="Top 10 Crimes in Boston", height=700, width=700),
+            pn.Card(bind_view(create_day_of_week_chart, year_input.param.value),
+                    title="Crime by Day of the Week", height=700, width=700),
+        ),
+        pn.Row(
+            pn.Card(bind_view(create_district_chart, year_input.param.value),
+                    title="Top 5 Crime Districts", height=700, width=700),
+            pn.Card(bind_view(create_monthly_trend_chart, year_input.param.value),
+                    title="Monthly Crime Trends", height=700, width=700),
+        )
+    )
+
+
+def heatmap_page():
+    """
+    Page 2: Crime Heatmap by year and crime type.
+    """
+    year_slider = pn.widgets.IntSlider(name="Select Year", start=DASHBOARD_YEARS[0], end=DASHBOARD_YEARS[-1],
+                                       step=1, value=2022)
+    crime_type_search, crime_type_dropdown = crime_type_picker("Select Crime Type")
+
+    return pn.Column(
+        pn.pane.Markdown("## Crime Heatmap by Year & Crime Type"),
+        pn.Row(year_slider, crime_type_search, crime_type_dropdown),
+        pn.Row(pn.Card(bind_view(create_crime_heatmap, year_slider.param.value, crime_type_dropdown.param.value),
+                       title="Crime Heatmap", width=900, height=600))
+    )
+
+
+def crime_category_page():
+    """
+    Page 3: Crime Category Analysis.
+    """
+    options = crime_category_options()
+    crime_category_dropdown = pn.widgets.Select(name="Select Crime Category", options=options, value=options[0])
+
+    return pn.Column(
+        pn.pane.Markdown("## Crime Category Analysis"),
+        pn.Row(crime_category_dropdown),
+        pn.Row(
+            pn.Card(bind_view(create_stacked_bar_chart, crime_category_dropdown.param.value),
+                    title="Stacked Crime Category Chart", height=600, width=700),
+            pn.Card(bind_view(create_crime_category_trend_chart, crime_category_dropdown.param.value),
+                    title="Crime Category Trends Over Time", height=600, width=700),
+        ),
+        # The Sankey diagram has no widgets; binding it still defers the query until the page is shown
+        pn.Card(bind_view(create_sankey_chart), title="Top 3 Crime Types by District Over Time", height=600, width=1400)
+    )
+
+
+def incident_explorer_page():
+    """
+    Page 4: Incident Explorer (the incidents themselves, filtered by date range, hours and district).
+    """
+    date_range = pn.widgets.DatetimeRangePicker(name="Date Range",
+                                                value=(dt.datetime(DASHBOARD_YEARS[-1], 1, 1), dt.datetime.now()))
+    hour_slider = pn.widgets.IntRangeSlider(name="Hour of Day", start=0, end=23, value=(0, 23))
+    district_choice = pn.widgets.MultiChoice(name="Districts", options=crime_api.get_unique_districts(),
+                                             placeholder="All districts")
+    crime_type_search, crime_type_dropdown = crime_type_picker("Crime Type")
+    previous_button = pn.widgets.Button(name="Previous", disabled=True)
+    next_button = pn.widgets.Button(name="Next")
+    summary = pn.pane.Markdown()
+    table = pn.widgets.Tabulator(disabled=True, show_index=False, height=600)
+
+    # Cursors of the pages before the current one, so Previous can go back; the first page's is None
+    cursors = [None]
+    state = {"next_after": None}
+
+    def filters():
+        start, end = date_range.value or (None, None)
+        hours = None if tuple(hour_slider.value) == (0, 23) else hour_slider.value
+        return dict(start=start, end=end, hours=hours, districts=district_choice.value,
+                    crime_type=crime_type_dropdown.value)
+
+    async def show_page():
+        page = await crime_api.fetch_incidents_async(**filters(), after=cursors[-1], limit=INCIDENT_PAGE_ROWS)
+        state["next_after"] = page["next_after"]
+        table.value = page["incidents"].drop(columns=["OCCURRED_TS"])
+        previous_button.disabled = len(cursors) == 1
+        next_button.disabled = page["next_after"] is None
+
+    async def refresh(event=None):
+        # New filters start again from the first page
+        del cursors[1:]
+        count = await crime_api.fetch_incident_count_async(**filters())
+        summary.object = f"**{count:,}** matching incidents, {INCIDENT_PAGE_ROWS} per page"
+        await show_page()
+
+    async def next_page(event):
+        cursors.append(state["next_after"])
+        await show_page()
+
+    async def previous_page(event):
+        cursors.pop()
+        await show_page()
+
+    for widget in (date_range, hour_slider, district_choice, crime_type_dropdown):
+        widget.param.watch(refresh, "value")
+    next_button.on_click(next_page)
+    previous_button.on_click(previous_page)
+    pn.state.onload(refresh)
+
+    return pn.Column(
+        pn.pane.Markdown("## Incident Explorer"),
+        pn.Row(date_range, hour_slider),
+        pn.Row(district_choice, crime_type_search, crime_type_dropdown),
+        summary,
+        table,
+        pn.Row(previous_button, next_button),
+    )
+
+
+def lazy_tabs(pages):
+    """
+    Tabs whose pages are built the first time they are opened.
+
+    Parameters:
+        pages (list): (title, function that builds the page) pairs.
+
+    Returns:
+        pn.Tabs: Only the active tab is built (and, with dynamic=True, sent to the browser).
+    """
+    holders = [pn.Column() for _ in pages]
+    tabs = pn.Tabs(*[(title, holder) for (title, _), holder in zip(pages, holders)], dynamic=True)
+
+    def open_tab(index):
+        if not holders[index].objects:
+            holders[index].objects = [pages[index][1]()]
+
+    open_tab(tabs.active)
+    tabs.param.watch(lambda event: open_tab(event.new), "active")
+    return tabs
+
+
+def build_dashboard():
+    """
+    Build the dashboard for one browser session (pn.serve calls this for every new session).
+    """
+    # All the tabs/pages that will be shown on my dashboard
+    pages = [
+        ("Crime Trends", crime_trends_page),
+        ("Crime Heatmap", heatmap_page),
+        ("Crime Category", crime_category_page),
+    ]
+    # The explorer queries the incidents themselves, which kiosk mode doesn't have
+    if not SNAPSHOT_DIR:
+        pages.append(("Incident Explorer", incident_explorer_page))
+    # With CRIME_PROFILE=1, a Diagnostics tab shows where the time goes (see Crime_Profiler.py)
+    if PROFILE:
+        pages.append(("Diagnostics", diagnostics_page))
+
+    # FastListTemplate for Dashboard
+    return pn.template.FastListTemplate(
+        title="Boston Crime Dashboard",
+        main=[lazy_tabs(pages)],
+        accent_base_color="#88d8b0",
+        header_background="#88d8b0"
     )
-)
-
-# Page 2 setup: the visuals that will be shown -> Crime Heatmap View
-heatmap_page = pn.Column(
-    pn.pane.Markdown("## Crime Heatmap by Year & Crime Type"),
-    pn.Row(year_slider, crime_type_dropdown),
-    pn.Row(pn.Card(crime_heatmap_pane, title="Crime Heatmap", width=900, height=600))
-)
-
-# Page 3 setup: Crime Category Analysis
-crime_category_page = pn.Column(
-    pn.pane.Markdown("## Crime Category Analysis"),
-    pn.Row(crime_category_dropdown),
-    pn.Row(
-        pn.Card(crime_category_chart_pane, title="Stacked Crime Category Chart", height=600, width=700),
-        pn.Card(crime_category_trend_chart_pane, title="Crime Category Trends Over Time", height=600, width=700),
-    ),
-    pn.Card(sankey_pane, title="Top 3 Crime Types by District Over Time", height=600, width=1400)
-)
-
-# All the tabs/pages that will be shown on my dashboard
-multi_page_dashboard = pn.Tabs(
-    ("Crime Trends", crime_dashboard),
-    ("Crime Heatmap", heatmap_page),
-    ("Crime Category", crime_category_page),
-)
-
-# FastListTemplate for Dashboard
-template = pn.template.FastListTemplate(
-    title="Boston Crime Dashboard",
-    main=[multi_page_dashboard],
-    accent_base_color="#88d8b0",
-    header_background="#88d8b0"
-)
 
 
 if __name__ == "__main__":
-    # to run and show the dashboard
-    pn.serve(template, show=True)
+    # to run and show the dashboard (in kiosk mode the snapshot files are served as static files)
+    static_dirs = {SNAPSHOT_ROUTE: SNAPSHOT_DIR} if SNAPSHOT_DIR else {}
+    extra_patterns = [("/metrics", metrics_handler())] if PROFILE else []
+    # With CRIME_NUM_PROCS > 1 the server forks that many worker processes on the same port; nothing
+    # above opened a database connection yet, so each worker opens its own after the fork. Set
+    # CRIME_CACHE_PATH so the workers share their query results (see Query_Cache.py).
+    pn.serve(build_dashboard, show=NUM_PROCS == 1, num_procs=NUM_PROCS,
+             static_dirs=static_dirs, extra_patterns=extra_patterns)
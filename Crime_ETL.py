@@ -0,0 +1,210 @@
+"""
+Incremental loader for new Boston crime incidents.
+
+Schema_Migration.py builds the summary tables from the full history, which is too slow to run
+for each daily feed. This module appends only the incidents we have not seen before and
+adds their counts onto the summary tables, all in one transaction, so the dashboard never reads a
+half-loaded state and the load time depends on the size of the new batch only.
+
+The database needs offense_category_map, so run Schema_Migration.py on it once first.
+
+With CRIME_REPLICA_PATH set, the command line refreshes the dashboard's read replica after a load
+(see Read_Replica.py).
+
+Usage:
+    python Crime_ETL.py /path/to/crime_dashboard.db new_incidents.csv [more.csv ...]
+"""
+import sqlite3
+import sys
+
+import pandas as pd
+
+from Crime_Storage import insert_incidents
+from Heatmap_Tiles import TILES_SUMMARY
+from Hotspot_Forecast import COUNTS_SUMMARY, counts_select_sql, refresh_forecast
+from Offense_Dictionary import DICTIONARY_SUMMARY
+from Schema_Migration import table_exists
+from Time_Cube import CUBE_SUMMARY
+
+# Columns of boston_crime that a load supplies (Crime_Storage.insert_incidents codes the text ones)
+INCIDENT_COLUMNS = [
+    "INCIDENT_NUMBER", "OFFENSE_CODE", "OFFENSE_CODE_GROUP", "OFFENSE_DESCRIPTION", "DISTRICT",
+    "REPORTING_AREA", "SHOOTING", "OCCURRED_ON_DATE", "YEAR", "MONTH", "DAY_OF_WEEK", "HOUR",
+    "UCR_PART", "STREET", "Lat", "Long", "Location",
+]
+
+# Summary tables kept current by delta. Each "delta" query aggregates only the staged rows, and
+# its columns must be the table's key columns followed by its value columns, in that order.
+SUMMARY_TABLES = [
+    {
+        "table": "crime_count_by_district_year",
+        "keys": ["DISTRICT", "YEAR"],
+        "values": ["crime_count"],
+        "delta": """
+            SELECT DISTRICT, YEAR, COUNT(*) AS crime_count
+            FROM staged_crime
+            GROUP BY DISTRICT, YEAR
+        """,
+    },
+    {
+        "table": "crime_category_counts",
+        "keys": ["YEAR", "CRIME_CATEGORY"],
+        "values": ["crime_count"],
+        "delta": """
+            SELECT s.YEAR, COALESCE(m.CRIME_CATEGORY, 'Uncategorized') AS CRIME_CATEGORY, COUNT(*) AS crime_count
+            FROM staged_crime s
+            LEFT JOIN offense_category_map m ON m.OFFENSE_DESCRIPTION = s.OFFENSE_DESCRIPTION
+            WHERE s.YEAR IS NOT NULL
+            GROUP BY s.YEAR, CRIME_CATEGORY
+        """,
+    },
+    {
+        "table": "crime_category_by_district_year",
+        "keys": ["YEAR", "DISTRICT", "CRIME_CATEGORY"],
+        "values": ["crime_count"],
+        "delta": """
+            SELECT s.YEAR, s.DISTRICT, COALESCE(m.CRIME_CATEGORY, 'Uncategorized') AS CRIME_CATEGORY,
+                   COUNT(*) AS crime_count
+            FROM staged_crime s
+            LEFT JOIN offense_category_map m ON m.OFFENSE_DESCRIPTION = s.OFFENSE_DESCRIPTION
+            WHERE s.YEAR IS NOT NULL
+            GROUP BY s.YEAR, s.DISTRICT, CRIME_CATEGORY
+        """,
+    },
+    CUBE_SUMMARY,
+    DICTIONARY_SUMMARY,
+    TILES_SUMMARY,
+    COUNTS_SUMMARY,
+]
+
+
+def create_staging_table(conn):
+    """Create an empty temporary table that holds the incoming batch."""
+    conn.execute("DROP TABLE IF EXISTS temp.staged_crime")
+    other_columns = ", ".join(INCIDENT_COLUMNS[1:])
+    conn.execute(f"CREATE TEMP TABLE staged_crime (INCIDENT_NUMBER TEXT PRIMARY KEY, {other_columns})")
+
+
+def frame_to_rows(df):
+    """Turn a DataFrame into tuples in INCIDENT_COLUMNS order, with missing values as None."""
+    df = df.reindex(columns=INCIDENT_COLUMNS).astype(object)
+    return df.where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def stage_rows(conn, rows):
+    """
+    Add a batch of incidents to the staging table.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection with an open transaction.
+        rows (pd.DataFrame or iterable of tuples): Incidents, tuples in INCIDENT_COLUMNS order.
+
+    Returns:
+        int: Number of rows inserted into the staging table (duplicates within the batch are skipped).
+    """
+    if isinstance(rows, pd.DataFrame):
+        rows = frame_to_rows(rows)
+    placeholders = ", ".join("?" for _ in INCIDENT_COLUMNS)
+    before = conn.total_changes
+    conn.executemany(
+        f"INSERT OR IGNORE INTO staged_crime ({', '.join(INCIDENT_COLUMNS)}) VALUES ({placeholders})", rows
+    )
+    return conn.total_changes - before
+
+
+def apply_delta(conn, table, keys, values, delta_sql):
+    """
+    Add the counts from delta_sql onto a summary table.
+
+    Rows whose keys already exist are incremented and new keys are inserted. Keys are compared
+    with IS rather than =, so a NULL district or year is matched like any other value.
+    """
+    conn.execute("DROP TABLE IF EXISTS temp.summary_delta")
+    conn.execute(f"CREATE TEMP TABLE summary_delta AS {delta_sql}")
+
+    match = " AND ".join(f"d.{key} IS {table}.{key}" for key in keys)
+    increments = ", ".join(f"{value} = {table}.{value} + d.{value}" for value in values)
+    conn.execute(f"UPDATE {table} SET {increments} FROM summary_delta d WHERE {match}")
+
+    columns = ", ".join(keys + values)
+    exists_match = " AND ".join(f"t.{key} IS d.{key}" for key in keys)
+    conn.execute(f"""
+        INSERT INTO {table} ({columns})
+        SELECT {columns} FROM summary_delta d
+        WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {exists_match})
+    """)
+    conn.execute("DROP TABLE temp.summary_delta")
+
+
+def apply_staged(conn):
+    """
+    Move the staged incidents into crime_incidents and update every summary table by their counts.
+
+    Returns:
+        int: Number of new incidents added.
+    """
+    # Incidents we already have are dropped here, so they are not counted twice in the summaries
+    conn.execute("""
+        DELETE FROM staged_crime
+        WHERE EXISTS (SELECT 1 FROM crime_incidents b WHERE b.INCIDENT_NUMBER = staged_crime.INCIDENT_NUMBER)
+    """)
+    # Set-based rather than through the boston_crime view's row-by-row INSERT trigger
+    new_rows = insert_incidents(conn, "staged_crime")
+
+    if new_rows:
+        for summary in SUMMARY_TABLES:
+            if table_exists(conn, summary["table"]):
+                apply_delta(conn, summary["table"], summary["keys"], summary["values"], summary["delta"])
+
+        # The forecast features only need recomputing from the earliest week that got new counted
+        # incidents; undated or unlocated ones are not in crime_cell_week_counts at all
+        if table_exists(conn, "crime_forecast_model"):
+            first_week = conn.execute(f"SELECT MIN(WEEK) FROM ({counts_select_sql('staged_crime')})").fetchone()[0]
+            if first_week is not None:
+                refresh_forecast(conn, first_week)
+
+    conn.execute("DROP TABLE temp.staged_crime")
+    return new_rows
+
+
+def ingest(db_path, batches):
+    """
+    Load batches of incidents into the database in a single transaction.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        batches (iterable): DataFrames or lists of tuples in INCIDENT_COLUMNS order.
+
+    Returns:
+        int: Number of new incidents added.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        # IMMEDIATE takes the write lock up front so two loads cannot interleave
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            create_staging_table(conn)
+            for batch in batches:
+                stage_rows(conn, batch)
+            new_rows = apply_staged(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    return new_rows
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python Crime_ETL.py /path/to/crime_dashboard.db new_incidents.csv [more.csv ...]")
+    from Crime_Loader import iter_year_files  # imported here because Crime_Loader imports this module
+    added = ingest(sys.argv[1], iter_year_files(sys.argv[2:]))
+    print(f"Added {added} new incidents")
+    # The dashboard reads the replica (when there is one), so copy the new incidents over to it
+    from Crime_Config import REPLICA_PATH
+    if added and REPLICA_PATH:
+        from Read_Replica import refresh_replica
+        print(f"Refreshed the read replica in {refresh_replica(sys.argv[1], REPLICA_PATH):.1f} s")
@@ -0,0 +1,179 @@
+"""
+Streaming loader for the yearly Boston crime CSV files.
+
+Each year file is read in bounded chunks with explicit dtypes, so memory use stays the same no
+matter how many years we load. Coordinates are parsed from the Location text with a vectorized
+regular expression instead of eval. Several year files are parsed at once on worker threads
+while a single writer hands the chunks to Crime_ETL, which adds them to boston_crime inside one
+transaction.
+
+Usage:
+    python Crime_Loader.py /path/to/crime_dashboard.db 2021.csv 2022.csv 2023.csv
+"""
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from Crime_ETL import ingest
+
+# Explicit dtypes stop pandas from guessing per chunk. Columns with only a few distinct values are
+# read as categoricals, which keeps each chunk several times smaller than plain object strings.
+CSV_DTYPES = {
+    "INCIDENT_NUMBER": "string",
+    "OFFENSE_CODE": "Int32",
+    "OFFENSE_CODE_GROUP": "category",
+    "OFFENSE_DESCRIPTION": "category",
+    "DISTRICT": "category",
+    "REPORTING_AREA": "string",
+    "SHOOTING": "category",
+    "OCCURRED_ON_DATE": "string",
+    "YEAR": "Int16",
+    "MONTH": "Int8",
+    "DAY_OF_WEEK": "category",
+    "HOUR": "Int8",
+    "UCR_PART": "category",
+    "STREET": "string",
+    "Lat": "float64",
+    "Long": "float64",
+    "Location": "string",
+}
+
+# Matches "(42.35, -71.06)" and captures both numbers
+LOCATION_PATTERN = r"\(\s*([-+]?\d+(?:\.\d+)?)\s*,\s*([-+]?\d+(?:\.\d+)?)\s*\)"
+
+# The city uses these values for incidents without a known location
+MISSING_COORDINATES = [0.0, -1.0]
+
+_DONE = object()
+
+
+def parse_locations(df):
+    """
+    Fill Lat/Long from the Location text where they are missing, without eval.
+
+    Parameters:
+        df (pd.DataFrame): A chunk with a Location column and optionally Lat/Long columns.
+
+    Returns:
+        pd.DataFrame: The same chunk with float Lat/Long columns (NaN when unknown).
+    """
+    coords = df["Location"].str.extract(LOCATION_PATTERN).astype("float64")
+    for column, parsed in (("Lat", coords[0]), ("Long", coords[1])):
+        values = df[column].fillna(parsed) if column in df.columns else parsed
+        df[column] = values.mask(values.isin(MISSING_COORDINATES))
+    return df
+
+
+def read_incident_chunks(path, chunksize=100_000, columns=None):
+    """
+    Stream one year's CSV as DataFrame chunks with parsed coordinates.
+
+    Parameters:
+        path (str): Path to the CSV file.
+        chunksize (int): Rows per chunk.
+        columns (list, optional): Only read these columns (Location is always read for the coordinates).
+
+    Yields:
+        pd.DataFrame: One chunk of incidents.
+    """
+    wanted = set(CSV_DTYPES) if columns is None else set(columns) | {"Location", "Lat", "Long"}
+    reader = pd.read_csv(
+        path,
+        usecols=lambda name: name in wanted,  # older files have extra columns, newer ones miss a few
+        dtype=CSV_DTYPES,
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        yield parse_locations(chunk)
+
+
+def _put(out, item, stop):
+    """Put item on the queue, giving up if the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(path, chunksize, columns, out, stop):
+    """Worker thread: read one file and pass its chunks to the consumer."""
+    try:
+        for chunk in read_incident_chunks(path, chunksize, columns):
+            if not _put(out, chunk, stop):
+                return
+    except Exception as exc:
+        _put(out, exc, stop)
+    finally:
+        _put(out, _DONE, stop)
+
+
+def iter_year_files(paths, chunksize=100_000, columns=None, workers=4):
+    """
+    Stream chunks from several CSV files, parsing up to `workers` files at the same time.
+
+    At most two chunks per worker are ever waiting in memory, so peak memory does not grow with
+    the number of files. Chunks from different files arrive interleaved.
+
+    Yields:
+        pd.DataFrame: One chunk of incidents.
+    """
+    out = queue.Queue(maxsize=2 * workers)
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for path in paths:
+            pool.submit(_produce, path, chunksize, columns, out, stop)
+        remaining = len(paths)
+        while remaining:
+            item = out.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+
+
+def load_incidents(paths, columns=None, chunksize=100_000, workers=4):
+    """
+    Load several year files into one DataFrame for analysis in a notebook.
+
+    Only the requested columns are kept, with compact dtypes, so the result is far smaller than
+    pd.concat over full pd.read_csv frames.
+    """
+    frames = [chunk if columns is None else chunk[columns]
+              for chunk in iter_year_files(paths, chunksize, columns, workers)]
+    if not frames:
+        return pd.DataFrame(columns=columns or list(CSV_DTYPES))
+    # Chunks with different category sets concatenate to object columns, so turn them back into categories
+    combined = pd.concat(frames, ignore_index=True)
+    for name, dtype in CSV_DTYPES.items():
+        if dtype == "category" and name in combined.columns:
+            combined[name] = combined[name].astype("category")
+    return combined
+
+
+def load_into_database(db_path, paths, chunksize=100_000, workers=4):
+    """
+    Stream several year files into boston_crime in a single transaction.
+
+    Returns:
+        int: Number of new incidents added.
+    """
+    return ingest(db_path, iter_year_files(paths, chunksize, workers=workers))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python Crime_Loader.py /path/to/crime_dashboard.db 2021.csv [2022.csv ...]")
+    added = load_into_database(sys.argv[1], sys.argv[2:])
+    print(f"Added {added} new incidents")
@@ -0,0 +1,219 @@
+"""
+Optional timing instrumentation for the dashboard.
+
+Set CRIME_PROFILE=1 to record every SQL query (Crime_API.execute_query), every computed fetch
+(SQL plus the pandas work on its result), every chart template call (create_bar_chart,
+create_line_chart, create_heatmap, make_sankey, ...) and every dashboard view. For each call we keep
+the wall time and the number of rows, and for SQL also the query text and its EXPLAIN QUERY PLAN.
+Comparing a view's time with its fetches and templates shows whether a slow page is waiting on
+SQL, on pandas or on chart building.
+
+The results are shown on the dashboard's Diagnostics tab, served as Prometheus text at /metrics,
+and appended as JSON lines to CRIME_PROFILE_LOG if that is set.
+
+With profiling off the decorators hand back the undecorated function, so there is no overhead at all.
+"""
+import collections
+import functools
+import inspect
+import json
+import threading
+import time
+
+import pandas as pd
+
+from Crime_Config import PROFILE, PROFILE_LOG
+
+# Most recent calls kept for the Diagnostics tab (the per-name totals cover every call)
+RECENT_CALLS = 2000
+
+_lock = threading.Lock()
+_recent = collections.deque(maxlen=RECENT_CALLS)
+_totals = {}
+_plans = {}
+
+
+def record(kind, name, seconds, rows=None, sql=None, plan=None):
+    """
+    Store one timed call.
+
+    Parameters:
+        kind (str): "sql", "fetch", "render" or "view".
+        name (str): Function name, or the Crime_API method that ran the SQL.
+        seconds (float): Wall time.
+        rows (int, optional): Rows returned.
+        sql (str, optional): Query text.
+        plan (list, optional): EXPLAIN QUERY PLAN lines.
+    """
+    entry = {"time": time.time(), "kind": kind, "name": name, "seconds": seconds, "rows": rows}
+    if sql is not None:
+        entry["sql"] = " ".join(sql.split())
+        entry["plan"] = plan
+    with _lock:
+        _recent.append(entry)
+        totals = _totals.setdefault((kind, name), {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0})
+        totals["calls"] += 1
+        totals["seconds"] += seconds
+        totals["max_seconds"] = max(totals["max_seconds"], seconds)
+        totals["rows"] += rows or 0
+        if PROFILE_LOG:
+            with open(PROFILE_LOG, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def count_rows(result):
+    """Rows in a fetch result (a DataFrame, a list, or a dict of DataFrames), None if not countable."""
+    if isinstance(result, dict):
+        return sum(count_rows(value) or 0 for value in result.values())
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def caller_name():
+    """Name of the Crime_API method that called execute_query, used to label SQL calls."""
+    frame = inspect.currentframe().f_back.f_back
+    return frame.f_code.co_name if frame is not None else "execute_query"
+
+
+def profiled(kind):
+    """
+    Decorator that times a function (sync or async) and records it under `kind`.
+
+    Returns the function unchanged when profiling is off.
+    """
+    def decorate(function):
+        if not PROFILE:
+            return function
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result = await function(*args, **kwargs)
+                record(kind, function.__name__, time.perf_counter() - start)
+                return result
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            rows = count_rows(result) if kind == "fetch" else None
+            record(kind, function.__name__, time.perf_counter() - start, rows)
+            return result
+        return wrapper
+    return decorate
+
+
+def profiled_query(execute_query):
+    """
+    Decorator for Crime_API.execute_query: records time, rows, SQL and the query plan.
+
+    The plan is looked up once per distinct SQL text, on a pooled connection, and is not part
+    of the recorded time. Returns execute_query unchanged when profiling is off.
+    """
+    if not PROFILE:
+        return execute_query
+
+    @functools.wraps(execute_query)
+    def wrapper(self, query, params=()):
+        name = caller_name()
+        start = time.perf_counter()
+        df = execute_query(self, query, params)
+        seconds = time.perf_counter() - start
+
+        if query not in _plans:
+            with self.get_db_connection() as conn:
+                _plans[query] = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        record("sql", name, seconds, len(df), query, _plans[query])
+        return df
+    return wrapper
+
+
+def summary():
+    """
+    Per-function totals.
+
+    Returns:
+        pd.DataFrame: kind, name, calls, total_s, mean_ms, max_ms and rows, slowest total first.
+    """
+    with _lock:
+        rows = [{"kind": kind, "name": name, "calls": t["calls"], "total_s": t["seconds"],
+                 "mean_ms": t["seconds"] / t["calls"] * 1000, "max_ms": t["max_seconds"] * 1000, "rows": t["rows"]}
+                for (kind, name), t in _totals.items()]
+    columns = ["kind", "name", "calls", "total_s", "mean_ms", "max_ms", "rows"]
+    return pd.DataFrame(rows, columns=columns).sort_values("total_s", ascending=False).reset_index(drop=True)
+
+
+def recent_queries(limit=50):
+    """The most recent SQL calls with their plans, newest first."""
+    with _lock:
+        calls = [entry for entry in reversed(_recent) if entry["kind"] == "sql"][:limit]
+    df = pd.DataFrame(calls, columns=["time", "name", "seconds", "rows", "sql", "plan"])
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    df["ms"] = df.pop("seconds") * 1000
+    df["plan"] = df["plan"].map(lambda plan: " / ".join(plan or []))
+    return df[["time", "name", "ms", "rows", "sql", "plan"]]
+
+
+def prometheus_text():
+    """The per-function totals in the Prometheus text exposition format."""
+    metrics = [
+        ("crime_profile_calls_total", "counter", "Calls per function", "calls"),
+        ("crime_profile_seconds_total", "counter", "Wall time spent per function", "seconds"),
+        ("crime_profile_seconds_max", "gauge", "Slowest single call per function", "max_seconds"),
+        ("crime_profile_rows_total", "counter", "Rows returned per function", "rows"),
+    ]
+    with _lock:
+        totals = dict(_totals)
+    lines = []
+    for metric, metric_type, help_text, field in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {metric_type}"]
+        for (kind, name), t in sorted(totals.items()):
+            lines.append(f'{metric}{{kind="{kind}",name="{name}"}} {t[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Forget everything recorded so far."""
+    with _lock:
+        _recent.clear()
+        _totals.clear()
+        _plans.clear()
+
+
+def metrics_handler():
+    """A tornado handler serving prometheus_text(), for pn.serve(extra_patterns=[("/metrics", ...)])."""
+    from tornado.web import RequestHandler
+
+    class MetricsHandler(RequestHandler):
+        def get(self):
+            self.set_header("Content-Type", "text/plain; version=0.0.4")
+            self.write(prometheus_text())
+
+    return MetricsHandler
+
+
+def diagnostics_page():
+    """
+    Panel page with the per-function totals and the recent SQL with plans, refreshed on request.
+    """
+    import io
+    import panel as pn
+
+    refresh = pn.widgets.Button(name="Refresh", button_type="primary", width=120)
+    download = pn.widgets.FileDownload(callback=lambda: io.StringIO(prometheus_text()),
+                                       filename="crime_profile.prom", label="Download Prometheus dump", width=240)
+
+    def tables(_):
+        return pn.Column(
+            pn.pane.Markdown("### Time per function (sql = query only, fetch = query + pandas, "
+                             "render = chart template, view = whole chart)"),
+            pn.pane.DataFrame(summary(), index=False, float_format="{:.2f}".format),
+            pn.pane.Markdown("### Recent SQL"),
+            pn.pane.DataFrame(recent_queries(), index=False, float_format="{:.2f}".format),
+        )
+
+    return pn.Column(pn.Row(refresh, download), pn.bind(tables, refresh.param.clicks))
@@ -0,0 +1,234 @@
+"""
+Normalized storage for the incidents: integer codes in crime_incidents, the text in dimension tables.
+
+Most of a boston_crime row used to be the same few strings over and over: the offense description,
+district, day of week, street, UCR part and shooting flag, plus Location, which is only Lat and
+Long again as text. Here each of those text columns is stored once per distinct value in a small
+dim_<column> table (ID INTEGER PRIMARY KEY, VALUE TEXT UNIQUE), and crime_incidents keeps only
+the integer ID. ID 0 stands for NULL in every dimension, so every incident has a matching row.
+Location is not stored at all.
+
+boston_crime is now a view that looks the values back up (and rebuilds Location), so every query
+written against the old table still works, and an INSTEAD OF trigger turns inserts into the view
+into dimension and fact rows. Each text column of the view is a scalar subquery on its dimension
+rather than a LEFT JOIN: SQLite only runs it for rows of queries that use that column, whereas
+unused joins are only dropped when the planner happens to pick a primary key lookup for them
+(with a one-row dimension it picks a scan and keeps the join). The dashboard's own hot queries
+(Crime_API) filter and group on the IDs in crime_incidents directly and decode them with
+Dimension into pandas categoricals.
+
+Usage (convert an existing database; Schema_Migration.py runs this too):
+    python Crime_Storage.py /path/to/crime_dashboard.db
+"""
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Text column of boston_crime -> its dimension table. The fact table column is <column>_ID.
+CODED_COLUMNS = {
+    "OFFENSE_DESCRIPTION": "dim_offense_description",
+    "DISTRICT": "dim_district",
+    "SHOOTING": "dim_shooting",
+    "DAY_OF_WEEK": "dim_day_of_week",
+    "UCR_PART": "dim_ucr_part",
+    "STREET": "dim_street",
+}
+
+# OCCURRED_ON_DATE as seconds since 1970, NULL when it isn't a date. The BPD timestamps are local
+# wall-clock times despite their "+00" suffix, so the suffix is cut off rather than converted.
+OCCURRED_TS_SQL = "CAST(strftime('%s', substr(OCCURRED_ON_DATE, 1, 19)) AS INTEGER)"
+
+# Columns of crime_incidents that are copied as they are (the coded ones are added after)
+PLAIN_COLUMNS = ["INCIDENT_NUMBER", "OFFENSE_CODE", "OFFENSE_CODE_GROUP", "REPORTING_AREA",
+                 "OCCURRED_ON_DATE", "YEAR", "MONTH", "HOUR", "Lat", "Long"]
+
+CREATE_FACT_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS crime_incidents (
+        INCIDENT_NUMBER TEXT PRIMARY KEY,              -- Unique identifier for each crime report
+        OFFENSE_CODE INTEGER,                          -- Crime classification code
+        OFFENSE_CODE_GROUP TEXT,                       -- General offense category
+        OFFENSE_DESCRIPTION_ID INTEGER NOT NULL DEFAULT 0,  -- dim_offense_description.ID
+        DISTRICT_ID INTEGER NOT NULL DEFAULT 0,        -- dim_district.ID
+        REPORTING_AREA TEXT,                           -- Smaller reporting unit
+        SHOOTING_ID INTEGER NOT NULL DEFAULT 0,        -- dim_shooting.ID
+        OCCURRED_ON_DATE TEXT,                         -- Date crime occurred, as loaded
+        YEAR INTEGER,                                  -- Year of occurrence
+        MONTH INTEGER,                                 -- Month of occurrence
+        DAY_OF_WEEK_ID INTEGER NOT NULL DEFAULT 0,     -- dim_day_of_week.ID
+        HOUR INTEGER,                                  -- Hour of occurrence
+        UCR_PART_ID INTEGER NOT NULL DEFAULT 0,        -- dim_ucr_part.ID
+        STREET_ID INTEGER NOT NULL DEFAULT 0,          -- dim_street.ID
+        Lat REAL,                                      -- Latitude of the crime location
+        Long REAL,                                     -- Longitude of the crime location
+        OCCURRED_TS INTEGER GENERATED ALWAYS AS ({OCCURRED_TS_SQL}) STORED  -- OCCURRED_ON_DATE as a timestamp
+    )
+"""
+
+# Covering indexes for the dashboard filters, on the codes instead of the text
+FACT_INDEXES = {
+    "idx_crime_incidents_year_offense": "crime_incidents (YEAR, OFFENSE_DESCRIPTION_ID, Lat, Long)",
+    "idx_crime_incidents_year_district": "crime_incidents (YEAR, DISTRICT_ID)",
+    "idx_crime_incidents_year_location": "crime_incidents (YEAR, Lat, Long)",
+    # Date-range queries and the incident list page through rows in (OCCURRED_TS, INCIDENT_NUMBER)
+    # order, with or without a district, straight off these two. The codes on the end are a byte
+    # or two each and let the district and offense filters be checked without reading the row.
+    "idx_crime_incidents_occurred": "crime_incidents (OCCURRED_TS, INCIDENT_NUMBER, DISTRICT_ID, OFFENSE_DESCRIPTION_ID)",
+    "idx_crime_incidents_district_occurred": "crime_incidents (DISTRICT_ID, OCCURRED_TS, INCIDENT_NUMBER, OFFENSE_DESCRIPTION_ID)",
+}
+
+
+def dimension_table_sql(table):
+    """CREATE statement for one dimension table, and the ID 0 row that stands for NULL."""
+    return [
+        f"CREATE TABLE IF NOT EXISTS {table} (ID INTEGER PRIMARY KEY, VALUE TEXT UNIQUE)",
+        f"INSERT OR IGNORE INTO {table} (ID, VALUE) VALUES (0, NULL)",
+    ]
+
+
+def view_sql():
+    """The boston_crime view: crime_incidents with its text columns decoded, in the old column order."""
+    value = {column: f"(SELECT VALUE FROM {table} WHERE ID = f.{column}_ID)" for column, table in CODED_COLUMNS.items()}
+    return f"""
+    CREATE VIEW IF NOT EXISTS boston_crime AS
+    SELECT
+        f.INCIDENT_NUMBER, f.OFFENSE_CODE, f.OFFENSE_CODE_GROUP,
+        {value["OFFENSE_DESCRIPTION"]} AS OFFENSE_DESCRIPTION,
+        {value["DISTRICT"]} AS DISTRICT,
+        f.REPORTING_AREA,
+        {value["SHOOTING"]} AS SHOOTING,
+        f.OCCURRED_ON_DATE, f.YEAR, f.MONTH,
+        {value["DAY_OF_WEEK"]} AS DAY_OF_WEEK,
+        f.HOUR,
+        {value["UCR_PART"]} AS UCR_PART,
+        {value["STREET"]} AS STREET,
+        f.Lat, f.Long,
+        CASE WHEN f.Lat IS NOT NULL AND f.Long IS NOT NULL THEN '(' || f.Lat || ', ' || f.Long || ')' END AS Location,
+        LOWER({value["OFFENSE_DESCRIPTION"]}) AS OFFENSE_LOWER,
+        f.OCCURRED_TS
+    FROM crime_incidents f
+    """
+
+
+def insert_trigger_sql():
+    """INSTEAD OF INSERT trigger that stores a row inserted into boston_crime as codes."""
+    add_values = "\n".join(
+        f"        INSERT OR IGNORE INTO {table} (VALUE) SELECT new.{column} WHERE new.{column} IS NOT NULL;"
+        for column, table in CODED_COLUMNS.items())
+    columns = ", ".join(PLAIN_COLUMNS + [f"{column}_ID" for column in CODED_COLUMNS])
+    values = ", ".join([f"new.{column}" for column in PLAIN_COLUMNS] + [
+        f"COALESCE((SELECT ID FROM {table} WHERE VALUE = new.{column}), 0)" for column, table in CODED_COLUMNS.items()])
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS boston_crime_insert INSTEAD OF INSERT ON boston_crime BEGIN
+{add_values}
+        INSERT INTO crime_incidents ({columns}) VALUES ({values});
+    END
+    """
+
+
+def create_storage(conn):
+    """Create the dimension tables, crime_incidents with its indexes, the boston_crime view and its trigger."""
+    for table in CODED_COLUMNS.values():
+        for statement in dimension_table_sql(table):
+            conn.execute(statement)
+    conn.execute(CREATE_FACT_TABLE)
+    for name, definition in FACT_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    conn.execute(view_sql())
+    conn.execute(insert_trigger_sql())
+
+
+def insert_incidents(conn, source):
+    """
+    Copy incidents from a table in the old text layout into the dimensions and crime_incidents.
+
+    This does in a few set-based statements what the INSTEAD OF trigger does row by row.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection, inside the caller's transaction.
+        source (str): Table with the boston_crime text columns (the ETL staging table, or an
+                      old boston_crime table being converted).
+
+    Returns:
+        int: Number of incidents inserted.
+    """
+    for column, table in CODED_COLUMNS.items():
+        conn.execute(f"INSERT OR IGNORE INTO {table} (VALUE) SELECT DISTINCT {column} FROM {source} WHERE {column} IS NOT NULL")
+    columns = ", ".join(PLAIN_COLUMNS + [f"{column}_ID" for column in CODED_COLUMNS])
+    values = ", ".join([f"s.{column}" for column in PLAIN_COLUMNS] + [
+        f"COALESCE({table}.ID, 0)" for table in CODED_COLUMNS.values()])
+    joins = " ".join(f"LEFT JOIN {table} ON {table}.VALUE = s.{column}" for column, table in CODED_COLUMNS.items())
+    return conn.execute(f"INSERT INTO crime_incidents ({columns}) SELECT {values} FROM {source} s {joins}").rowcount
+
+
+def normalize_incidents(conn):
+    """
+    Convert a database whose boston_crime is still a table into the normalized layout.
+
+    The old table is renamed, its rows copied into crime_incidents and the dimensions, and then
+    dropped (with its indexes); boston_crime is recreated as the view. A database that is already
+    normalized is left alone, apart from creating anything missing.
+    """
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'boston_crime'").fetchone()
+    legacy = row is not None and row[0] == "table"
+    if legacy:
+        conn.execute("ALTER TABLE boston_crime RENAME TO boston_crime_legacy")
+    create_storage(conn)
+    if legacy:
+        insert_incidents(conn, "boston_crime_legacy")
+        conn.execute("DROP TABLE boston_crime_legacy")
+
+
+class Dimension:
+    """The values of one dimension table, for turning its IDs into a pandas categorical."""
+
+    def __init__(self, ids, values):
+        """
+        Parameters:
+            ids (np.ndarray): ID of each value (ID 0, NULL, left out).
+            values (list): The values, in the same order.
+        """
+        # Built once, so decoding doesn't re-check the categories on every query
+        self.dtype = pd.CategoricalDtype(pd.Index(values, dtype="object"))
+        self.max_id = int(ids.max()) if len(ids) else 0
+        # ID -> position in categories; -1 (ID 0 and gaps) becomes NaN in the categorical
+        self.positions = np.full(self.max_id + 1, -1, dtype=np.int32)
+        self.positions[ids] = np.arange(len(ids), dtype=np.int32)
+
+    def knows(self, ids):
+        """Whether every ID was already in the table when it was read."""
+        return len(ids) == 0 or int(np.max(ids)) <= self.max_id
+
+    def decode(self, ids):
+        """Turn an array of IDs into a pd.Categorical of their values."""
+        return pd.Categorical.from_codes(self.positions[np.asarray(ids, dtype=np.int64)], dtype=self.dtype)
+
+
+def load_dimensions(conn):
+    """Read every dimension table into a Dimension, keyed by the boston_crime column name."""
+    dimensions = {}
+    for column, table in CODED_COLUMNS.items():
+        rows = conn.execute(f"SELECT ID, VALUE FROM {table} WHERE ID > 0 ORDER BY ID").fetchall()
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        dimensions[column] = Dimension(ids, [row[1] for row in rows])
+    return dimensions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python Crime_Storage.py /path/to/crime_dashboard.db")
+    connection = sqlite3.connect(sys.argv[1], isolation_level=None)
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            normalize_incidents(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        # Dropping the old table left its pages free; VACUUM gives them back to the file system
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+    print(f"Normalized {sys.argv[1]}")
@@ -0,0 +1,220 @@
+"""
+Static snapshot build of the crime dashboard for the kiosk deployment.
+
+Every widget on the dashboard has a small, known set of values (the years, the crime categories
+and the offense list), so every chart it can show can be rendered ahead of time. This script
+renders each (chart, widget values) combination to a standalone HTML file, spread over a process
+pool, and writes a manifest.json that lists them.
+
+Serving the dashboard with CRIME_SNAPSHOT_DIR pointing at the output shows those files in place of
+the live charts: changing a widget only swaps which file is shown, and no request touches the
+database.
+
+Usage:
+    python Dashboard_Snapshot.py /path/to/snapshots [--workers 8] [--inline]
+    CRIME_SNAPSHOT_DIR=/path/to/snapshots python Crime_Dashboard_Nafisa_Tasnia.py
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import panel as pn
+
+from Crime_Config import DASHBOARD_YEARS, create_crime_api
+
+MANIFEST = "manifest.json"
+
+# URL the snapshot directory is served under (pn.serve static_dirs)
+SNAPSHOT_ROUTE = "snapshots"
+
+# Height of the frame each view is shown in, in pixels
+VIEW_HEIGHTS = {"create_crime_heatmap": 760, "create_sankey_chart": 560}
+DEFAULT_HEIGHT = 600
+
+
+def view_key(builder, *args):
+    """Name one rendered view, e.g. "create_crime_chart/2022"."""
+    return "/".join([builder, *map(str, args)])
+
+
+def list_views(years, categories, crime_types):
+    """
+    Every chart the dashboard can show, as (chart function name, arguments) pairs.
+
+    Parameters:
+        years (list): Values of the year widgets.
+        categories (list): Values of the crime category dropdown.
+        crime_types (list): Values of the heatmap's crime type dropdown.
+
+    Returns:
+        list: (builder, args) tuples, builder being a chart function in Crime_Dashboard_Nafisa_Tasnia.
+    """
+    views = []
+    for year in years:
+        for builder in ("create_crime_chart", "create_district_chart",
+                        "create_day_of_week_chart", "create_monthly_trend_chart"):
+            views.append((builder, (year,)))
+        views += [("create_crime_heatmap", (year, crime_type)) for crime_type in crime_types]
+    for category in categories:
+        views += [("create_stacked_bar_chart", (category,)), ("create_crime_category_trend_chart", (category,))]
+    views.append(("create_sankey_chart", ()))
+    return views
+
+
+def save_view(view, path, inline=False):
+    """Write one chart object (a Panel pane or a Plotly figure) as a standalone HTML file."""
+    if isinstance(view, pn.pane.plot.Folium):
+        view.object.save(path)
+    elif hasattr(view, "write_html"):
+        view.write_html(path, include_plotlyjs=True if inline else "cdn")
+    else:
+        resources = "inline" if inline else "cdn"
+        pn.panel(view).save(path, resources=resources, embed=False)
+
+
+def _init_worker():
+    """Import the dashboard once in each worker process, before its first view."""
+    importlib.import_module("Crime_Dashboard_Nafisa_Tasnia")
+
+
+def render_view(builder, args, path, inline=False):
+    """
+    Worker: build one view with the dashboard's own chart function and save it to path.
+
+    Returns:
+        float: Seconds it took.
+    """
+    start = time.perf_counter()
+    dashboard = importlib.import_module("Crime_Dashboard_Nafisa_Tasnia")
+    view = getattr(dashboard, builder)(*args)
+    if asyncio.iscoroutine(view):
+        view = asyncio.run(view)
+    save_view(view, path, inline)
+    return time.perf_counter() - start
+
+
+def build_snapshots(out_dir, years=DASHBOARD_YEARS, workers=None, inline=False):
+    """
+    Render every dashboard view into out_dir.
+
+    The files are written to a new directory first and swapped in when all of them are done, so a
+    running kiosk never sees a half-built snapshot.
+
+    Parameters:
+        out_dir (str): Directory for the HTML files and manifest.json.
+        years (list): Years to render.
+        workers (int, optional): Number of worker processes (default: one per CPU).
+        inline (bool): Embed the JavaScript libraries in every file, for kiosks without internet access.
+
+    Returns:
+        dict: The manifest that was written.
+    """
+    crime_api = create_crime_api()
+    categories = crime_api.get_unique_crime_categories()
+    # Most common first: the kiosk's crime type dropdown lists these in order, like the live one
+    crime_types = ["All Crimes"] + crime_api.fetch_offense_counts()["Crime"].dropna().tolist()
+    crime_api.close()
+
+    building = out_dir.rstrip(os.sep) + ".building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    files = {}
+    jobs = []
+    for number, (builder, args) in enumerate(list_views(years, categories, crime_types)):
+        # Files are numbered rather than named after their arguments, which can contain any character
+        relpath = f"{builder}/{number}.html"
+        os.makedirs(os.path.join(building, builder), exist_ok=True)
+        files[view_key(builder, *args)] = relpath
+        jobs.append((builder, args, os.path.join(building, relpath)))
+
+    # spawn gives every worker its own database connections instead of copies of ours. The workers
+    # read Crime_Config when they start, from the environment they inherit from us, so kiosk mode
+    # has to be off here for as long as the pool can start workers; otherwise their dashboard
+    # import would look for a manifest instead of querying the database.
+    context = multiprocessing.get_context("spawn")
+    snapshot_dir = os.environ.pop("CRIME_SNAPSHOT_DIR", None)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            futures = [pool.submit(render_view, builder, args, path, inline) for builder, args, path in jobs]
+            seconds = sum(future.result() for future in futures)
+    finally:
+        if snapshot_dir is not None:
+            os.environ["CRIME_SNAPSHOT_DIR"] = snapshot_dir
+
+    manifest = {
+        "built": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "years": list(years),
+        "categories": list(categories),
+        "crime_types": list(crime_types),
+        "files": files,
+        "render_seconds": round(seconds, 1),
+    }
+    with open(os.path.join(building, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+    old = out_dir.rstrip(os.sep) + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old)
+    os.replace(building, out_dir)
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest
+
+
+class Snapshots:
+    """The pre-rendered views in a snapshot directory, shown through the dashboard's static route."""
+
+    def __init__(self, snapshot_dir):
+        """
+        Read the manifest of a snapshot directory.
+
+        Parameters:
+            snapshot_dir (str): Directory written by build_snapshots.
+        """
+        self.snapshot_dir = snapshot_dir
+        with open(os.path.join(snapshot_dir, MANIFEST)) as f:
+            manifest = json.load(f)
+        self.years = manifest["years"]
+        self.categories = manifest["categories"]
+        self.crime_types = manifest["crime_types"]
+        self.files = manifest["files"]
+
+    def pane(self, builder, *args):
+        """
+        Show one pre-rendered view.
+
+        Parameters:
+            builder (str): Name of the dashboard chart function.
+            *args: The widget values it was called with.
+
+        Returns:
+            pn.pane.HTML: A frame that loads the view's file, or a message if it was not rendered.
+        """
+        relpath = self.files.get(view_key(builder, *args))
+        if relpath is None:
+            return pn.pane.Markdown("No snapshot for this selection, rebuild the snapshots to add it.")
+        height = VIEW_HEIGHTS.get(builder, DEFAULT_HEIGHT)
+        return pn.pane.HTML(
+            f'<iframe src="/{SNAPSHOT_ROUTE}/{relpath}" style="width: 100%; height: {height}px; border: 0;"></iframe>',
+            height=height + 10,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--inline", action="store_true", help="Embed JavaScript so the files work offline")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build_snapshots(args.out_dir, workers=args.workers, inline=args.inline)
+    print(f"Rendered {len(manifest['files'])} views in {time.perf_counter() - start:.1f} s "
+          f"({manifest['render_seconds']} s of rendering across workers)")
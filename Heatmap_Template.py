@@ -2,11 +2,14 @@ import folium
 import panel as pn
 import pandas as pd
 from folium.plugins import HeatMap
+from Crime_Profiler import profiled
 
 # I put default values for parameters like zoom_start and height to ensure a consistent appearance
 # across different visualizations, while still allowing flexibility if specific adjustments are needed.
+@profiled("render")
 def create_heatmap(df, lat_col="Lat", lon_col="Long", center=None,
-                   zoom_start=12, radius=12, blur=15, max_zoom=1, height=750, width=1800):
+                   zoom_start=12, radius=12, blur=15, max_zoom=1, height=750, width=1800, weight_col=None,
+                   markers=None):
     """
     Generate a reusable Folium heatmap from a DataFrame.
 
@@ -22,6 +25,10 @@ def create_heatmap(df, lat_col="Lat", lon_col="Long", center=None,
         max_zoom (int): Maximum zoom for clustering.
         height (int): Height of the displayed map.
         width (int): Width of the displayed map.
+        weight_col (str, optional): Column with a weight per row, e.g. the incident count of a
+                                    binned grid cell. Weights are scaled so the busiest cell is 1.
+        markers (pd.DataFrame, optional): Hotspots to pin on the map, with Lat, Long, STREET and
+                                          DISTRICT columns (e.g. Crime_API.fetch_hotspots).
 
     Returns:
         pn.pane.plot.Folium: A Panel-compatible Folium heatmap.
@@ -33,11 +40,28 @@ def create_heatmap(df, lat_col="Lat", lon_col="Long", center=None,
     # Create a Folium map centered on the given coordinates
     crime_map = folium.Map(location=center, zoom_start=zoom_start)
 
-    # Convert DataFrame coordinates into a list of (lat, lon) pairs
-    heat_data = df[[lat_col, lon_col]].dropna().values.tolist()
+    if weight_col is None:
+        # Convert DataFrame coordinates into a list of (lat, lon) pairs
+        heat_data = df[[lat_col, lon_col]].dropna().values.tolist()
+    else:
+        # Binned data: send (lat, lon, weight) triples, scaled to 0-1 because that is the range HeatMap expects
+        weighted = df[[lat_col, lon_col, weight_col]].dropna()
+        weighted[weight_col] = weighted[weight_col] / weighted[weight_col].max()
+        heat_data = weighted.values.tolist()
 
     # Adds the heatmap layer
     HeatMap(heat_data, radius=radius, blur=blur, max_zoom=max_zoom).add_to(crime_map)
 
+    # Hotspot pins go in their own layer, so they can be switched off in the map's layer control
+    if markers is not None and not markers.empty:
+        hotspot_layer = folium.FeatureGroup(name="Predicted hotspots")
+        for row in markers.itertuples(index=False):
+            # Information that will be shown in the info-sign
+            icon_sign = f"Street: {row.STREET}<br>District: {row.DISTRICT}<br>Crimes: {row.crime_count}"
+            folium.Marker([row.Lat, row.Long], popup=icon_sign,
+                          icon=folium.Icon(color="red", icon="info-sign")).add_to(hotspot_layer)
+        hotspot_layer.add_to(crime_map)
+        folium.LayerControl().add_to(crime_map)
+
     # Converts the Folium map into a Panel pane
     return pn.pane.plot.Folium(crime_map, height=height, width=width)
@@ -0,0 +1,130 @@
+"""
+Precomputed heatmap tiles for every (year, offense, zoom level).
+
+Building a heatmap from boston_crime means grouping a whole year of incidents each time the user
+moves the year slider or picks another crime type. This script does that grouping once, offline,
+for a fixed set of zoom levels and stores the result in the heatmap_tiles table. Crime_API then
+answers the heatmap with a primary-key range read of a few thousand rows.
+
+Each tile row keeps the sums of its latitudes and longitudes next to its incident count, so new
+incidents can be added on top (Crime_ETL does this) and the centroid is still sum / count.
+
+Usage:
+    python Heatmap_Tiles.py /path/to/crime_dashboard.db
+"""
+import math
+import sqlite3
+import sys
+
+# Zoom levels we precompute. Leaflet zoom 12 shows all of Boston, 15 is street level.
+TILE_ZOOMS = [11, 12, 13, 14, 15]
+
+# Screen pixels per grid cell, the same default Crime_API.fetch_crime_density uses
+TILE_CELL_PIXELS = 5
+
+# OFFENSE_LOWER value used for the rows that count every offense together ("All Crimes")
+ALL_CRIMES = ""
+
+# Boston's latitude, used to make heatmap grid cells roughly square on the map
+BOSTON_LATITUDE = 42.3601
+
+
+def grid_cell_size(zoom, cell_pixels=5, latitude=BOSTON_LATITUDE):
+    """
+    Size of a heatmap grid cell in degrees at a web-map zoom level.
+
+    A cell covers about cell_pixels screen pixels, so binning points into cells loses no detail
+    the map could show at that zoom.
+
+    Returns:
+        tuple: (latitude step, longitude step) in degrees.
+    """
+    lon_step = 360.0 / (256 * 2 ** zoom) * cell_pixels
+    lat_step = lon_step * math.cos(math.radians(latitude))
+    return lat_step, lon_step
+
+
+CREATE_TILES_TABLE = """
+    CREATE TABLE IF NOT EXISTS heatmap_tiles (
+        ZOOM INTEGER,               -- Web-map zoom level the cells are sized for
+        YEAR INTEGER,               -- Year of occurrence
+        OFFENSE_LOWER TEXT,         -- Lower-cased offense, '' for all crimes together
+        CELL_Y INTEGER,             -- Grid row, CAST((Lat + 90) / lat_step AS INTEGER)
+        CELL_X INTEGER,             -- Grid column, CAST((Long + 180) / lon_step AS INTEGER)
+        lat_sum REAL,               -- Sum of the latitudes of the incidents in the cell
+        long_sum REAL,              -- Sum of the longitudes of the incidents in the cell
+        crime_count INTEGER,        -- Number of incidents in the cell
+        PRIMARY KEY (ZOOM, YEAR, OFFENSE_LOWER, CELL_Y, CELL_X)
+    ) WITHOUT ROWID
+"""
+
+
+def tile_select_sql(source, offense_expr):
+    """
+    Build a SELECT that bins the rows of source into tiles for every zoom level.
+
+    Parameters:
+        source (str): Table to read incidents from (boston_crime or the ETL staging table).
+        offense_expr (str): SQL expression for the lower-cased offense in that table.
+
+    Returns:
+        str: A query whose columns match heatmap_tiles.
+    """
+    parts = []
+    for zoom in TILE_ZOOMS:
+        lat_step, lon_step = grid_cell_size(zoom, TILE_CELL_PIXELS)
+        cell = (f"CAST((Lat + 90) / {lat_step!r} AS INTEGER) AS CELL_Y, "
+                f"CAST((Long + 180) / {lon_step!r} AS INTEGER) AS CELL_X")
+        located = f"FROM {source} WHERE YEAR IS NOT NULL AND Lat IS NOT NULL AND Long IS NOT NULL"
+        # One set of rows per offense, and one with every offense together
+        parts.append(f"""
+            SELECT {zoom} AS ZOOM, YEAR, {offense_expr} AS OFFENSE_LOWER, {cell},
+                   SUM(Lat) AS lat_sum, SUM(Long) AS long_sum, COUNT(*) AS crime_count
+            {located} AND {offense_expr} IS NOT NULL
+            GROUP BY YEAR, {offense_expr}, CELL_Y, CELL_X
+        """)
+        parts.append(f"""
+            SELECT {zoom} AS ZOOM, YEAR, '{ALL_CRIMES}' AS OFFENSE_LOWER, {cell},
+                   SUM(Lat) AS lat_sum, SUM(Long) AS long_sum, COUNT(*) AS crime_count
+            {located}
+            GROUP BY YEAR, CELL_Y, CELL_X
+        """)
+    return " UNION ALL ".join(parts)
+
+
+# Registered in Crime_ETL.SUMMARY_TABLES so loads keep the tiles current
+TILES_SUMMARY = {
+    "table": "heatmap_tiles",
+    "keys": ["ZOOM", "YEAR", "OFFENSE_LOWER", "CELL_Y", "CELL_X"],
+    "values": ["lat_sum", "long_sum", "crime_count"],
+    "delta": tile_select_sql("staged_crime", "LOWER(OFFENSE_DESCRIPTION)"),
+}
+
+
+def build_tiles(db_path):
+    """
+    Rebuild heatmap_tiles from the full boston_crime table in one transaction.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(CREATE_TILES_TABLE)
+            conn.execute("DELETE FROM heatmap_tiles")
+            conn.execute(f"INSERT INTO heatmap_tiles {tile_select_sql('boston_crime', 'OFFENSE_LOWER')}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python Heatmap_Tiles.py /path/to/crime_dashboard.db")
+    build_tiles(sys.argv[1])
+    print(f"Built heatmap tiles for zoom levels {TILE_ZOOMS}")
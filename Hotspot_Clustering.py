@@ -0,0 +1,219 @@
+"""
+Crime hotspot clustering, the scalable version of the clustering in Boston_Prediction_2024.ipynb.
+
+Coordinates are read from boston_crime straight into a float32 NumPy array (half the memory of
+float64, and no list of Python tuples). Two ways to find hotspots are supported:
+
+    minibatch  MiniBatchKMeans, which fits on small random batches so its cost barely grows with
+               the number of incidents
+    grid       Bins every incident into a square grid cell and takes the busiest cells, a single
+               O(n) pass with no training at all
+
+The dominant street and district of every hotspot are found with one grouped count over all
+incidents, and the ranked hotspots are saved to the crime_hotspots table, so the dashboard can draw
+them (Crime_API.fetch_hotspots) without retraining.
+
+Usage:
+    python Hotspot_Clustering.py /path/to/crime_dashboard.db [minibatch|grid]
+"""
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+# Coordinates outside this box are geocoding errors, not Boston (same filter as the notebook)
+BOSTON_BOUNDS = {"Lat": (42.22, 42.4), "Long": (-71.19, -71.0)}
+
+# Years the 2024 prediction is trained on
+TRAINING_YEARS = (2015, 2023)
+
+HOTSPOT_MODES = ("minibatch", "grid")
+
+CREATE_HOTSPOTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS crime_hotspots (
+        MODE TEXT,                  -- How the hotspots were found: 'minibatch' or 'grid'
+        RANK INTEGER,               -- 1 = the hotspot with the most incidents
+        Lat REAL,                   -- Latitude of the hotspot's centroid
+        Long REAL,                  -- Longitude of the hotspot's centroid
+        crime_count INTEGER,        -- Incidents assigned to the hotspot
+        STREET TEXT,                -- Most common street among those incidents
+        DISTRICT TEXT,              -- Most common district among those incidents
+        START_YEAR INTEGER,         -- First year of the training data
+        END_YEAR INTEGER,           -- Last year of the training data
+        TRAINED_AT TEXT,            -- When the hotspots were computed
+        PRIMARY KEY (MODE, RANK)
+    )
+"""
+
+
+def load_incident_points(db_path, start_year=TRAINING_YEARS[0], end_year=TRAINING_YEARS[1]):
+    """
+    Read the located incidents of a year range.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        start_year (int): First year to include.
+        end_year (int): Last year to include.
+
+    Returns:
+        np.ndarray: float32 array of shape (n, 2) with Lat, Long.
+        pd.DataFrame: STREET and DISTRICT of the same n incidents, as categoricals.
+    """
+    (lat_min, lat_max), (long_min, long_max) = BOSTON_BOUNDS["Lat"], BOSTON_BOUNDS["Long"]
+    query = """
+        SELECT Lat, Long, STREET, DISTRICT
+        FROM boston_crime
+        WHERE YEAR BETWEEN ? AND ?
+          AND Lat BETWEEN ? AND ? AND Long BETWEEN ? AND ?
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        df = pd.read_sql_query(
+            query, conn, params=(start_year, end_year, lat_min, lat_max, long_min, long_max),
+            dtype={"Lat": "float32", "Long": "float32", "STREET": "category", "DISTRICT": "category"},
+        )
+    finally:
+        conn.close()
+    return df[["Lat", "Long"]].to_numpy(dtype=np.float32), df[["STREET", "DISTRICT"]]
+
+
+def minibatch_hotspots(coords, n_clusters=15, batch_size=4096, random_state=0):
+    """
+    Cluster the incidents with MiniBatchKMeans.
+
+    Returns:
+        np.ndarray: Cluster number of every incident.
+        np.ndarray: Centroid (Lat, Long) of every cluster.
+    """
+    model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=random_state,
+                            n_init="auto").fit(coords)
+    return model.labels_, model.cluster_centers_
+
+
+def grid_hotspots(coords, n_clusters=15, cell_size=0.0025):
+    """
+    Find the busiest grid cells: every incident is binned into a square cell of cell_size degrees
+    (about 250 m) and the n_clusters cells with the most incidents become the hotspots.
+
+    Returns:
+        np.ndarray: Hotspot number of every incident, -1 for incidents outside the hotspots.
+        np.ndarray: Centroid (Lat, Long) of the incidents in every hotspot.
+    """
+    cells = np.floor((coords - coords.min(axis=0)) / cell_size).astype(np.int64)
+    cell_ids = cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1]
+    unique_ids, inverse, counts = np.unique(cell_ids, return_inverse=True, return_counts=True)
+
+    # Rank of every cell by its count; only the top n_clusters cells become hotspots
+    order = np.argsort(-counts, kind="stable")
+    rank = np.full(len(unique_ids), -1)
+    rank[order[:n_clusters]] = np.arange(min(n_clusters, len(unique_ids)))
+    labels = rank[inverse]
+
+    hot = labels >= 0
+    n_hot = min(n_clusters, len(unique_ids))
+    sizes = np.bincount(labels[hot], minlength=n_hot)
+    centroids = np.column_stack([
+        np.bincount(labels[hot], weights=coords[hot, axis], minlength=n_hot) / sizes for axis in (0, 1)
+    ])
+    return labels, centroids
+
+
+def dominant_values(labels, attributes, column):
+    """Most common value of column per cluster, from one grouped count over all incidents."""
+    counts = attributes[column].groupby(labels, observed=True).value_counts()
+    # value_counts sorts within each cluster, so the first row per cluster is the most common value
+    return counts.reset_index(level=1).groupby(level=0)[column].first()
+
+
+def describe_hotspots(labels, centroids, attributes, top=10):
+    """
+    Rank the hotspots by size and name their dominant street and district.
+
+    Parameters:
+        labels (np.ndarray): Hotspot number of every incident (-1 = none).
+        centroids (np.ndarray): Centroid of every hotspot.
+        attributes (pd.DataFrame): STREET and DISTRICT of every incident.
+        top (int): Number of hotspots to keep.
+
+    Returns:
+        pd.DataFrame: RANK, Lat, Long, crime_count, STREET, DISTRICT for the top hotspots.
+    """
+    labels = pd.Series(labels, index=attributes.index)
+    located = labels >= 0
+    sizes = labels[located].value_counts().nlargest(top)
+
+    hotspots = pd.DataFrame({
+        "Lat": centroids[sizes.index, 0].astype(np.float64),
+        "Long": centroids[sizes.index, 1].astype(np.float64),
+        "crime_count": sizes.to_numpy(),
+    }, index=sizes.index)
+    for column in ("STREET", "DISTRICT"):
+        hotspots[column] = dominant_values(labels[located], attributes[located], column).reindex(sizes.index)
+        hotspots[column] = hotspots[column].astype(object)
+
+    hotspots.insert(0, "RANK", np.arange(1, len(hotspots) + 1))
+    return hotspots.reset_index(drop=True)
+
+
+def find_hotspots(coords, attributes, mode="minibatch", n_clusters=15, top=10):
+    """
+    Cluster the incidents with the chosen mode and describe the top hotspots.
+
+    Returns:
+        pd.DataFrame: See describe_hotspots.
+    """
+    if mode == "minibatch":
+        labels, centroids = minibatch_hotspots(coords, n_clusters)
+    elif mode == "grid":
+        labels, centroids = grid_hotspots(coords, n_clusters)
+    else:
+        raise ValueError(f"Unknown hotspot mode {mode!r}, expected one of {HOTSPOT_MODES}.")
+    return describe_hotspots(labels, centroids, attributes, top)
+
+
+def save_hotspots(db_path, hotspots, mode, start_year, end_year):
+    """Replace the saved hotspots of one mode in the crime_hotspots table."""
+    rows = hotspots.assign(MODE=mode, START_YEAR=start_year, END_YEAR=end_year,
+                           TRAINED_AT=time.strftime("%Y-%m-%d %H:%M:%S"))
+    columns = ["MODE", "RANK", "Lat", "Long", "crime_count", "STREET", "DISTRICT",
+               "START_YEAR", "END_YEAR", "TRAINED_AT"]
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(CREATE_HOTSPOTS_TABLE)
+            conn.execute("DELETE FROM crime_hotspots WHERE MODE = ?", (mode,))
+            conn.executemany(
+                f"INSERT INTO crime_hotspots ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                rows[columns].astype(object).itertuples(index=False, name=None),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def train_hotspots(db_path, mode="minibatch", n_clusters=15, top=10,
+                   start_year=TRAINING_YEARS[0], end_year=TRAINING_YEARS[1]):
+    """
+    Find the hotspots in the database's incidents and save them.
+
+    Returns:
+        pd.DataFrame: The saved hotspots.
+    """
+    coords, attributes = load_incident_points(db_path, start_year, end_year)
+    hotspots = find_hotspots(coords, attributes, mode, n_clusters, top)
+    save_hotspots(db_path, hotspots, mode, start_year, end_year)
+    return hotspots
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or (len(sys.argv) == 3 and sys.argv[2] not in HOTSPOT_MODES):
+        sys.exit("Usage: python Hotspot_Clustering.py /path/to/crime_dashboard.db [minibatch|grid]")
+    result = train_hotspots(sys.argv[1], *sys.argv[2:])
+    print(result.to_string(index=False))
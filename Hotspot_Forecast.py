@@ -0,0 +1,311 @@
+"""
+Weekly crime forecast per map cell.
+
+The notebook's 2024 "prediction" only clusters past incidents. This module forecasts how many
+incidents to expect in every grid cell (about 550 m across) in a given week:
+
+    crime_cell_week_counts   incidents per (week, cell), kept current by Crime_ETL like the other
+                             summary tables
+    crime_forecast_features  one row per (week, cell) with the features the forecast uses: the
+                             counts of the previous one and two weeks, the 4 and 13 week averages
+                             and the count of the same week a year earlier, next to the actual count
+    crime_forecast_model     a ridge regression on those features, stored as its normal equations
+                             (X'X and X'y) so new rows can be added and changed rows taken back out
+
+When new incidents are loaded only the feature rows that depend on their weeks are recomputed, and
+the model is updated by subtracting the old rows' contribution and adding the new one. Scoring a
+week is one indexed read of its feature rows and a matrix-vector product.
+
+Weeks are numbered from Monday 1970-01-05 (see week_number), so week N + 1 is always the next week
+whatever the year. Features exist up to one week past the newest incident, which is the forecast.
+
+Usage:
+    python Hotspot_Forecast.py /path/to/crime_dashboard.db
+"""
+import datetime
+import json
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from Heatmap_Tiles import TILE_CELL_PIXELS, grid_cell_size
+
+# Cells are the heatmap grid at zoom 10, about 550 m across in Boston
+FORECAST_ZOOM = 10
+CELL_LAT_STEP, CELL_LON_STEP = grid_cell_size(FORECAST_ZOOM, TILE_CELL_PIXELS)
+
+FEATURES = ["lag_1", "lag_2", "roll_4", "roll_13", "lag_52"]
+
+# Weeks of history the features look back over
+LOOKBACK_WEEKS = 52
+
+# Ridge penalty on the feature weights (not on the intercept), keeps the solve stable
+RIDGE = 1.0
+
+EPOCH_MONDAY = datetime.date(1970, 1, 5)
+
+# Week number of an incident, from the date part of OCCURRED_ON_DATE
+WEEK_SQL = "CAST((julianday(substr(OCCURRED_ON_DATE, 1, 10)) - julianday('1970-01-05')) / 7 AS INTEGER)"
+
+CREATE_COUNTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS crime_cell_week_counts (
+        WEEK INTEGER,               -- Weeks since Monday 1970-01-05
+        CELL_Y INTEGER,             -- Grid row, CAST((Lat + 90) / lat_step AS INTEGER)
+        CELL_X INTEGER,             -- Grid column, CAST((Long + 180) / lon_step AS INTEGER)
+        crime_count INTEGER,        -- Incidents in the cell that week
+        PRIMARY KEY (WEEK, CELL_Y, CELL_X)
+    ) WITHOUT ROWID
+"""
+
+CREATE_FEATURES_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS crime_forecast_features (
+        WEEK INTEGER,
+        CELL_Y INTEGER,
+        CELL_X INTEGER,
+        {", ".join(f"{feature} REAL" for feature in FEATURES)},
+        crime_count INTEGER,        -- Actual incidents that week (what the forecast is trained on)
+        PRIMARY KEY (WEEK, CELL_Y, CELL_X)
+    ) WITHOUT ROWID
+"""
+
+CREATE_MODEL_TABLE = """
+    CREATE TABLE IF NOT EXISTS crime_forecast_model (
+        NAME TEXT PRIMARY KEY,      -- first_week, next_week, xtx, xty, weights, rows, trained_at
+        VALUE TEXT                  -- JSON
+    )
+"""
+
+
+def counts_select_sql(source):
+    """SELECT that counts the located, dated incidents of source per (week, cell)."""
+    return f"""
+        SELECT {WEEK_SQL} AS WEEK,
+               CAST((Lat + 90) / {CELL_LAT_STEP!r} AS INTEGER) AS CELL_Y,
+               CAST((Long + 180) / {CELL_LON_STEP!r} AS INTEGER) AS CELL_X,
+               COUNT(*) AS crime_count
+        FROM {source}
+        WHERE OCCURRED_ON_DATE IS NOT NULL AND Lat IS NOT NULL AND Long IS NOT NULL
+        GROUP BY WEEK, CELL_Y, CELL_X
+        HAVING WEEK IS NOT NULL
+    """
+
+
+# Registered in Crime_ETL.SUMMARY_TABLES so loads keep the weekly counts current
+COUNTS_SUMMARY = {
+    "table": "crime_cell_week_counts",
+    "keys": ["WEEK", "CELL_Y", "CELL_X"],
+    "values": ["crime_count"],
+    "delta": counts_select_sql("staged_crime"),
+}
+
+
+def week_number(year, week):
+    """Week number of ISO week `week` of `year`."""
+    return (datetime.date.fromisocalendar(year, week, 1) - EPOCH_MONDAY).days // 7
+
+
+def compute_features(conn, first_week, last_week):
+    """
+    Build the feature rows of weeks first_week..last_week for every cell that has had a crime.
+
+    Returns:
+        pd.DataFrame: WEEK, CELL_Y, CELL_X, the FEATURES and crime_count, one row per (week, cell).
+    """
+    cells = pd.read_sql("SELECT DISTINCT CELL_Y, CELL_X FROM crime_cell_week_counts ORDER BY CELL_Y, CELL_X", conn)
+    base = first_week - LOOKBACK_WEEKS
+    counts = pd.read_sql(
+        "SELECT WEEK, CELL_Y, CELL_X, crime_count FROM crime_cell_week_counts WHERE WEEK BETWEEN ? AND ?",
+        conn, params=(base, last_week),
+    )
+
+    # Dense (cell, week) matrix of counts, with a leading zero column for the running sums
+    cell_index = pd.MultiIndex.from_frame(cells)
+    rows = cell_index.get_indexer(pd.MultiIndex.from_frame(counts[["CELL_Y", "CELL_X"]]))
+    dense = np.zeros((len(cells), last_week - base + 1))
+    dense[rows, counts["WEEK"].to_numpy() - base] = counts["crime_count"].to_numpy()
+    running = np.concatenate([np.zeros((len(cells), 1)), np.cumsum(dense, axis=1)], axis=1)
+
+    # Column j of dense is week base + j, and running[:, j] is the sum of the weeks before it
+    j = np.arange(first_week - base, last_week - base + 1)
+    columns = {
+        "lag_1": dense[:, j - 1],
+        "lag_2": dense[:, j - 2],
+        "roll_4": (running[:, j] - running[:, j - 4]) / 4,
+        "roll_13": (running[:, j] - running[:, j - 13]) / 13,
+        "lag_52": dense[:, j - 52],
+        "crime_count": dense[:, j],
+    }
+    # Rows in (week, cell) order: transpose so the week varies slowest
+    features = pd.DataFrame({name: values.T.ravel() for name, values in columns.items()})
+    features["crime_count"] = features["crime_count"].astype(np.int64)
+    features.insert(0, "WEEK", np.repeat(j + base, len(cells)))
+    features.insert(1, "CELL_Y", np.tile(cells["CELL_Y"].to_numpy(), len(j)))
+    features.insert(2, "CELL_X", np.tile(cells["CELL_X"].to_numpy(), len(j)))
+    return features
+
+
+def design_matrix(features):
+    """Intercept column followed by the FEATURES."""
+    return np.column_stack([np.ones(len(features)), features[FEATURES].to_numpy(dtype=np.float64)])
+
+
+def normal_equations(features):
+    """X'X and X'y of a set of feature rows."""
+    x = design_matrix(features)
+    return x.T @ x, x.T @ features["crime_count"].to_numpy(dtype=np.float64)
+
+
+def solve_weights(xtx, xty):
+    """Ridge regression weights from the normal equations (the intercept is not penalized)."""
+    penalty = RIDGE * np.eye(len(xty))
+    penalty[0, 0] = 0.0
+    return np.linalg.lstsq(xtx + penalty, xty, rcond=None)[0]
+
+
+def load_model(conn):
+    """Read the stored model state, or None before the first build."""
+    rows = dict(conn.execute("SELECT NAME, VALUE FROM crime_forecast_model").fetchall())
+    if not rows:
+        return None
+    state = {name: json.loads(value) for name, value in rows.items()}
+    for name in ("xtx", "xty", "weights"):
+        state[name] = np.array(state[name])
+    return state
+
+
+def save_model(conn, state):
+    """Replace the stored model state."""
+    conn.execute("DELETE FROM crime_forecast_model")
+    conn.executemany(
+        "INSERT INTO crime_forecast_model (NAME, VALUE) VALUES (?, ?)",
+        [(name, json.dumps(value.tolist() if isinstance(value, np.ndarray) else value))
+         for name, value in state.items()],
+    )
+
+
+def has_new_cells(conn, week):
+    """Whether crime_cell_week_counts has a cell without a feature row in `week` (the last forecast week)."""
+    return conn.execute("""
+        SELECT 1 FROM crime_cell_week_counts c
+        WHERE NOT EXISTS (
+            SELECT 1 FROM crime_forecast_features f
+            WHERE f.WEEK = ? AND f.CELL_Y = c.CELL_Y AND f.CELL_X = c.CELL_X
+        )
+        LIMIT 1
+    """, (week,)).fetchone() is not None
+
+
+def refresh_forecast(conn, from_week=None):
+    """
+    Bring the features and the model up to date after crime_cell_week_counts changed.
+
+    Only weeks from from_week on are recomputed; that covers every week whose features depend on
+    counts of from_week or later, because features only look backwards. A cell that had no
+    incidents before needs rows for every week, so a load that adds one rebuilds everything.
+    Rows are trained on from LOOKBACK_WEEKS after the first week with data (before that the yearly
+    lag is missing) until the last week with data; the week after that is the forecast.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection with an open transaction.
+        from_week (int, optional): Earliest week whose counts changed; None rebuilds everything.
+    """
+    first_week, last_week = conn.execute("SELECT MIN(WEEK), MAX(WEEK) FROM crime_cell_week_counts").fetchone()
+    if first_week is None:
+        return
+    next_week = last_week + 1
+    state = load_model(conn)
+
+    if (state is None or from_week is None or first_week < state["first_week"]
+            or has_new_cells(conn, state["next_week"])):
+        # First build, incidents older than anything we had, or a new cell: start over
+        conn.execute("DELETE FROM crime_forecast_features")
+        size = len(FEATURES) + 1
+        state = {"first_week": first_week, "next_week": next_week,
+                 "xtx": np.zeros((size, size)), "xty": np.zeros(size)}
+        from_week = first_week
+    else:
+        # Weeks between the old forecast week and the new data change from forecast to training rows.
+        # Nothing before the first counted week has feature rows, so there is nothing to redo there.
+        from_week = max(min(from_week, state["next_week"]), state["first_week"])
+        old = pd.read_sql("SELECT * FROM crime_forecast_features WHERE WEEK >= ?", conn, params=(from_week,))
+        trained = old[(old["WEEK"] >= state["first_week"] + LOOKBACK_WEEKS) & (old["WEEK"] < state["next_week"])]
+        xtx, xty = normal_equations(trained)
+        state["xtx"] = state["xtx"] - xtx
+        state["xty"] = state["xty"] - xty
+        conn.execute("DELETE FROM crime_forecast_features WHERE WEEK >= ?", (from_week,))
+
+    new = compute_features(conn, from_week, next_week)
+    columns = list(new.columns)
+    conn.executemany(
+        f"INSERT INTO crime_forecast_features ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        new.astype(object).itertuples(index=False, name=None),
+    )
+    trained = new[(new["WEEK"] >= state["first_week"] + LOOKBACK_WEEKS) & (new["WEEK"] < next_week)]
+    xtx, xty = normal_equations(trained)
+    state["xtx"] = state["xtx"] + xtx
+    state["xty"] = state["xty"] + xty
+
+    state["next_week"] = next_week
+    state["weights"] = solve_weights(state["xtx"], state["xty"])
+    state["rows"] = int(round(state["xtx"][0, 0]))
+    state["trained_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    save_model(conn, state)
+
+
+def score_features(features, weights, next_week=None):
+    """
+    Forecast incidents for a set of feature rows.
+
+    Parameters:
+        features (pd.DataFrame): Rows of crime_forecast_features.
+        weights (array-like): Model weights, intercept first.
+        next_week (int, optional): The forecast week; its actual counts are not known yet.
+
+    Returns:
+        pd.DataFrame: Lat, Long (cell centres), expected_count and crime_count, busiest cells first.
+    """
+    expected = np.clip(design_matrix(features) @ np.asarray(weights, dtype=np.float64), 0, None)
+    forecast = pd.DataFrame({
+        "Lat": (features["CELL_Y"].to_numpy() + 0.5) * CELL_LAT_STEP - 90,
+        "Long": (features["CELL_X"].to_numpy() + 0.5) * CELL_LON_STEP - 180,
+        "expected_count": expected,
+        "crime_count": features["crime_count"].astype("Int64").to_numpy(),
+    })
+    if next_week is not None and len(features) and features["WEEK"].iloc[0] >= next_week:
+        forecast["crime_count"] = pd.NA
+    return forecast.sort_values("expected_count", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def build_forecast(db_path):
+    """
+    Build the weekly counts, the features and the model from the full boston_crime table.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in (CREATE_COUNTS_TABLE, CREATE_FEATURES_TABLE, CREATE_MODEL_TABLE):
+                conn.execute(statement)
+            conn.execute("DELETE FROM crime_cell_week_counts")
+            conn.execute("DELETE FROM crime_forecast_model")
+            conn.execute(f"INSERT INTO crime_cell_week_counts {counts_select_sql('boston_crime')}")
+            refresh_forecast(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python Hotspot_Forecast.py /path/to/crime_dashboard.db")
+    build_forecast(sys.argv[1])
+    print("Built the weekly crime forecast")
@@ -1,6 +1,18 @@
 import panel as pn
 import pandas as pd
+from Crime_Profiler import profiled
 
+def integer_counts(values):
+    """
+    Return a count column as integers, with anything non-numeric as 0.
+
+    Counts from the API are integers already, so those are passed through without a conversion.
+    """
+    if pd.api.types.is_integer_dtype(values) and not values.hasnans:
+        return values
+    return pd.to_numeric(values, errors="coerce").fillna(0).astype(int)
+
+@profiled("render")
 def create_line_chart(df, x_col, y_col, title, xlabel, ylabel, width=600, height=500, color="red"):
     """
     Generate a reusable line chart with circle markers at each data point.
@@ -25,7 +37,8 @@ def create_line_chart(df, x_col, y_col, title, xlabel, ylabel, width=600, height
     if df.empty:
         return pn.pane.Markdown("No data available.")
 
-    df[y_col] = pd.to_numeric(df[y_col], errors="coerce").fillna(0).astype(int)
+    # Plot a new two-column frame so the caller's frame is never changed
+    df = pd.DataFrame({x_col: df[x_col], y_col: integer_counts(df[y_col])})
 
     # 20% buffer for y-axis
     ylim_max = df[y_col].max() * 1.2
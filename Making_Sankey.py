@@ -1,5 +1,6 @@
 import pandas as pd
 import plotly.graph_objects as go
+from Crime_Profiler import profiled
 
 def code_mapping(df, src, targ):
     """
@@ -14,11 +15,12 @@ def code_mapping(df, src, targ):
         pd.DataFrame: Updated dataframe with numerical encoding.
         list: List of labels corresponding to the encoded values.
     """
-    labels = list(set(df[src]).union(set(df[targ])))
-    lc_map = {label: i for i, label in enumerate(labels)}
-    df = df.replace({src: lc_map, targ: lc_map})
-    return df, labels
+    # One factorize over both columns gives every label a single code, in order of first appearance
+    codes, labels = pd.factorize(pd.concat([df[src], df[targ]], ignore_index=True))
+    df = df.assign(**{src: codes[:len(df)], targ: codes[len(df):]})
+    return df, list(labels)
 
+@profiled("render")
 def make_sankey(df, *cols, vals=None):
     """
     Generate a multi-layered Sankey diagram using the given columns.
@@ -0,0 +1,170 @@
+"""
+Dictionary of offense types with their incident counts, and a full-text index to search it.
+
+The crime type dropdown used to be filled with SELECT DISTINCT over every incident, and listed
+every offense at once. offense_dictionary has one row per lower-cased offense with its incident
+count; Crime_ETL adds new incidents onto it like the other summary tables, so the list is
+current without ever scanning boston_crime again.
+
+offense_search is an FTS5 index over the dictionary with the trigram tokenizer, so a search for
+"lift" finds "larceny shoplifting" as well as words that start with it. Triggers on the
+dictionary keep the index in step with every insert, so loads do not need to know about it.
+Searches shorter than three letters, or on a SQLite without FTS5, fall back to matching the
+dictionary in pandas, which is still only a few hundred rows.
+
+Usage:
+    python Offense_Dictionary.py /path/to/crime_dashboard.db
+"""
+import sqlite3
+import sys
+
+import pandas as pd
+
+# The trigram tokenizer only indexes runs of at least this many characters
+MIN_SEARCH_LENGTH = 3
+
+CREATE_DICTIONARY_TABLE = """
+    CREATE TABLE IF NOT EXISTS offense_dictionary (
+        ID INTEGER PRIMARY KEY,     -- Stable row id, the search index refers to it
+        OFFENSE_LOWER TEXT UNIQUE,  -- Lower-cased offense description
+        crime_count INTEGER         -- Incidents with this offense
+    )
+"""
+
+# External-content index: the text lives in offense_dictionary, the index only stores the trigrams
+SEARCH_INDEX_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS offense_search USING fts5(
+        OFFENSE_LOWER, content='offense_dictionary', content_rowid='ID', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS offense_dictionary_insert AFTER INSERT ON offense_dictionary BEGIN
+        INSERT INTO offense_search (rowid, OFFENSE_LOWER) VALUES (new.ID, new.OFFENSE_LOWER);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS offense_dictionary_delete AFTER DELETE ON offense_dictionary BEGIN
+        INSERT INTO offense_search (offense_search, rowid, OFFENSE_LOWER) VALUES ('delete', old.ID, old.OFFENSE_LOWER);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS offense_dictionary_update AFTER UPDATE OF OFFENSE_LOWER ON offense_dictionary BEGIN
+        INSERT INTO offense_search (offense_search, rowid, OFFENSE_LOWER) VALUES ('delete', old.ID, old.OFFENSE_LOWER);
+        INSERT INTO offense_search (rowid, OFFENSE_LOWER) VALUES (new.ID, new.OFFENSE_LOWER);
+    END
+    """,
+]
+
+# Registered in Crime_ETL.SUMMARY_TABLES so loads keep the dictionary current
+DICTIONARY_SUMMARY = {
+    "table": "offense_dictionary",
+    "keys": ["OFFENSE_LOWER"],
+    "values": ["crime_count"],
+    "delta": """
+        SELECT LOWER(OFFENSE_DESCRIPTION) AS OFFENSE_LOWER, COUNT(*) AS crime_count
+        FROM staged_crime
+        WHERE OFFENSE_DESCRIPTION IS NOT NULL
+        GROUP BY LOWER(OFFENSE_DESCRIPTION)
+    """,
+}
+
+
+def create_search_index(conn):
+    """
+    Create offense_search and its triggers, and index the rows already in the dictionary.
+
+    Returns:
+        bool: False when this SQLite has no FTS5 or trigram tokenizer (searches then use pandas).
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'offense_search'").fetchone()
+    try:
+        for statement in SEARCH_INDEX_SQL:
+            conn.execute(statement)
+    except sqlite3.OperationalError:
+        return False
+    if not exists:
+        conn.execute("INSERT INTO offense_search (offense_search) VALUES ('rebuild')")
+    return True
+
+
+def create_offense_dictionary(conn):
+    """Create and fill offense_dictionary from boston_crime if it does not exist, then its search index."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'offense_dictionary'").fetchone()
+    if not exists:
+        conn.execute(CREATE_DICTIONARY_TABLE)
+        conn.execute("""
+            INSERT INTO offense_dictionary (OFFENSE_LOWER, crime_count)
+            SELECT OFFENSE_LOWER, COUNT(*) FROM boston_crime
+            WHERE OFFENSE_LOWER IS NOT NULL
+            GROUP BY OFFENSE_LOWER
+        """)
+    create_search_index(conn)
+
+
+def build_offense_dictionary(db_path):
+    """
+    Rebuild offense_dictionary and offense_search from the full boston_crime table in one transaction.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DROP TABLE IF EXISTS offense_search")
+            conn.execute("DROP TABLE IF EXISTS offense_dictionary")
+            create_offense_dictionary(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+def search_terms(text):
+    """Split a search into lower-case words."""
+    return str(text or "").lower().split()
+
+
+def fts_query(text):
+    """
+    Turn a search into an FTS5 MATCH expression: every word must appear, anywhere in the offense.
+
+    Returns:
+        str or None: The expression, or None when a word is too short for the trigram index.
+    """
+    terms = search_terms(text)
+    if not terms or any(len(term) < MIN_SEARCH_LENGTH for term in terms):
+        return None
+    # Quoting makes each word a literal string, so characters like - or / are not FTS5 syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def match_offenses(offenses, text, limit=20):
+    """
+    Search a list of offenses in Python, with the same rule as offense_search.
+
+    Parameters:
+        offenses (list): Offense names, most common first.
+        text (str): Words that must all appear in the offense.
+        limit (int): Maximum number of matches.
+
+    Returns:
+        list: The first `limit` matching offenses, in the order given.
+    """
+    terms = search_terms(text)
+    names = pd.Series(offenses, dtype="string")
+    matches = pd.Series(True, index=names.index)
+    for term in terms:
+        matches &= names.str.contains(term, regex=False).fillna(False)
+    return names[matches].head(limit).tolist()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python Offense_Dictionary.py /path/to/crime_dashboard.db")
+    build_offense_dictionary(sys.argv[1])
+    print("Built the offense dictionary")
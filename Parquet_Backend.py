@@ -0,0 +1,427 @@
+"""
+Columnar Parquet backend for Crime_API.
+
+Every dashboard query is a group-by over two or three columns of boston_crime. SQLite stores whole
+rows together, so it reads every column of every row it visits. Here the same table is stored as
+Parquet files partitioned by YEAR and read through Arrow with the files memory-mapped: a query
+only reads the columns it groups on (column pruning) and only the year folders it asks for
+(partition skipping).
+
+Parquet_Crime_API has the same fetch methods as Crime_API and returns the same DataFrames, so the
+dashboard can switch backends with CRIME_BACKEND=parquet (see Crime_Config.py). Both are
+Crime_Backends, which share the caching and async parts; there is no SQL engine behind this one, so
+Crime_API's SQL side (execute_query, get_db_connection, the time cube and dimension tables) is not on it.
+
+Usage (export a SQLite database to Parquet):
+    python Parquet_Backend.py /path/to/crime_dashboard.db /path/to/crime_parquet
+"""
+import json
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+from CRIME_API import (HOTSPOT_COLUMNS, INCIDENT_LIST_COLUMNS, Crime_Backend, cached_query, complete_weekdays,
+                       hour_window, incident_arrow_schema, timestamp_seconds)
+from Crime_Storage import CODED_COLUMNS
+from Hotspot_Forecast import score_features, week_number
+from Heatmap_Tiles import TILE_CELL_PIXELS, grid_cell_size
+from Query_Cache import SHARED_CACHE
+from Schema_Migration import table_exists
+
+# Column types of the exported boston_crime table. Location is left out, it is only Lat and Long as text.
+INCIDENT_SCHEMA = pa.schema([
+    ("INCIDENT_NUMBER", pa.string()),
+    ("OFFENSE_CODE", pa.int32()),
+    ("OFFENSE_CODE_GROUP", pa.string()),
+    ("OFFENSE_DESCRIPTION", pa.string()),
+    ("OFFENSE_LOWER", pa.string()),
+    ("DISTRICT", pa.string()),
+    ("REPORTING_AREA", pa.string()),
+    ("SHOOTING", pa.string()),
+    ("OCCURRED_ON_DATE", pa.string()),
+    ("OCCURRED_TS", pa.int64()),
+    ("YEAR", pa.int32()),
+    ("MONTH", pa.int8()),
+    ("DAY_OF_WEEK", pa.string()),
+    ("HOUR", pa.int8()),
+    ("UCR_PART", pa.string()),
+    ("STREET", pa.string()),
+    ("Lat", pa.float64()),
+    ("Long", pa.float64()),
+])
+
+# Tables written by Hotspot_Clustering.py and Hotspot_Forecast.py, exported when they exist
+MODEL_TABLES = ["crime_hotspots", "crime_forecast_features", "crime_forecast_model"]
+
+# boston_crime/YEAR=2022/... folders; rows without a year go to the __HIVE_DEFAULT_PARTITION__ folder
+PARTITIONING = ds.partitioning(pa.schema([("YEAR", pa.int32())]), flavor="hive")
+
+
+def export_parquet(db_path, out_dir, batch_rows=250_000):
+    """
+    Write boston_crime, offense_category_map and the model tables from a SQLite database as Parquet.
+
+    Rows are streamed in batches, so memory use does not depend on the table size.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        out_dir (str): Output directory; boston_crime/YEAR=<year>/ folders are created in it.
+        batch_rows (int): Rows read from SQLite per batch.
+    """
+    # Arrow pulls the batches on its own writer thread, hence check_same_thread=False
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        columns = ", ".join(INCIDENT_SCHEMA.names)
+        cursor = conn.execute(f"SELECT {columns} FROM boston_crime ORDER BY YEAR")
+
+        def batches():
+            while True:
+                rows = cursor.fetchmany(batch_rows)
+                if not rows:
+                    return
+                yield pa.RecordBatch.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(zip(*rows), INCIDENT_SCHEMA)],
+                    schema=INCIDENT_SCHEMA,
+                )
+
+        ds.write_dataset(
+            batches(),
+            os.path.join(out_dir, "boston_crime"),
+            schema=INCIDENT_SCHEMA,
+            format="parquet",
+            partitioning=PARTITIONING,
+            existing_data_behavior="delete_matching",
+        )
+
+        category_map = pd.read_sql("SELECT OFFENSE_DESCRIPTION, CRIME_CATEGORY FROM offense_category_map", conn)
+        pq.write_table(pa.Table.from_pandas(category_map, preserve_index=False),
+                       os.path.join(out_dir, "offense_category_map.parquet"))
+
+        # Model outputs are optional and small next to boston_crime, so each is copied as one file
+        for table in MODEL_TABLES:
+            if table_exists(conn, table):
+                df = pd.read_sql(f"SELECT * FROM {table}", conn)
+                pq.write_table(pa.Table.from_pandas(df, preserve_index=False), os.path.join(out_dir, f"{table}.parquet"))
+    finally:
+        conn.close()
+
+
+def summarize_year(counts, year, top_crimes=10, top_districts=5):
+    """
+    Turn a year's (Crime, DISTRICT, DAY_OF_WEEK, MONTH, crime_count) counts into the four
+    Crime Trends frames that fetch_year_overview returns.
+    """
+    def total_by(column):
+        # dropna=False keeps the unknown offense/district rows, like the SQL GROUP BY does
+        # int64 so a year without incidents gives empty frames instead of an object column nlargest rejects
+        df = counts.groupby(column, dropna=False, sort=False)["crime_count"].sum().reset_index()
+        return df.astype({"crime_count": "int64"})
+
+    top_crime_df = total_by("Crime").nlargest(top_crimes, "crime_count").reset_index(drop=True)
+    district_df = total_by("DISTRICT").nlargest(top_districts, "crime_count").reset_index(drop=True)
+    day_df = complete_weekdays(total_by("DAY_OF_WEEK").dropna(subset=["DAY_OF_WEEK"]))
+
+    monthly_df = total_by("MONTH").dropna(subset=["MONTH"]).sort_values("MONTH")
+    monthly_df["MONTH"] = monthly_df["MONTH"].astype(int)
+    monthly_df.insert(0, "YEAR", int(year))
+
+    return {
+        "top_crimes": top_crime_df,
+        "top_districts": district_df,
+        "day_of_week": day_df,
+        "monthly": monthly_df.reset_index(drop=True),
+    }
+
+
+class Parquet_Crime_API(Crime_Backend):
+    """Crime backend that answers every fetch method from year-partitioned Parquet files."""
+
+    def __init__(self, parquet_dir, cache=SHARED_CACHE, check_interval=1.0):
+        """
+        Parameters:
+            parquet_dir (str): Directory written by export_parquet.
+            cache (QueryCache or None): Result cache shared across sessions, None turns caching off.
+            check_interval (float): Seconds between checks of the files for new data.
+        """
+        # db_path is what the cache uses to tell databases apart, so point it at the Parquet folder
+        super().__init__(parquet_dir, cache, check_interval)
+        self._dataset = None
+        self._dataset_signature = None
+
+    def data_signature(self):
+        """Describe the Parquet files by their paths, sizes and modification times."""
+        signature = []
+        for root, _, files in os.walk(self.db_path):
+            for name in files:
+                info = os.stat(os.path.join(root, name))
+                signature.append((os.path.join(root, name), info.st_mtime_ns, info.st_size))
+        return tuple(sorted(signature))
+
+    def close(self):
+        """Forget the open dataset (the memory maps are released with it)."""
+        self._dataset = None
+
+    # ---- Arrow helpers ----
+
+    def dataset(self):
+        """Open the boston_crime dataset, re-discovering the files when they changed."""
+        signature = self.data_signature()
+        if self._dataset is None or signature != self._dataset_signature:
+            self._dataset = ds.dataset(
+                os.path.join(self.db_path, "boston_crime"),
+                format="parquet",
+                partitioning=PARTITIONING,
+                filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True),
+            )
+            self._dataset_signature = signature
+        return self._dataset
+
+    def scan(self, columns, year=None, extra_filter=None):
+        """Read only the given columns, and only the requested year's partition when year is set."""
+        row_filter = None if year is None else ds.field("YEAR") == year
+        if extra_filter is not None:
+            row_filter = extra_filter if row_filter is None else row_filter & extra_filter
+        return self.dataset().to_table(columns=columns, filter=row_filter)
+
+    def distinct_values(self, column):
+        """
+        The distinct non-null values of a text column, read from the Parquet dictionaries.
+
+        The column is read dictionary-encoded, so the rows are only small integer indices and the
+        values come from each row group's dictionary instead of being decoded row by row.
+        """
+        dataset = ds.dataset(
+            os.path.join(self.db_path, "boston_crime"),
+            format=ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=[column])),
+            partitioning=PARTITIONING,
+            filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True),
+        )
+        values = set()
+        for batch in dataset.to_batches(columns=[column]):
+            values.update(batch.column(0).dictionary.to_pylist())
+        values.discard(None)
+        return values
+
+    def count_by(self, keys, year=None, extra_filter=None):
+        """Count rows per combination of keys (nulls form their own group, like SQL GROUP BY)."""
+        table = self.scan(keys, year, extra_filter)
+        counts = table.group_by(keys, use_threads=True).aggregate([([], "count_all")])
+        return counts.rename_columns(keys + ["crime_count"]).to_pandas()
+
+    def category_counts(self, keys, year=None):
+        """Count rows per keys and crime category, using offense_category_map like the SQL summary tables."""
+        # The SQL summary tables leave out incidents without a year, so do the same here
+        df = self.count_by(keys + ["OFFENSE_DESCRIPTION"], year, ds.field("YEAR").is_valid())
+        category_map = pq.read_table(os.path.join(self.db_path, "offense_category_map.parquet")).to_pandas()
+        lookup = dict(zip(category_map["OFFENSE_DESCRIPTION"], category_map["CRIME_CATEGORY"]))
+        df["CRIME_CATEGORY"] = df["OFFENSE_DESCRIPTION"].map(lookup).fillna("Uncategorized")
+        return df.groupby(keys + ["CRIME_CATEGORY"], dropna=False, as_index=False)["crime_count"].sum()
+
+    # ---- Crime_API fetch methods ----
+
+    @cached_query
+    def list_tables(self):
+        """The Parquet store only has the raw table; summaries are computed on the fly."""
+        return ["boston_crime", "offense_category_map"]
+
+    @cached_query
+    def fetch_boston_top_crimes(self, year: int = None, limit: int = 10) -> pd.DataFrame:
+        """Fetch the top N most frequent crimes in Boston for a given year."""
+        df = self.count_by(["OFFENSE_LOWER"], year or None)
+        df = df.rename(columns={"OFFENSE_LOWER": "Crime"})
+        return df.nlargest(limit, "crime_count").reset_index(drop=True)
+
+    @cached_query
+    def fetch_top_districts(self, year):
+        """Fetch the top 5 districts with the highest crime counts in Boston for a given year."""
+        df = self.count_by(["DISTRICT"], year)
+        return df.nlargest(5, "crime_count").reset_index(drop=True)
+
+    @cached_query
+    def fetch_crime_by_day_of_week(self, year):
+        """Fetch total crime counts grouped by day of the week for a selected year."""
+        df = self.count_by(["DAY_OF_WEEK"], year).dropna(subset=["DAY_OF_WEEK"])
+        df["DAY_OF_WEEK"] = df["DAY_OF_WEEK"].str.lower()
+        return complete_weekdays(df)
+
+    @cached_query
+    def fetch_year_overview(self, year, top_crimes=10, top_districts=5):
+        """Fetch the four Crime Trends aggregates for a year with a single scan of its partition."""
+        counts = self.count_by(["OFFENSE_LOWER", "DISTRICT", "DAY_OF_WEEK", "MONTH"], year)
+        counts = counts.rename(columns={"OFFENSE_LOWER": "Crime"})
+        counts["DAY_OF_WEEK"] = counts["DAY_OF_WEEK"].str.strip().str.lower()
+        return summarize_year(counts, year, top_crimes, top_districts)
+
+    @cached_query
+    def fetch_crime_by_month_all_years(self):
+        """Fetch total crime counts grouped by month for all years."""
+        df = self.count_by(["YEAR", "MONTH"]).dropna(subset=["MONTH"])
+        df["YEAR"] = df["YEAR"].astype(int)
+        df["MONTH"] = df["MONTH"].astype(int)
+        return df.sort_values(["YEAR", "MONTH"]).reset_index(drop=True)
+
+    @cached_query
+    def fetch_crime_category_proportions(self, selected_category: str) -> pd.DataFrame:
+        """Fetch crime counts for a selected category vs. all other crimes per year."""
+        df = self.category_counts(["YEAR"]).dropna(subset=["YEAR"])
+        df["selected"] = df["crime_count"].where(df["CRIME_CATEGORY"] == selected_category, 0)
+        totals = df.groupby("YEAR", as_index=False)[["selected", "crime_count"]].sum().sort_values("YEAR")
+        totals["YEAR"] = totals["YEAR"].astype(int)
+        totals["Other Crimes"] = totals["crime_count"] - totals["selected"]
+        totals = totals.rename(columns={"selected": selected_category})
+        return totals[["YEAR", selected_category, "Other Crimes"]].reset_index(drop=True)
+
+    @cached_query
+    def fetch_crime_locations(self, year, crime_type="All Crimes"):
+        """Fetch crime locations (Lat, Long) for a selected year."""
+        located = pc.is_valid(ds.field("Lat")) & pc.is_valid(ds.field("Long"))
+        if crime_type != "All Crimes":
+            located = located & (ds.field("OFFENSE_LOWER") == crime_type.lower())
+        return self.scan(["Lat", "Long"], year, located).to_pandas()
+
+    @cached_query
+    def fetch_crime_density(self, year, crime_type="All Crimes", zoom=13, cell_pixels=TILE_CELL_PIXELS,
+                            bounds=None):
+        """Fetch crime locations for a selected year binned into a grid for a map zoom level."""
+        located = pc.is_valid(ds.field("Lat")) & pc.is_valid(ds.field("Long"))
+        if crime_type != "All Crimes":
+            located = located & (ds.field("OFFENSE_LOWER") == crime_type.lower())
+        if bounds is not None:
+            south, west, north, east = bounds
+            located = located & (ds.field("Lat") >= south) & (ds.field("Lat") <= north) \
+                & (ds.field("Long") >= west) & (ds.field("Long") <= east)
+        points = self.scan(["Lat", "Long"], year, located).to_pandas()
+
+        # Same cell numbering as the SQL version: shifted so it is positive, then truncated
+        lat_step, lon_step = grid_cell_size(zoom, cell_pixels)
+        points["cell_y"] = ((points["Lat"] + 90) / lat_step).astype(np.int64)
+        points["cell_x"] = ((points["Long"] + 180) / lon_step).astype(np.int64)
+        cells = points.groupby(["cell_y", "cell_x"], sort=False).agg(
+            Lat=("Lat", "mean"), Long=("Long", "mean"), crime_count=("Lat", "size"))
+        return cells.reset_index(drop=True)
+
+    @cached_query
+    def fetch_hotspots(self, mode="minibatch", limit=10):
+        """Fetch the saved crime hotspots, largest first."""
+        path = os.path.join(self.db_path, "crime_hotspots.parquet")
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=HOTSPOT_COLUMNS)
+        df = pq.read_table(path, filters=[("MODE", "==", mode)]).to_pandas()
+        return df.sort_values("RANK").head(limit)[HOTSPOT_COLUMNS].reset_index(drop=True)
+
+    @cached_query
+    def fetch_forecast(self, year, week):
+        """Fetch the expected number of incidents per map cell for one ISO week."""
+        features_path = os.path.join(self.db_path, "crime_forecast_features.parquet")
+        model_path = os.path.join(self.db_path, "crime_forecast_model.parquet")
+        if not os.path.exists(model_path):
+            return pd.DataFrame(columns=["Lat", "Long", "expected_count", "crime_count"])
+        model = dict(pq.read_table(model_path).to_pandas().itertuples(index=False, name=None))
+        features = pq.read_table(features_path, filters=[("WEEK", "==", week_number(year, week))]).to_pandas()
+        return score_features(features, json.loads(model["weights"]), json.loads(model["next_week"]))
+
+    @cached_query
+    def get_unique_crime_categories(self):
+        """Fetch distinct crime categories that occur in the data."""
+        return sorted(self.category_counts([])["CRIME_CATEGORY"].unique().tolist())
+
+    @cached_query
+    def fetch_sankey_data(self, start_year=2020, end_year=2025):
+        """Fetch the top 3 crime categories per district per year."""
+        df = self.category_counts(["YEAR", "DISTRICT"])
+        df = df[df["DISTRICT"].notna() & df["YEAR"].between(start_year, end_year)].copy()
+        # method="min" ranks ties the same way SQL RANK() does
+        df["rank"] = df.groupby(["YEAR", "DISTRICT"])["crime_count"].rank(method="min", ascending=False)
+        df = df[df["rank"] <= 3].rename(columns={
+            "YEAR": "Year", "DISTRICT": "District", "CRIME_CATEGORY": "Crime_Category", "crime_count": "Crime_Count"})
+        df["Year"] = df["Year"].astype(int)
+        df = df.sort_values(["Year", "District", "Crime_Count"], ascending=[False, True, False])
+        return df[["Year", "District", "Crime_Category", "Crime_Count"]].reset_index(drop=True)
+
+    @cached_query
+    def fetch_crime_category_trends(self, selected_category):
+        """Fetch crime category trends over the years for a specific category."""
+        df = self.category_counts(["YEAR"])
+        df = df[df["CRIME_CATEGORY"] == selected_category].sort_values("YEAR")
+        df = df.rename(columns={"YEAR": "Year", "CRIME_CATEGORY": "Crime Category", "crime_count": "Crime Count"})
+        return df[["Year", "Crime Category", "Crime Count"]].reset_index(drop=True)
+
+    @cached_query
+    def fetch_offense_counts(self, limit=None):
+        """
+        Fetch offenses with their incident counts, most common first.
+
+        There is no offense_search index here, so search_crime_types filters this list instead.
+        """
+        df = self.count_by(["OFFENSE_LOWER"]).dropna(subset=["OFFENSE_LOWER"])
+        df = df.rename(columns={"OFFENSE_LOWER": "Crime"}).sort_values(["crime_count", "Crime"], ascending=[False, True])
+        return (df if limit is None else df.head(limit)).reset_index(drop=True)
+
+    @cached_query
+    def get_unique_crime_types(self):
+        """Fetch a sorted list of unique crime types with "All Crimes" as the first option."""
+        return ["All Crimes"] + sorted(self.distinct_values("OFFENSE_LOWER"))
+
+    @cached_query
+    def get_unique_districts(self):
+        """Fetch the police districts that have incidents, sorted."""
+        return sorted(pc.unique(self.scan(["DISTRICT"])["DISTRICT"]).drop_null().to_pylist())
+
+    def incident_filter(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes", after=None):
+        """The incident filters as an Arrow expression, with the same rules as incident_filter_sql."""
+        row_filter = pc.is_valid(ds.field("OCCURRED_TS"))
+        if after is not None:
+            ts, incident = int(after[0]), str(after[1])
+            row_filter &= (ds.field("OCCURRED_TS") > ts) | (
+                (ds.field("OCCURRED_TS") == ts) & (ds.field("INCIDENT_NUMBER") > incident))
+        if start is not None:
+            row_filter &= ds.field("OCCURRED_TS") >= timestamp_seconds(start)
+        if end is not None:
+            row_filter &= ds.field("OCCURRED_TS") < timestamp_seconds(end)
+        if hours is not None:
+            first, last = hour_window(hours)
+            if first <= last:
+                row_filter &= (ds.field("HOUR") >= first) & (ds.field("HOUR") <= last)
+            else:
+                row_filter &= (ds.field("HOUR") >= first) | (ds.field("HOUR") <= last)
+        if districts:
+            districts = [districts] if isinstance(districts, str) else list(districts)
+            row_filter &= ds.field("DISTRICT").isin(districts)
+        if crime_type != "All Crimes":
+            row_filter &= ds.field("OFFENSE_LOWER") == crime_type.lower()
+        return row_filter
+
+    def incident_page(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes",
+                      after=None, limit=100):
+        """Fetch one page of incidents matching the filters, in (OCCURRED_TS, INCIDENT_NUMBER) order."""
+        row_filter = self.incident_filter(start, end, hours, districts, crime_type, after)
+        table = self.dataset().to_table(columns=list(INCIDENT_LIST_COLUMNS), filter=row_filter)
+        # select_k keeps only the first `limit` rows instead of sorting everything after the cursor
+        sort_keys = [("OCCURRED_TS", "ascending"), ("INCIDENT_NUMBER", "ascending")]
+        page = table.take(pc.select_k_unstable(table, limit, sort_keys)).sort_by(sort_keys)
+        df = page.cast(incident_arrow_schema()).to_pandas()
+        # Same column types as the SQLite backend, which decodes these from its dimension tables
+        for column in CODED_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype("category")
+        return df
+
+    @cached_query
+    def fetch_incident_count(self, start=None, end=None, hours=None, districts=None, crime_type="All Crimes"):
+        """Count the incidents matching the filters."""
+        return self.dataset().count_rows(filter=self.incident_filter(start, end, hours, districts, crime_type))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python Parquet_Backend.py /path/to/crime_dashboard.db /path/to/crime_parquet")
+    export_parquet(sys.argv[1], sys.argv[2])
+    print(f"Exported {sys.argv[1]} to {sys.argv[2]}")
@@ -0,0 +1,322 @@
+"""
+In-process cache for Crime_API query results.
+
+The dashboard widgets keep asking for the same handful of aggregates, so every Crime_API instance
+in a server process shares one QueryCache. Entries are evicted least-recently-used once the cache
+grows past its memory budget, and expire after a time-to-live. The whole cache for a database is
+dropped as soon as that database file changes on disk.
+
+When the dashboard runs as several worker processes (CRIME_NUM_PROCS), each process has its own
+QueryCache, so a result computed by one worker would be computed again by every other. With
+CRIME_CACHE_PATH set, the in-process caches share a second level: a DiskCache, which is a small
+SQLite file every worker on the machine reads and writes. A miss in memory looks there before
+running the query, and every computed result is written there for the other workers.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from Crime_Config import CACHE_PATH
+
+
+def estimate_size(value):
+    """Rough size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+def copy_value(value):
+    """Copy a cached value so callers can modify what they get back without touching the cache."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return {name: copy_value(item) for name, item in value.items()}
+    return value
+
+
+class DiskCache:
+    """
+    A cache in a SQLite file, shared by every process that opens the same path.
+
+    Entries are stored with the data signature they were computed for, and a lookup only returns
+    an entry whose signature matches, so a worker never gets a result from before a data reload
+    even if another worker wrote it. Values are pickled: the file must only be writable by the
+    dashboard itself.
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024 * 1024, ttl=600.0, timeout=5.0):
+        """
+        Parameters:
+            path (str): The cache file (created if it does not exist).
+            max_bytes (int): Size budget for all stored values together.
+            ttl (float): Seconds an entry stays valid after it was stored.
+            timeout (float): Seconds to wait for another process's write to finish.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.timeout = timeout
+        self.errors = 0
+        self._local = threading.local()
+
+    def _connection(self):
+        """This thread's connection, opened on first use (and again after a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")  # losing the last write in a power cut is fine for a cache
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    KEY TEXT PRIMARY KEY,   -- Hash of the pickled cache key
+                    SIGNATURE TEXT,         -- Data signature the value was computed for
+                    EXPIRES_AT REAL,        -- Unix time the entry stops being valid
+                    SIZE INTEGER,           -- Bytes of VALUE
+                    VALUE BLOB              -- The pickled result
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (EXPIRES_AT)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def key_hash(key):
+        """Stable text key for a cache key tuple (the same in every process)."""
+        return hashlib.sha1(pickle.dumps(key, protocol=4)).hexdigest()
+
+    def get(self, key, signature, default=None):
+        """Return the value stored for key and signature, or default."""
+        try:
+            row = self._connection().execute(
+                "SELECT VALUE FROM cache_entries WHERE KEY = ? AND SIGNATURE = ? AND EXPIRES_AT > ?",
+                (self.key_hash(key), repr(signature), time.time())).fetchone()
+        except sqlite3.Error:
+            # The shared cache is only a shortcut: if it is locked or broken, run the query instead
+            self.errors += 1
+            return default
+        return default if row is None else pickle.loads(row[0])
+
+    def put(self, key, signature, value):
+        """Store value for key and signature, dropping expired and then the oldest entries if over budget."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                             (self.key_hash(key), repr(signature), time.time() + self.ttl, len(data), data))
+                conn.execute("DELETE FROM cache_entries WHERE EXPIRES_AT <= ?", (time.time(),))
+                total = conn.execute("SELECT COALESCE(SUM(SIZE), 0) FROM cache_entries").fetchone()[0]
+                if total > self.max_bytes:
+                    # Entries that expire first were stored first, so this drops the oldest
+                    conn.execute("""
+                        DELETE FROM cache_entries WHERE KEY IN (
+                            SELECT KEY FROM (
+                                SELECT KEY, SUM(SIZE) OVER (ORDER BY EXPIRES_AT DESC) AS kept FROM cache_entries
+                            ) WHERE kept > ?
+                        )
+                    """, (self.max_bytes,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self.errors += 1
+
+    def clear(self):
+        """Remove every entry (for every process)."""
+        self._connection().execute("DELETE FROM cache_entries")
+
+
+class QueryCache:
+    """A thread-safe LRU + TTL cache bounded by the memory its values use."""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=600.0, shared=None):
+        """
+        Parameters:
+            max_bytes (int): Memory budget for all cached values together.
+            ttl (float): Seconds an entry stays valid after it was stored.
+            shared (DiskCache, optional): Cache shared with other processes, checked on a miss.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.shared = shared
+        self.shared_hits = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._signatures = {}          # namespace -> last seen data signature
+        self._generations = {}         # namespace -> number of times its entries were dropped
+        self._pending = {}             # key -> Event set once the thread computing it is done
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return a copy of the cached value for key, or default on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy_value(value)
+
+    def put(self, key, value, generation=None):
+        """
+        Store value under key, evicting the least recently used entries if over budget.
+
+        With a generation (from _generation, taken before the value was computed) the value is
+        only stored if the namespace was not invalidated since, so a query that ran while the
+        database changed cannot put a pre-change result back.
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return  # would push everything else out, not worth caching
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key[0], 0):
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, calling compute() and caching its result on a miss.
+
+        If another thread is already computing the same key, wait for its result instead of
+        running the same query twice. This matters when several charts ask for one batched
+        result at the same moment.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            pending.wait()
+            value = self.get(key, missing)
+            if value is not missing:
+                return value
+            # The other thread failed (or its result was too big to cache), so compute it here
+            return copy_value(compute())
+
+        generation = self._generation(key[0])
+        try:
+            value = self._compute_shared(key, compute)
+            self.put(key, value, generation)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+        return copy_value(value)
+
+    def _generation(self, namespace):
+        """How many times namespace was invalidated so far."""
+        with self._lock:
+            return self._generations.get(namespace, 0)
+
+    def _compute_shared(self, key, compute):
+        """Take the value from the shared cache if another process already computed it, else compute and share it."""
+        with self._lock:
+            signature = self._signatures.get(key[0])
+        # Without a signature nothing would tell the other processes when the value goes stale
+        if self.shared is None or signature is None:
+            return compute()
+        missing = object()
+        value = self.shared.get(key, signature, missing)
+        if value is not missing:
+            with self._lock:
+                self.shared_hits += 1
+            return value
+        value = compute()
+        self.shared.put(key, signature, value)
+        return value
+
+    def check_signature(self, namespace, signature):
+        """
+        Drop every entry in namespace if its data signature changed since the last check.
+
+        Keys are expected to be tuples whose first item is the namespace (Crime_API uses the
+        database path), so one database reloading does not flush the others.
+        """
+        with self._lock:
+            previous = self._signatures.get(namespace)
+            self._signatures[namespace] = signature
+            if previous is None or previous == signature:
+                return
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in [key for key in self._entries if key[0] == namespace]:
+                self._remove(key)
+
+    def clear(self):
+        """Remove every entry, here and in the shared cache."""
+        with self._lock:
+            # Like check_signature: queries still running must not store their results afterwards
+            namespaces = {key[0] for key in self._entries} | {key[0] for key in self._pending}
+            for namespace in namespaces | set(self._generations) | set(self._signatures):
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            self._entries.clear()
+            self.current_bytes = 0
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        """Return the hit/miss counters and current usage as a dict."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "shared_hits": self.shared_hits,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+            }
+
+    def _remove(self, key):
+        """Drop one entry (the lock must already be held)."""
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+
+# One cache per server process, shared by every Panel session (and with CRIME_CACHE_PATH set,
+# backed by one DiskCache shared by every worker process)
+SHARED_CACHE = QueryCache(shared=DiskCache(CACHE_PATH) if CACHE_PATH else None)
@@ -0,0 +1,90 @@
+"""
+Read-only copy of the crime database for the dashboard to serve from.
+
+With the dashboard reading the same file Crime_ETL.py writes to, every worker process holds the
+database open during loads and sees its WAL file grow. Instead, CRIME_REPLICA_PATH points the
+dashboard at a copy: refresh_replica copies the primary with SQLite's online backup API (a
+consistent snapshot, taken while loads keep writing), switches the copy out of WAL mode so it is
+a single file that read-only connections can open without creating -wal/-shm files, and then
+os.replace()s it over the replica in one step.
+
+Readers never see a half-written copy. Connections opened on the old file keep reading it until
+they are returned to the pool; Crime_API notices the new file (its inode changes) and opens new
+connections and drops the cached results for it.
+
+Usage:
+    python Read_Replica.py /path/to/crime_dashboard.db /path/to/crime_replica.db
+    python Read_Replica.py /path/to/crime_dashboard.db /path/to/crime_replica.db --every 300
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+
+def primary_version(primary_path):
+    """Modification time and size of the primary and its WAL file, which change on every commit."""
+    version = []
+    for path in (primary_path, primary_path + "-wal"):
+        try:
+            info = os.stat(path)
+            version.append((info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+
+def refresh_replica(primary_path, replica_path):
+    """
+    Copy the primary database over the replica in one atomic step.
+
+    Parameters:
+        primary_path (str): The database Crime_ETL.py writes to.
+        replica_path (str): The copy the dashboard reads (CRIME_REPLICA_PATH).
+
+    Returns:
+        float: Seconds the copy took.
+    """
+    start = time.perf_counter()
+    # Written next to the replica, so os.replace is a rename on the same filesystem
+    building = replica_path + ".building"
+    if os.path.exists(building):
+        os.remove(building)
+
+    source = sqlite3.connect(f"file:{primary_path}?mode=ro", uri=True)
+    target = sqlite3.connect(building, isolation_level=None)
+    try:
+        # pages=0 copies everything in one step, so the copy is one consistent version of the
+        # primary; in WAL mode that only holds a read lock and loads carry on meanwhile
+        source.backup(target, pages=0)
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        source.close()
+        target.close()
+
+    os.replace(building, replica_path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("primary", help="Database written by Crime_ETL.py")
+    parser.add_argument("replica", help="Copy for the dashboard (CRIME_REPLICA_PATH)")
+    parser.add_argument("--every", type=float, help="Keep refreshing, every this many seconds")
+    args = parser.parse_args()
+
+    copied = None
+    while True:
+        version = primary_version(args.primary)
+        # Nothing was loaded since the last copy, so the replica is still current
+        if version != copied:
+            seconds = refresh_replica(args.primary, args.replica)
+            copied = version
+            print(f"Refreshed {args.replica} in {seconds:.1f} s")
+        if args.every is None:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Schema migration step for the crime dashboard database.
+
+create_database builds an empty database from scratch: Boston_Crime__Database.sql resets it and
+the migration steps below create everything else. migrate brings an existing database up to date
+without reloading it: it converts boston_crime to the normalized layout of
+Crime_Storage.py (with the covering indexes that the Crime_API queries rely on), and adds the
+offense_category_map table that Crime_ETL.py needs for incremental loads and the summary tables
+added after the first release. Every step checks what is already there, so it is safe to run
+again after each data load.
+
+Usage:
+    python Schema_Migration.py /path/to/crime_dashboard.db
+    python Schema_Migration.py --new /path/to/crime_dashboard.db
+"""
+import os
+import sqlite3
+import sys
+
+from Crime_Storage import normalize_incidents
+from Offense_Dictionary import create_offense_dictionary
+from Time_Cube import create_time_cube
+
+CATEGORY_MAP_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Crime_Category_Map.sql")
+DATABASE_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Boston_Crime__Database.sql")
+
+
+def run_sql_file(conn, path):
+    """
+    Execute every statement in a .sql file on conn.
+
+    Unlike executescript this does not commit first, so the file runs inside the caller's transaction.
+    """
+    statement = ""
+    with open(path) as f:
+        for line in f:
+            statement += line
+            if sqlite3.complete_statement(statement):
+                conn.execute(statement)
+                statement = ""
+
+
+def create_category_map(conn):
+    """Create or refresh offense_category_map from Crime_Category_Map.sql."""
+    run_sql_file(conn, CATEGORY_MAP_SQL)
+
+
+def table_exists(conn, name):
+    """Check whether a table exists in the main database."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def create_category_by_district_table(conn):
+    """Create and fill crime_category_by_district_year, the per-district input of the Sankey chart."""
+    if table_exists(conn, "crime_category_by_district_year"):
+        return
+    conn.execute("""
+        CREATE TABLE crime_category_by_district_year (
+            YEAR INTEGER,
+            DISTRICT TEXT,
+            CRIME_CATEGORY TEXT,
+            crime_count INTEGER DEFAULT 0,
+            PRIMARY KEY (YEAR, DISTRICT, CRIME_CATEGORY)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO crime_category_by_district_year (YEAR, DISTRICT, CRIME_CATEGORY, crime_count)
+        SELECT b.YEAR, b.DISTRICT, COALESCE(m.CRIME_CATEGORY, 'Uncategorized') AS CRIME_CATEGORY, COUNT(*)
+        FROM boston_crime b
+        LEFT JOIN offense_category_map m ON m.OFFENSE_DESCRIPTION = b.OFFENSE_DESCRIPTION
+        WHERE b.YEAR IS NOT NULL
+        GROUP BY b.YEAR, b.DISTRICT, CRIME_CATEGORY
+    """)
+
+
+# Steps run in this order, each one is idempotent
+MIGRATIONS = [
+    normalize_incidents,
+    create_category_map,
+    create_category_by_district_table,
+    create_time_cube,
+    create_offense_dictionary,
+]
+
+
+def migrate(db_path):
+    """
+    Apply every migration step to the database in a single transaction.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+    """
+    # isolation_level=None so we control the transaction ourselves and DDL is not auto-committed
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        # WAL lets the dashboard keep reading the last committed data while Crime_ETL.py writes
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for step in MIGRATIONS:
+                step(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        # Refresh the planner statistics so the new indexes actually get picked
+        conn.execute("ANALYZE")
+        # A step that replaced a big table (normalize_incidents on an old database) leaves its
+        # pages free inside the file; when that is over a quarter of it, give them back
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages * 4 > conn.execute("PRAGMA page_count").fetchone()[0]:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def create_database(db_path):
+    """
+    Create the full schema, with no incidents, in a new database (or reset an existing one).
+
+    Only the offense_category_map and the first two summary tables come from .sql files; the
+    migration steps create the rest, so a new database gets the same tables, indexes and triggers
+    as a migrated one.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        for path in (CATEGORY_MAP_SQL, DATABASE_SQL):
+            with open(path) as f:
+                conn.executescript(f.read())
+    finally:
+        conn.close()
+    migrate(db_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--new":
+        create_database(sys.argv[2])
+        print(f"Created {sys.argv[2]}")
+    elif len(sys.argv) == 2:
+        migrate(sys.argv[1])
+        print(f"Migrated {sys.argv[1]}")
+    else:
+        sys.exit("Usage: python Schema_Migration.py [--new] /path/to/crime_dashboard.db")
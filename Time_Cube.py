@@ -0,0 +1,233 @@
+"""
+Pre-aggregated incident counts for the time-based charts.
+
+The monthly trend, day-of-week and district charts all ask the same question for different slices:
+how many incidents per year x month x day of week x hour x district x crime category. The
+crime_time_cube table stores that count for every combination that occurs, and Crime_ETL adds new
+incidents onto it like the other summary tables.
+
+Crime_API reads the table once per data version into a TimeCube, a dense NumPy array with one axis
+per dimension, and answers every time chart by indexing and summing it. For eleven years of
+Boston data that is under 5M int32 cells (about 19 MB), and any filter combination is a sum over
+the array instead of a scan of boston_crime. Reading the table takes a few seconds for millions of
+incidents, but it happens once per data load instead of once per chart and filter.
+
+Usage:
+    python Time_Cube.py /path/to/crime_dashboard.db
+"""
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ["YEAR", "MONTH", "DOW", "HOUR", "DISTRICT", "CRIME_CATEGORY"]
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Day of week as a number, 0 = Monday, NULL when the text is not a weekday
+DOW_SQL = "CASE LOWER(TRIM(DAY_OF_WEEK)) " + " ".join(
+    f"WHEN '{day}' THEN {number}" for number, day in enumerate(WEEKDAYS)
+) + " END"
+
+CREATE_CUBE_TABLE = """
+    CREATE TABLE IF NOT EXISTS crime_time_cube (
+        YEAR INTEGER,               -- Year of occurrence
+        MONTH INTEGER,              -- Month of occurrence (1-12)
+        DOW INTEGER,                -- Day of week, 0 = Monday
+        HOUR INTEGER,               -- Hour of occurrence (0-23)
+        DISTRICT TEXT,              -- Police district
+        CRIME_CATEGORY TEXT,        -- Crime category from offense_category_map
+        crime_count INTEGER,        -- Incidents with exactly these values
+        PRIMARY KEY (YEAR, MONTH, DOW, HOUR, DISTRICT, CRIME_CATEGORY)
+    )
+"""
+
+
+def cube_select_sql(source):
+    """
+    Build a SELECT that counts the rows of source per cube cell.
+
+    Parameters:
+        source (str): Table to read incidents from (boston_crime or the ETL staging table).
+
+    Returns:
+        str: A query whose columns match crime_time_cube.
+    """
+    return f"""
+        SELECT s.YEAR, s.MONTH, {DOW_SQL} AS DOW, s.HOUR, s.DISTRICT,
+               COALESCE(m.CRIME_CATEGORY, 'Uncategorized') AS CRIME_CATEGORY, COUNT(*) AS crime_count
+        FROM {source} s
+        LEFT JOIN offense_category_map m ON m.OFFENSE_DESCRIPTION = s.OFFENSE_DESCRIPTION
+        WHERE s.YEAR IS NOT NULL
+        GROUP BY s.YEAR, s.MONTH, DOW, s.HOUR, s.DISTRICT, CRIME_CATEGORY
+    """
+
+
+# Registered in Crime_ETL.SUMMARY_TABLES so loads keep the cube current
+CUBE_SUMMARY = {
+    "table": "crime_time_cube",
+    "keys": CUBE_DIMENSIONS,
+    "values": ["crime_count"],
+    "delta": cube_select_sql("staged_crime"),
+}
+
+
+def create_time_cube(conn):
+    """Create and fill crime_time_cube from boston_crime if it does not exist (inside the caller's transaction)."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crime_time_cube'").fetchone()
+    if exists:
+        return
+    conn.execute(CREATE_CUBE_TABLE)
+    conn.execute(f"INSERT INTO crime_time_cube {cube_select_sql('boston_crime')}")
+
+
+def build_time_cube(db_path):
+    """
+    Rebuild crime_time_cube from the full boston_crime table in one transaction.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DROP TABLE IF EXISTS crime_time_cube")
+            create_time_cube(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+
+class TimeCube:
+    """
+    Dense incident counts with one axis per dimension in CUBE_DIMENSIONS.
+
+    Each axis has a label per position; MONTH, DOW, HOUR and DISTRICT have a last position labelled
+    None for incidents where that value is missing, so totals still match boston_crime.
+    """
+
+    def __init__(self, labels, counts):
+        """
+        Parameters:
+            labels (dict): Dimension -> list of labels, one per position on its axis.
+            counts (np.ndarray): Counts, axes in CUBE_DIMENSIONS order.
+        """
+        self.labels = labels
+        self.counts = counts
+        self.positions = {dim: {label: i for i, label in enumerate(labels[dim])} for dim in CUBE_DIMENSIONS}
+
+    @classmethod
+    def empty(cls, years, districts, categories):
+        """
+        A cube of zeros with the given labels (the other axes are fixed).
+
+        Parameters:
+            years (list): Years, ascending.
+            districts (list): Districts, sorted (the missing-district position is added here).
+            categories (list): Crime categories, sorted.
+        """
+        labels = {
+            "YEAR": list(years),
+            "MONTH": list(range(1, 13)) + [None],
+            "DOW": WEEKDAYS + [None],
+            "HOUR": list(range(24)) + [None],
+            "DISTRICT": list(districts) + [None],
+            "CRIME_CATEGORY": list(categories),
+        }
+        return cls(labels, np.zeros([len(labels[dim]) for dim in CUBE_DIMENSIONS], dtype=np.int32))
+
+    def add(self, df):
+        """
+        Add crime_time_cube rows onto the cube.
+
+        Parameters:
+            df (pd.DataFrame): Rows with the CUBE_DIMENSIONS columns plus crime_count; their years,
+                               districts and categories must be among the cube's labels.
+        """
+        def numeric_axis(column, first, size):
+            # Values outside the axis (and NULL) go to the "missing" position at the end
+            values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+            index = values - first
+            valid = (index >= 0) & (index < size) & (index == np.floor(index))
+            return np.where(valid, np.nan_to_num(index), size).astype(np.intp)
+
+        def text_axis(column, labels):
+            index = pd.Categorical(df[column], categories=labels).codes.astype(np.intp)
+            return np.where(index < 0, len(labels), index)
+
+        index = (
+            np.searchsorted(self.labels["YEAR"], df["YEAR"].to_numpy(dtype=np.int64)),
+            numeric_axis("MONTH", 1, 12),
+            numeric_axis("DOW", 0, 7),
+            numeric_axis("HOUR", 0, 24),
+            text_axis("DISTRICT", self.labels["DISTRICT"][:-1]),
+            text_axis("CRIME_CATEGORY", self.labels["CRIME_CATEGORY"]),
+        )
+        # add.at sums cells that map to the same position (e.g. two invalid months)
+        np.add.at(self.counts, index, df["crime_count"].to_numpy(dtype=np.int32))
+
+    def total(self, by, **filters):
+        """
+        Sum the incidents per combination of the `by` dimensions, optionally filtered.
+
+        Parameters:
+            by (list): Dimensions to group by, e.g. ["YEAR", "MONTH"].
+            **filters: Dimension=value to keep only one value of it, e.g. YEAR=2024,
+                       CRIME_CATEGORY="Larceny". A value the cube does not have gives an empty result.
+
+        Returns:
+            pd.DataFrame: The `by` columns and crime_count, for combinations with at least one
+                          incident, in axis order (years ascending, months Jan-Dec, ...).
+        """
+        index = []
+        for dim in CUBE_DIMENSIONS:
+            if dim in filters:
+                position = self.positions[dim].get(filters[dim])
+                if position is None:
+                    return pd.DataFrame(columns=list(by) + ["crime_count"])
+                # A length-1 slice keeps the axis, so axis numbers stay the same below
+                index.append(slice(position, position + 1))
+            else:
+                index.append(slice(None))
+        block = self.counts[tuple(index)]
+
+        group_axes = [CUBE_DIMENSIONS.index(dim) for dim in by]
+        summed_axes = tuple(axis for axis in range(len(CUBE_DIMENSIONS)) if axis not in group_axes)
+        # int64 so sums over many cells cannot overflow; transpose puts the axes in `by` order
+        totals = block.sum(axis=summed_axes, dtype=np.int64).transpose(np.argsort(np.argsort(group_axes)))
+
+        cells = np.nonzero(totals)
+        df = pd.DataFrame({dim: pd.Series(np.array(self.labels[dim], dtype=object)[cell]).infer_objects()
+                           for dim, cell in zip(by, cells)})
+        df["crime_count"] = totals[cells]
+        return df
+
+
+def load_time_cube(conn, chunk_rows=20_000):
+    """
+    Read crime_time_cube into a TimeCube.
+
+    The rows are read and added in chunks, so memory stays near the size of the dense array
+    instead of holding the whole table as a DataFrame first.
+    """
+    def distinct(column):
+        query = f"SELECT DISTINCT {column} FROM crime_time_cube WHERE {column} IS NOT NULL ORDER BY {column}"
+        return [row[0] for row in conn.execute(query)]
+
+    cube = TimeCube.empty(distinct("YEAR"), distinct("DISTRICT"), distinct("CRIME_CATEGORY"))
+    query = f"SELECT {', '.join(CUBE_DIMENSIONS)}, crime_count FROM crime_time_cube"
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunk_rows):
+        cube.add(chunk)
+    return cube
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python Time_Cube.py /path/to/crime_dashboard.db")
+    build_time_cube(sys.argv[1])
+    print("Built the time cube")
@@ -0,0 +1,132 @@
+"""
+Benchmark for Parquet_Backend.py: builds databases of growing size, exports each to Parquet, and
+times every dashboard fetch on both backends with the query cache turned off. The results of the
+two backends are compared too, so a speed-up never hides a wrong answer.
+
+Usage (from the repository root):
+    python -m benchmarks.backend_benchmark --rows 250000 1000000 3000000 --out benchmarks/results/backend_benchmark.md
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+from CRIME_API import Crime_API
+from Crime_ETL import apply_staged, create_staging_table
+from Parquet_Backend import Parquet_Crime_API, export_parquet
+from Schema_Migration import create_database
+from benchmarks.index_benchmark import OFFENSES, fill_incidents
+
+# Each entry is (label, method name, args)
+CALLS = [
+    ("fetch_boston_top_crimes", "fetch_boston_top_crimes", (2022,)),
+    ("fetch_top_districts", "fetch_top_districts", (2022,)),
+    ("fetch_crime_by_day_of_week", "fetch_crime_by_day_of_week", (2022,)),
+    ("fetch_year_overview", "fetch_year_overview", (2022,)),
+    ("fetch_crime_by_month_all_years", "fetch_crime_by_month_all_years", ()),
+    ("fetch_crime_locations (one offense)", "fetch_crime_locations", (2022, OFFENSES[3])),
+    ("fetch_crime_density (all crimes)", "fetch_crime_density", (2022,)),
+    ("fetch_sankey_data", "fetch_sankey_data", ()),
+    ("get_unique_crime_types", "get_unique_crime_types", ()),
+]
+
+
+def build_database(db_path, rows):
+    """Create the full schema with Schema_Migration.create_database and load `rows` synthetic incidents."""
+    create_database(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    # Loading through the ETL fills the summary tables the same way a real load does
+    conn.execute("BEGIN")
+    create_staging_table(conn)
+    fill_incidents(conn, "staged_crime", rows)
+    apply_staged(conn)
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def time_call(api, method, args, repeat=3):
+    """Best-of-`repeat` wall time of one uncached fetch, and its result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = getattr(api, method)(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def same_result(a, b):
+    """
+    True when two fetch results hold the same values (row order and dtypes aside).
+
+    Top-N lists may cut a tie at a different row on each backend, so for those the counts must
+    match and the labels only have to agree above the cut-off count.
+    """
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same_result(a[key], b[key]) for key in a)
+    if not isinstance(a, pd.DataFrame):
+        return sorted(map(str, a)) == sorted(map(str, b))
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    # Averages summed in a different order differ in the last bits, which would change the sort
+    key = list(a.columns)
+    a = a.round(9).sort_values(key).reset_index(drop=True)
+    b = b.round(9).sort_values(key).reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(a, b, check_dtype=False)
+        return True
+    except AssertionError:
+        pass
+    if "crime_count" not in key:
+        return False
+    if sorted(a["crime_count"]) != sorted(b["crime_count"]):
+        return False
+    cutoff = a["crime_count"].min()
+    above_a = a[a["crime_count"] > cutoff].astype(str).sort_values(key).reset_index(drop=True)
+    above_b = b[b["crime_count"] > cutoff].astype(str).sort_values(key).reset_index(drop=True)
+    return above_a.equals(above_b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[250_000, 1_000_000, 3_000_000])
+    parser.add_argument("--out", help="Optional markdown file to write the results to")
+    args = parser.parse_args()
+
+    lines = [f"# SQLite vs Parquet backend (SQLite {sqlite3.sqlite_version}, cache off)", ""]
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            build_database(db_path, rows)
+            start = time.perf_counter()
+            export_parquet(db_path, os.path.join(tmp, "parquet"))
+            export_seconds = time.perf_counter() - start
+
+            sqlite_api = Crime_API(db_path, cache=None)
+            parquet_api = Parquet_Crime_API(os.path.join(tmp, "parquet"), cache=None)
+            lines += [f"## {rows:,} rows", "", f"export_parquet took {export_seconds:.1f} s.", "",
+                      "| Query | SQLite (ms) | Parquet (ms) | Speed-up | Same result |",
+                      "| --- | ---: | ---: | ---: | :---: |"]
+            for label, method, call_args in CALLS:
+                t_sqlite, r_sqlite = time_call(sqlite_api, method, call_args)
+                t_parquet, r_parquet = time_call(parquet_api, method, call_args)
+                same = "yes" if same_result(r_sqlite, r_parquet) else "NO"
+                lines.append(f"| {label} | {t_sqlite * 1000:.1f} | {t_parquet * 1000:.1f} | "
+                             f"{t_sqlite / t_parquet:.1f}x | {same} |")
+            lines.append("")
+            sqlite_api.close()
+            parquet_api.close()
+            print(f"finished {rows:,} rows")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
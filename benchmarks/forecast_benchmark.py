@@ -0,0 +1,104 @@
+"""
+Benchmark for Hotspot_Forecast.py: builds a large synthetic database, times the full forecast
+build, then loads one new week of incidents through Crime_ETL (which updates the features and the
+model incrementally) and times scoring the forecast week for every cell.
+
+The incremental result is checked against a full rebuild of the same data.
+
+Usage (from the repository root):
+    python -m benchmarks.forecast_benchmark --rows 3000000 --out benchmarks/results/forecast_benchmark.md
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from CRIME_API import Crime_API
+from Crime_ETL import ingest
+from Hotspot_Forecast import EPOCH_MONDAY, build_forecast, load_model
+from benchmarks.backend_benchmark import build_database
+from benchmarks.index_benchmark import DISTRICTS, OFFENSES
+
+
+def new_week_incidents(week, count, seed=0):
+    """`count` random incidents dated in `week`, as tuples in Crime_ETL.INCIDENT_COLUMNS order."""
+    rng = np.random.default_rng(seed)
+    monday = EPOCH_MONDAY + datetime.timedelta(weeks=week)
+    rows = []
+    for i in range(count):
+        day = monday + datetime.timedelta(days=int(rng.integers(7)))
+        hour = int(rng.integers(24))
+        rows.append((
+            f"NEW{i}", 100, None, OFFENSES[i % len(OFFENSES)], DISTRICTS[i % len(DISTRICTS)], None, None,
+            f"{day.isoformat()} {hour:02d}:00:00", day.year, day.month, day.strftime("%A"), hour, None, None,
+            float(rng.uniform(42.23, 42.40)), float(rng.uniform(-71.18, -71.0)), None,
+        ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--new", type=int, default=2_000, help="Incidents in the new week")
+    parser.add_argument("--out", help="Optional markdown file to write the results to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        build_database(db_path, args.rows)
+
+        start = time.perf_counter()
+        build_forecast(db_path)
+        build_seconds = time.perf_counter() - start
+
+        conn = sqlite3.connect(db_path)
+        state = load_model(conn)
+        feature_rows = conn.execute("SELECT COUNT(*) FROM crime_forecast_features").fetchone()[0]
+        cells = conn.execute("SELECT COUNT(*) FROM (SELECT DISTINCT CELL_Y, CELL_X FROM crime_cell_week_counts)").fetchone()[0]
+        conn.close()
+
+        # One more week of data: the old forecast week becomes a training week
+        new_week = state["next_week"]
+        start = time.perf_counter()
+        ingest(db_path, [new_week_incidents(new_week, args.new)])
+        ingest_seconds = time.perf_counter() - start
+
+        conn = sqlite3.connect(db_path)
+        incremental = load_model(conn)
+        conn.close()
+        build_forecast(db_path)
+        conn = sqlite3.connect(db_path)
+        rebuilt = load_model(conn)
+        conn.close()
+        same = np.allclose(incremental["xtx"], rebuilt["xtx"]) and np.allclose(incremental["weights"], rebuilt["weights"])
+
+        api = Crime_API(db_path, cache=None)
+        year, week, _ = (EPOCH_MONDAY + datetime.timedelta(weeks=rebuilt["next_week"])).isocalendar()
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            forecast = api.fetch_forecast(year, week)
+            timings.append(time.perf_counter() - start)
+        api.close()
+
+    lines = [f"# Forecast benchmark ({args.rows:,} incidents, SQLite {sqlite3.sqlite_version})", "",
+             f"{cells:,} cells, {feature_rows:,} feature rows.", "",
+             "| Step | Time |", "| --- | ---: |",
+             f"| build_forecast (full build) | {build_seconds:.1f} s |",
+             f"| Crime_ETL.ingest of {args.new:,} incidents in a new week, incl. incremental update | "
+             f"{ingest_seconds:.2f} s |",
+             f"| fetch_forecast({year}, {week}), {len(forecast):,} cells, best of 5 | {min(timings) * 1000:.1f} ms |",
+             "", f"Incremental model equals a full rebuild: {'yes' if same else 'NO'}"]
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
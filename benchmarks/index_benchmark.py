@@ -0,0 +1,154 @@
+"""
+Benchmark for Schema_Migration.py: builds a multi-million-row boston_crime table with the old
+schema, times the dashboard's hot queries and prints their query plans, then migrates the table
+and runs the same queries again.
+
+Usage (from the repository root):
+    python -m benchmarks.index_benchmark --rows 3000000 --out benchmarks/results/index_benchmark.md
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from Schema_Migration import migrate
+
+# The boston_crime table as it looked before the migration (no OFFENSE_LOWER, no indexes)
+LEGACY_TABLE = """
+    CREATE TABLE boston_crime (
+        INCIDENT_NUMBER TEXT PRIMARY KEY, OFFENSE_CODE INTEGER, OFFENSE_CODE_GROUP TEXT,
+        OFFENSE_DESCRIPTION TEXT, DISTRICT TEXT, REPORTING_AREA TEXT, SHOOTING TEXT,
+        OCCURRED_ON_DATE TEXT, YEAR INTEGER, MONTH INTEGER, DAY_OF_WEEK TEXT, HOUR INTEGER,
+        UCR_PART TEXT, STREET TEXT, Lat REAL, Long REAL, Location TEXT
+    )
+"""
+
+OFFENSES = ["INVESTIGATE PERSON", "M/V - LEAVING SCENE - PROPERTY DAMAGE", "SICK/INJURED/MEDICAL - PERSON",
+            "VANDALISM", "INVESTIGATE PROPERTY", "TOWED MOTOR VEHICLE", "VERBAL DISPUTE", "PROPERTY - LOST",
+            "ASSAULT - SIMPLE", "LARCENY SHOPLIFTING", "LARCENY THEFT FROM BUILDING", "FRAUD - WIRE",
+            "AUTO THEFT", "ROBBERY", "BURGLARY - RESIDENTIAL", "DRUGS - POSSESSION/ SALE/ MANUFACTURING/ USE"]
+DISTRICTS = ["A1", "A15", "A7", "B2", "B3", "C6", "C11", "D4", "D14", "E5", "E13", "E18"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Each entry is (label, query before the migration, query after the migration, params)
+QUERIES = [
+    ("fetch_boston_top_crimes",
+     "SELECT LOWER(OFFENSE_DESCRIPTION) AS Crime, COUNT(*) AS crime_count FROM boston_crime "
+     "WHERE YEAR = ? GROUP BY Crime ORDER BY crime_count DESC LIMIT 10",
+     "SELECT OFFENSE_LOWER AS Crime, COUNT(*) AS crime_count FROM boston_crime "
+     "WHERE YEAR = ? GROUP BY Crime ORDER BY crime_count DESC LIMIT 10",
+     (2022,)),
+    ("fetch_crime_locations (all crimes)",
+     "SELECT Lat, Long FROM boston_crime WHERE YEAR = ? AND Lat IS NOT NULL AND Long IS NOT NULL",
+     "SELECT Lat, Long FROM boston_crime WHERE YEAR = ? AND Lat IS NOT NULL AND Long IS NOT NULL",
+     (2022,)),
+    ("fetch_crime_locations (one offense)",
+     "SELECT Lat, Long FROM boston_crime WHERE YEAR = ? AND Lat IS NOT NULL AND Long IS NOT NULL "
+     "AND LOWER(OFFENSE_DESCRIPTION) = LOWER(?)",
+     "SELECT Lat, Long FROM boston_crime WHERE YEAR = ? AND Lat IS NOT NULL AND Long IS NOT NULL "
+     "AND OFFENSE_LOWER = LOWER(?)",
+     (2022, "vandalism")),
+    ("district counts",
+     "SELECT DISTRICT, COUNT(*) FROM boston_crime WHERE YEAR = ? GROUP BY DISTRICT",
+     "SELECT DISTRICT, COUNT(*) FROM boston_crime WHERE YEAR = ? GROUP BY DISTRICT",
+     (2022,)),
+]
+
+
+def fill_incidents(conn, table, rows):
+    """
+    Insert `rows` deterministic pseudo-random incidents into table (boston_crime or a staging table).
+
+    Multiplicative hashing of the row number stands in for random() so every run builds the same data.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS offenses (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS districts (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS days (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT OR REPLACE INTO offenses VALUES (?, ?)", enumerate(OFFENSES))
+    conn.executemany("INSERT OR REPLACE INTO districts VALUES (?, ?)", enumerate(DISTRICTS))
+    conn.executemany("INSERT OR REPLACE INTO days VALUES (?, ?)", enumerate(DAYS))
+    conn.execute(f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT INTO {table} (
+            INCIDENT_NUMBER, OFFENSE_CODE, OFFENSE_CODE_GROUP, OFFENSE_DESCRIPTION, DISTRICT,
+            REPORTING_AREA, SHOOTING, OCCURRED_ON_DATE, YEAR, MONTH, DAY_OF_WEEK, HOUR,
+            UCR_PART, STREET, Lat, Long, Location
+        )
+        SELECT
+            'I' || i, 100 + i % 3000, NULL,
+            (SELECT name FROM offenses WHERE id = (i * 2654435761) % {len(OFFENSES)}),
+            (SELECT name FROM districts WHERE id = (i * 40503) % {len(DISTRICTS)}),
+            NULL, NULL,
+            printf('%04d-%02d-%02d %02d:00:00', 2015 + i % 11, 1 + (i * 7) % 12, 1 + (i * 11) % 28, (i * 17) % 24),
+            2015 + i % 11, 1 + (i * 7) % 12,
+            (SELECT name FROM days WHERE id = (i * 13) % 7),
+            (i * 17) % 24, NULL, NULL,
+            42.23 + ((i * 2246822519) % 17000) / 100000.0,
+            -71.18 + ((i * 3266489917) % 18000) / 100000.0,
+            NULL
+        FROM n
+    """, (rows,))
+
+
+def build_legacy_table(db_path, rows):
+    """Fill a legacy boston_crime table with deterministic pseudo-random incidents."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(LEGACY_TABLE)
+    fill_incidents(conn, "boston_crime", rows)
+    conn.commit()
+    conn.close()
+
+
+def run_queries(db_path, use_migrated_sql):
+    """Time each query (best of three) and collect its query plan."""
+    conn = sqlite3.connect(db_path)
+    results = []
+    for label, before_sql, after_sql, params in QUERIES:
+        sql = after_sql if use_migrated_sql else before_sql
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            timings.append(time.perf_counter() - start)
+        results.append((label, min(timings), plan))
+    conn.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--out", help="Optional markdown file to write the results to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        build_legacy_table(db_path, args.rows)
+        before = run_queries(db_path, use_migrated_sql=False)
+
+        start = time.perf_counter()
+        migrate(db_path)
+        migrate_seconds = time.perf_counter() - start
+        after = run_queries(db_path, use_migrated_sql=True)
+
+    lines = [f"# Index benchmark ({args.rows:,} rows, SQLite {sqlite3.sqlite_version})", "",
+             f"Schema_Migration.migrate took {migrate_seconds:.1f} s.", "",
+             "| Query | Before (ms) | After (ms) | Speed-up |", "| --- | ---: | ---: | ---: |"]
+    for (label, t_before, _), (_, t_after, _) in zip(before, after):
+        lines.append(f"| {label} | {t_before * 1000:.1f} | {t_after * 1000:.1f} | {t_before / t_after:.1f}x |")
+    lines += ["", "## Query plans", ""]
+    for (label, _, plan_before), (_, _, plan_after) in zip(before, after):
+        lines += [f"**{label}**", "", "```", "before: " + " / ".join(plan_before),
+                  "after:  " + " / ".join(plan_after), "```", ""]
+
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
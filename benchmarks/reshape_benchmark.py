@@ -0,0 +1,134 @@
+"""
+Micro-benchmarks for the DataFrame reshaping done on every dashboard render: filling in missing
+weekdays (CRIME_API.complete_weekdays), encoding Sankey labels (Making_Sankey.code_mapping) and
+preparing the line chart's counts (Line_chart_temp.integer_counts). Each is timed against the
+loop/replace version it replaced, at today's input size and at 10x and 100x.
+
+Usage (from the repository root):
+    python -m benchmarks.reshape_benchmark --out benchmarks/results/reshape_benchmark.md
+"""
+import argparse
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from CRIME_API import WEEKDAYS, complete_weekdays
+from Line_chart_temp import integer_counts
+from Making_Sankey import code_mapping
+
+SCALES = [1, 10, 100]
+
+# Input sizes today: the day-of-week query returns up to 7 rows, the Sankey table has the top 5
+# crimes for ~13 districts over 6 years, and the monthly line chart has 12 months for 11 years.
+WEEKDAY_ROWS = 7
+SANKEY_YEARS, SANKEY_DISTRICTS, SANKEY_CRIMES = 6, 13, 5
+LINE_ROWS = 12 * 11
+
+
+def legacy_complete_weekdays(df):
+    """complete_weekdays as it was, filling a dict row by row with iterrows."""
+    crime_dict = {day: 0 for day in WEEKDAYS}
+    for _, row in df.iterrows():
+        crime_dict[row["DAY_OF_WEEK"].strip().lower()] = row["crime_count"]
+    final_df = pd.DataFrame(list(crime_dict.items()), columns=["DAY_OF_WEEK", "crime_count"])
+    final_df["DAY_OF_WEEK"] = pd.Categorical(final_df["DAY_OF_WEEK"], categories=WEEKDAYS, ordered=True)
+    return final_df.sort_values("DAY_OF_WEEK")
+
+
+def legacy_code_mapping(df, src, targ):
+    """code_mapping as it was, encoding with DataFrame.replace over a label dict."""
+    labels = list(set(df[src]).union(set(df[targ])))
+    lc_map = {label: i for i, label in enumerate(labels)}
+    df = df.replace({src: lc_map, targ: lc_map})
+    return df, labels
+
+
+def legacy_integer_counts(df, y_col):
+    """The old line chart preparation: a full to_numeric coercion written back into the caller's frame."""
+    df[y_col] = pd.to_numeric(df[y_col], errors="coerce").fillna(0).astype(int)
+    return df[y_col]
+
+
+def weekday_input(scale, rng):
+    """Day-of-week rows as a per-district breakdown would return them, `scale` times today's rows."""
+    days = rng.choice([" Monday", "tuesday", "WEDNESDAY", "Thursday ", "friday", "Saturday", "sunday"],
+                      WEEKDAY_ROWS * scale)
+    return pd.DataFrame({"DAY_OF_WEEK": days, "crime_count": rng.integers(0, 5000, len(days))})
+
+
+def sankey_input(scale, rng):
+    """A Year -> District -> Crime table with `scale` times today's districts and crimes."""
+    rows = SANKEY_YEARS * SANKEY_DISTRICTS * SANKEY_CRIMES * scale
+    return pd.DataFrame({
+        "Source": rng.choice([f"District {i}" for i in range(SANKEY_DISTRICTS * scale)], rows),
+        "Target": rng.choice([f"crime {i}" for i in range(SANKEY_CRIMES * 4 * scale)], rows),
+        "Values": rng.integers(1, 500, rows),
+    })
+
+
+def line_input(scale, rng):
+    """Monthly counts for `scale` times today's rows."""
+    rows = LINE_ROWS * scale
+    return pd.DataFrame({"MONTH": np.arange(rows), "crime_count": rng.integers(0, 5000, rows)})
+
+
+def best_time(func, number):
+    """Best per-call time in milliseconds over five rounds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1000
+
+
+def check_results(rng):
+    """Make sure the new versions give the same answers as the old ones on today's inputs."""
+    weekdays = weekday_input(1, rng).drop_duplicates("DAY_OF_WEEK")
+    pd.testing.assert_frame_equal(complete_weekdays(weekdays), legacy_complete_weekdays(weekdays))
+
+    sankey = sankey_input(1, rng)
+    new, new_labels = code_mapping(sankey, "Source", "Target")
+    old, old_labels = legacy_code_mapping(sankey, "Source", "Target")
+    for column in ("Source", "Target"):
+        assert [new_labels[code] for code in new[column]] == [old_labels[code] for code in old[column]]
+
+    line = line_input(1, rng)
+    assert integer_counts(line["crime_count"]).equals(legacy_integer_counts(line.copy(), "crime_count"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", help="Optional markdown file to write the results to")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    check_results(rng)
+
+    lines = [f"# Reshaping micro-benchmarks (pandas {pd.__version__})", "",
+             "| Function | Scale | Input rows | Before (ms) | After (ms) | Speed-up |",
+             "| --- | ---: | ---: | ---: | ---: | ---: |"]
+    for scale in SCALES:
+        number = max(1, 200 // scale)
+        weekdays, sankey, line = weekday_input(scale, rng), sankey_input(scale, rng), line_input(scale, rng)
+        cases = [
+            ("complete_weekdays", len(weekdays),
+             lambda: legacy_complete_weekdays(weekdays), lambda: complete_weekdays(weekdays)),
+            ("code_mapping", len(sankey),
+             lambda: legacy_code_mapping(sankey, "Source", "Target"),
+             lambda: code_mapping(sankey, "Source", "Target")),
+            # The old version converted in place, so it gets a fresh frame each call like it did per render
+            ("line chart counts", len(line),
+             lambda: legacy_integer_counts(line.copy(deep=False), "crime_count"),
+             lambda: integer_counts(line["crime_count"])),
+        ]
+        for label, rows, before, after in cases:
+            t_before, t_after = best_time(before, number), best_time(after, number)
+            lines.append(f"| {label} | {scale}x | {rows:,} | {t_before:.3f} | {t_after:.3f} | "
+                         f"{t_before / t_after:.1f}x |")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Regression benchmark: times every Crime_API fetch method and every chart template on a synthetic
+database (benchmarks/synthetic_data.py) and compares the times with benchmarks/baseline.json.
+
+Every fetch_*, get_unique_* and search_* method of Crime_API must have an entry in FETCH_CASES, so
+a new fetch method can't slip in without being measured. The cache is off, so every call hits SQLite.
+The templates are timed on the fetched data, with the arguments the dashboard uses.
+
+A case is a regression when its median is more than --tolerance slower than the baseline (and at
+least NOISE_MS slower, so sub-millisecond jitter doesn't count). The script exits with status 1
+when there is a regression, so it can gate CI. Baselines are only comparable on the same machine
+and row count: after an intended change, or on a new machine, rerun with --update-baseline.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks --rows 1000000
+    python -m benchmarks.run_benchmarks --db /tmp/synthetic.db --update-baseline
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from Barchart_Temp import create_bar_chart
+from CRIME_API import Crime_API
+from Heatmap_Template import create_heatmap
+from Heatmap_Tiles import build_tiles
+from Hotspot_Clustering import train_hotspots
+from Hotspot_Forecast import build_forecast
+from Line_chart_temp import create_line_chart
+from Making_Sankey import make_sankey
+from benchmarks.synthetic_data import generate_database
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Differences below this many milliseconds are noise, never a regression
+NOISE_MS = 2.0
+
+YEAR = 2024
+CATEGORY = "Theft & Burglary"
+OFFENSE = "Investigate Person"
+
+# Case name: (Crime_API method, positional arguments, keyword arguments)
+FETCH_CASES = {
+    "fetch_boston_top_crimes": ("fetch_boston_top_crimes", (YEAR,), {}),
+    "fetch_boston_top_crimes (all years)": ("fetch_boston_top_crimes", (), {}),
+    "fetch_top_districts": ("fetch_top_districts", (YEAR,), {}),
+    "fetch_crime_by_day_of_week": ("fetch_crime_by_day_of_week", (YEAR,), {}),
+    "fetch_year_overview": ("fetch_year_overview", (YEAR,), {}),
+    "fetch_crime_by_month_all_years": ("fetch_crime_by_month_all_years", (), {}),
+    "fetch_crime_category_proportions": ("fetch_crime_category_proportions", (CATEGORY,), {}),
+    "fetch_crime_locations": ("fetch_crime_locations", (YEAR,), {}),
+    "fetch_crime_locations (one offense)": ("fetch_crime_locations", (YEAR, OFFENSE), {}),
+    "fetch_crime_density": ("fetch_crime_density", (YEAR,), {}),
+    "fetch_crime_density (one offense)": ("fetch_crime_density", (YEAR, OFFENSE), {}),
+    # A cell size with no tiles, so the cells are binned from boston_crime
+    "fetch_crime_density (untiled)": ("fetch_crime_density", (YEAR,), {"cell_pixels": 40}),
+    "fetch_hotspots": ("fetch_hotspots", ("grid",), {}),
+    "fetch_forecast": ("fetch_forecast", (YEAR, 20), {}),
+    "fetch_sankey_data": ("fetch_sankey_data", (), {}),
+    "fetch_crime_category_trends": ("fetch_crime_category_trends", (CATEGORY,), {}),
+    "get_unique_crime_categories": ("get_unique_crime_categories", (), {}),
+    "get_unique_crime_types": ("get_unique_crime_types", (), {}),
+    "fetch_offense_counts": ("fetch_offense_counts", (50,), {}),
+    "search_crime_types": ("search_crime_types", ("larceny",), {}),
+    # Two letters are too short for the trigram index, so this one filters the dictionary
+    "search_crime_types (short)": ("search_crime_types", ("mv",), {}),
+    "get_unique_districts": ("get_unique_districts", (), {}),
+    "fetch_incidents": ("fetch_incidents", (), {"start": "2024-03-01", "end": "2024-04-01"}),
+    # A cursor deep into the results, which OFFSET paging would have to count its way up to
+    "fetch_incidents (deep page)": ("fetch_incidents", (), {"after": (1_700_000_000, "")}),
+    "fetch_incidents (district, hours)": ("fetch_incidents", (), {
+        "start": "2023-01-01", "end": "2024-01-01", "districts": ["B2", "C11"], "hours": (22, 4)}),
+    "fetch_incident_count": ("fetch_incident_count", (), {"start": "2024-01-01", "end": "2025-01-01"}),
+    "fetch_incident_count (district, offense)": ("fetch_incident_count", (), {
+        "districts": ["A1"], "crime_type": OFFENSE}),
+}
+
+# Case name: (template, fetch case whose result it draws, keyword arguments as in the dashboard)
+TEMPLATE_CASES = {
+    "create_bar_chart": (create_bar_chart, "fetch_boston_top_crimes", {
+        "x_col": "Crime", "y_col": "crime_count", "title": "Top Crimes", "xlabel": "Crime", "ylabel": "Crime Count"}),
+    "create_line_chart": (create_line_chart, "fetch_crime_category_trends", {
+        "x_col": "Year", "y_col": "Crime Count", "title": "Trends", "xlabel": "Year", "ylabel": "Crime Count"}),
+    "create_heatmap": (create_heatmap, "fetch_crime_density", {
+        "lat_col": "Lat", "lon_col": "Long", "weight_col": "crime_count"}),
+    "make_sankey": (make_sankey, "fetch_sankey_data", {}),
+}
+SANKEY_COLUMNS = ("District", "Year", "Crime_Category")
+
+
+def missing_cases():
+    """Crime_API fetch methods that FETCH_CASES doesn't time."""
+    methods = {name for name in dir(Crime_API)
+               if name.startswith(("fetch_", "get_unique_", "search_")) and not name.endswith("_async")}
+    return sorted(methods - {method for method, _, _ in FETCH_CASES.values()})
+
+
+def prepare_database(db_path):
+    """Build the derived tables the fetch methods read (tiles, hotspots, forecast)."""
+    build_tiles(db_path)
+    train_hotspots(db_path, "grid")
+    build_forecast(db_path)
+
+
+def median_ms(function, repeat):
+    """Call function `repeat` times; return the median time in milliseconds and the last result."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def run_cases(db_path, repeat):
+    """
+    Time every fetch case and every template case.
+
+    Returns:
+        dict: Case name -> median milliseconds.
+    """
+    api = Crime_API(db_path, cache=None)
+    results, data = {}, {}
+    try:
+        for name, (method, args, kwargs) in FETCH_CASES.items():
+            results[name], data[name] = median_ms(lambda: getattr(api, method)(*args, **kwargs), repeat)
+    finally:
+        api.close()
+
+    for name, (template, source, kwargs) in TEMPLATE_CASES.items():
+        if template is make_sankey:
+            call = lambda: make_sankey(data[source], *SANKEY_COLUMNS, vals="Crime_Count")
+        else:
+            call = lambda: template(data[source], **kwargs)
+        results[name], _ = median_ms(call, repeat)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with the baseline.
+
+    Returns:
+        list: Markdown table lines.
+        list: Names of the regressed cases.
+    """
+    lines = ["| Case | Baseline | Now | Change |", "| --- | ---: | ---: | ---: |"]
+    regressions = []
+    for name, ms in results.items():
+        before = baseline.get(name)
+        if before is None:
+            lines.append(f"| {name} | - | {ms:.1f} ms | new |")
+            continue
+        change = ms / before - 1 if before else 0.0
+        regressed = change > tolerance and ms - before > NOISE_MS
+        if regressed:
+            regressions.append(name)
+        lines.append(f"| {name} | {before:.1f} ms | {ms:.1f} ms | {change:+.0%}{' **REGRESSION**' if regressed else ''} |")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic incidents to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="Reuse this synthetic database (it is generated here if it doesn't exist)")
+    parser.add_argument("--repeat", type=int, default=5, help="Calls per case, the median is reported")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Save these results as the new baseline")
+    parser.add_argument("--out", help="Optional markdown file to write the results to")
+    args = parser.parse_args()
+
+    missing = missing_cases()
+    if missing:
+        sys.exit(f"No benchmark case for {', '.join(missing)}: add them to FETCH_CASES.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "synthetic.db")
+        if not os.path.exists(db_path):
+            seconds = generate_database(db_path, args.rows, args.seed)
+            print(f"Generated {args.rows:,} incidents in {seconds:.1f} s")
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT COUNT(*) FROM boston_crime").fetchone()[0]
+        prepared = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'crime_forecast_model'").fetchone()
+        conn.close()
+        if not prepared:
+            prepare_database(db_path)
+        results = run_cases(db_path, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            saved = json.load(f)
+        if saved["rows"] == rows:
+            baseline = saved["results"]
+        else:
+            print(f"Baseline was measured on {saved['rows']:,} incidents, not {rows:,}: nothing to compare.")
+
+    lines, regressions = compare(results, baseline, args.tolerance)
+    report = "\n".join([f"# Benchmark suite ({rows:,} synthetic incidents, median of {args.repeat}, "
+                        f"SQLite {sqlite3.sqlite_version})", ""] + lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"rows": rows, "seed": args.seed, "sqlite": sqlite3.sqlite_version,
+                       "results": {name: round(ms, 2) for name, ms in results.items()}}, f, indent=2)
+        print(f"Saved the baseline to {args.baseline}")
+    elif regressions:
+        sys.exit(f"{len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark for serving the dashboard from several worker processes (CRIME_NUM_PROCS).
+
+Each worker process opens its own Crime_API on a read replica (Read_Replica.py) and answers the
+dashboard's fetches in a loop for a fixed time, picking years and categories the way sessions
+would. Workers read the time cube before the clock starts, like a server worker does on its first
+session. Throughput is measured for each process count with the query cache off, with only the
+in-process cache, and with the in-process cache backed by a DiskCache shared by all workers.
+Every run starts with empty caches, so the shared cache shows how much work the workers save
+each other.
+
+Usage (from the repository root):
+    python -m benchmarks.serving_benchmark --db /tmp/synthetic.db --procs 1 2 4 --out benchmarks/results/serving_benchmark.md
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from CRIME_API import Crime_API
+from Query_Cache import DiskCache, QueryCache
+from Read_Replica import refresh_replica
+from benchmarks.run_benchmarks import CATEGORY, OFFENSE
+from benchmarks.synthetic_data import generate_database
+
+YEARS = list(range(2020, 2026))
+
+# What one dashboard session asks for, as (method, function of a random generator -> args)
+REQUESTS = [
+    ("fetch_year_overview", lambda rng: (rng.choice(YEARS),)),
+    ("fetch_crime_density", lambda rng: (rng.choice(YEARS), rng.choice(["All Crimes", OFFENSE]))),
+    ("fetch_crime_category_trends", lambda rng: (CATEGORY,)),
+    ("fetch_crime_category_proportions", lambda rng: (CATEGORY,)),
+    ("fetch_sankey_data", lambda rng: ()),
+    ("search_crime_types", lambda rng: (rng.choice(["larceny", "assault", "vandal", "mv"]),)),
+]
+
+MODES = ["no cache", "process cache", "shared cache"]
+
+# Set in each worker by the pool initializer, so all workers start serving at the same moment
+_start_barrier = None
+
+
+def _init_worker(barrier):
+    global _start_barrier
+    _start_barrier = barrier
+
+
+def serve(replica_path, mode, cache_path, seconds, seed):
+    """Answer random requests for `seconds` in one worker process; return how many were answered."""
+    if mode == "no cache":
+        cache = None
+    else:
+        cache = QueryCache(shared=DiskCache(cache_path) if mode == "shared cache" else None)
+    api = Crime_API(replica_path, cache=cache)
+    # Every worker reads the time cube once at startup anyway; that is not what we're measuring
+    api.time_cube()
+    _start_barrier.wait()
+    rng = random.Random(seed)
+    answered = 0
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            method, make_args = rng.choice(REQUESTS)
+            getattr(api, method)(*make_args(rng))
+            answered += 1
+    finally:
+        api.close()
+    return answered
+
+
+def run(replica_path, procs, mode, seconds, tmp):
+    """Run `procs` workers at once; return the total requests per second."""
+    cache_path = os.path.join(tmp, f"cache-{procs}-{mode.replace(' ', '-')}.db")
+    # spawn gives every worker its own connections, like the forked server workers
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(procs, initializer=_init_worker, initargs=(context.Barrier(procs),)) as pool:
+        counts = pool.starmap(serve, [(replica_path, mode, cache_path, seconds, seed) for seed in range(procs)])
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Database to serve (a synthetic one is generated if missing)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=20.0, help="How long each run serves requests")
+    parser.add_argument("--out", help="Optional markdown file to write the results to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "synthetic.db")
+        if not os.path.exists(db_path):
+            generate_database(db_path, args.rows, seed=0)
+        replica_path = os.path.join(tmp, "replica.db")
+        copy_seconds = refresh_replica(db_path, replica_path)
+        conn = sqlite3.connect(replica_path)
+        rows = conn.execute("SELECT COUNT(*) FROM boston_crime").fetchone()[0]
+        conn.close()
+
+        lines = [f"# Multi-process serving ({rows:,} incidents, {os.cpu_count()} CPU(s), "
+                 f"{args.seconds:.0f} s per run, SQLite {sqlite3.sqlite_version})", "",
+                 f"refresh_replica copied the database in {copy_seconds:.1f} s.", "",
+                 "Requests per second, all workers together:", "",
+                 "| Processes | " + " | ".join(MODES) + " |",
+                 "| ---: |" + " ---: |" * len(MODES)]
+        for procs in args.procs:
+            rates = [run(replica_path, procs, mode, args.seconds, tmp) for mode in MODES]
+            lines.append(f"| {procs} | " + " | ".join(f"{rate:,.1f}" for rate in rates) + " |")
+            print(lines[-1])
+
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
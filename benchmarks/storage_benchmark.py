@@ -0,0 +1,118 @@
+"""
+Benchmark for the normalized incident storage (Crime_Storage.py).
+
+Takes a database whose boston_crime is still a wide table of text columns, copies it, converts
+the copy with Schema_Migration.migrate (which normalizes it and VACUUMs), and reports:
+- the pages used by the incidents (the table, its indexes and, after, the dimension tables),
+- the file size,
+- how long the group-bys behind the dashboard's counts take on the text columns before and on
+  the integer codes after.
+
+Without --db a legacy table is generated like index_benchmark does; its incidents have no street
+or shooting flag, so a copy of a real or synthetic database shows the size difference better.
+
+Usage (from the repository root):
+    python -m benchmarks.storage_benchmark --db /tmp/wide.db --out benchmarks/results/storage_benchmark.md
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from Crime_Storage import CODED_COLUMNS
+from Schema_Migration import migrate
+from benchmarks.index_benchmark import build_legacy_table
+
+# Each entry is (label, query on the wide table, query on crime_incidents)
+QUERIES = [
+    ("incidents per offense",
+     "SELECT OFFENSE_DESCRIPTION, COUNT(*) FROM boston_crime GROUP BY OFFENSE_DESCRIPTION",
+     "SELECT OFFENSE_DESCRIPTION_ID, COUNT(*) FROM crime_incidents GROUP BY OFFENSE_DESCRIPTION_ID"),
+    ("incidents per district and day of week",
+     "SELECT DISTRICT, DAY_OF_WEEK, COUNT(*) FROM boston_crime GROUP BY DISTRICT, DAY_OF_WEEK",
+     "SELECT DISTRICT_ID, DAY_OF_WEEK_ID, COUNT(*) FROM crime_incidents GROUP BY DISTRICT_ID, DAY_OF_WEEK_ID"),
+    ("incidents per street",
+     "SELECT STREET, COUNT(*) FROM boston_crime GROUP BY STREET",
+     "SELECT STREET_ID, COUNT(*) FROM crime_incidents GROUP BY STREET_ID"),
+    ("shootings per year",
+     "SELECT YEAR, COUNT(*) FROM boston_crime WHERE SHOOTING IN ('1', 'Y') GROUP BY YEAR",
+     "SELECT YEAR, COUNT(*) FROM crime_incidents WHERE SHOOTING_ID IN "
+     "(SELECT ID FROM dim_shooting WHERE VALUE IN ('1', 'Y')) GROUP BY YEAR"),
+]
+
+
+def incident_megabytes(conn, tables):
+    """Megabytes of pages used by the given tables and their indexes (from the dbstat table)."""
+    placeholders = ", ".join("?" * len(tables))
+    query = f"""
+        SELECT SUM(pgsize) FROM dbstat
+        WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name IN ({placeholders}))
+    """
+    return (conn.execute(query, tables).fetchone()[0] or 0) / 1e6
+
+
+def time_queries(conn, use_normalized_sql):
+    """Time each query, best of three."""
+    timings = []
+    for _, wide_sql, normalized_sql in QUERIES:
+        sql = normalized_sql if use_normalized_sql else wide_sql
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Database with boston_crime still a table (it is copied, not changed)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to generate when --db is not given")
+    parser.add_argument("--out", help="Optional markdown file to write the results to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            build_legacy_table(db_path, args.rows)
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT COUNT(*) FROM boston_crime").fetchone()[0]
+        before_mb = incident_megabytes(conn, ["boston_crime"])
+        before_times = time_queries(conn, use_normalized_sql=False)
+        conn.close()
+        before_file = os.path.getsize(db_path) / 1e6
+
+        start = time.perf_counter()
+        migrate(db_path)
+        migrate_seconds = time.perf_counter() - start
+
+        conn = sqlite3.connect(db_path)
+        after_mb = incident_megabytes(conn, ["crime_incidents"] + list(CODED_COLUMNS.values()))
+        after_times = time_queries(conn, use_normalized_sql=True)
+        conn.close()
+        after_file = os.path.getsize(db_path) / 1e6
+
+    lines = [f"# Normalized storage benchmark ({rows:,} incidents, SQLite {sqlite3.sqlite_version})", "",
+             f"Schema_Migration.migrate took {migrate_seconds:.1f} s.", "",
+             "| | Wide table | Normalized | Change |", "| --- | ---: | ---: | ---: |",
+             f"| Incidents and their indexes | {before_mb:.1f} MB | {after_mb:.1f} MB | {after_mb / before_mb - 1:+.0%} |",
+             f"| Database file | {before_file:.1f} MB | {after_file:.1f} MB | {after_file / before_file - 1:+.0%} |", "",
+             "| Group-by | Wide table (ms) | Normalized (ms) | Speed-up |", "| --- | ---: | ---: | ---: |"]
+    for (label, _, _), t_before, t_after in zip(QUERIES, before_times, after_times):
+        lines.append(f"| {label} | {t_before * 1000:.1f} | {t_after * 1000:.1f} | {t_before / t_after:.1f}x |")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Synthetic Boston crime incidents for benchmarks, so nobody needs the real database to measure.
+
+The generator follows the shape of the real data rather than spreading values evenly:
+
+    DISTRICT     weighted by each district's share of real incidents (B2, C11 and D4 busiest)
+    OFFENSE      a long-tailed (Zipf) mix of real offense descriptions, most of them in
+                 offense_category_map and a few common ones that are not
+    coordinates  around each district's centre, with part of the incidents packed into a few
+                 tight hotspots per district; about 4% have no location
+    date, hour   every year in the range, more incidents in summer, few between 3 and 7 am,
+                 DAY_OF_WEEK and MONTH consistent with the date
+
+Rows are generated in chunks with NumPy and loaded through Crime_ETL, so the summary tables are
+filled exactly like a real load and memory stays flat up to 50M rows. The same seed always gives
+the same database.
+
+Usage (from the repository root):
+    python -m benchmarks.synthetic_data /tmp/synthetic.db --rows 1000000
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from Crime_ETL import ingest
+from Schema_Migration import create_database
+
+# District: (share of incidents, centre latitude, centre longitude, common streets)
+DISTRICTS = {
+    "B2": (0.15, 42.318, -71.085, ["WASHINGTON ST", "BLUE HILL AVE", "WARREN ST", "DUDLEY ST"]),
+    "C11": (0.13, 42.298, -71.060, ["DORCHESTER AVE", "COLUMBIA RD", "BOWDOIN ST", "GENEVA AVE"]),
+    "D4": (0.12, 42.342, -71.078, ["WASHINGTON ST", "MASSACHUSETTS AVE", "BOYLSTON ST", "TREMONT ST"]),
+    "A1": (0.11, 42.357, -71.060, ["WASHINGTON ST", "TREMONT ST", "CAMBRIDGE ST", "SUMMER ST"]),
+    "B3": (0.10, 42.284, -71.091, ["BLUE HILL AVE", "RIVER ST", "NORFOLK ST", "CUMMINS HWY"]),
+    "C6": (0.07, 42.334, -71.046, ["W BROADWAY", "E BROADWAY", "DORCHESTER AVE", "OLD COLONY AVE"]),
+    "D14": (0.06, 42.350, -71.150, ["COMMONWEALTH AVE", "CAMBRIDGE ST", "WASHINGTON ST", "BRIGHTON AVE"]),
+    "E13": (0.055, 42.310, -71.112, ["CENTRE ST", "WASHINGTON ST", "HYDE PARK AVE", "SOUTH ST"]),
+    "E18": (0.055, 42.256, -71.125, ["HYDE PARK AVE", "RIVER ST", "RIVER ST", "TRUMAN HWY"]),
+    "A7": (0.04, 42.372, -71.034, ["BENNINGTON ST", "MERIDIAN ST", "SARATOGA ST", "BORDER ST"]),
+    "E5": (0.04, 42.283, -71.155, ["CENTRE ST", "WASHINGTON ST", "VFW PKWY", "SPRING ST"]),
+    "A15": (0.02, 42.377, -71.062, ["BUNKER HILL ST", "MAIN ST", "MEDFORD ST", "RUTHERFORD AVE"]),
+}
+# Share of incidents with no district recorded
+NO_DISTRICT = 0.01
+
+# Most common first; weights fall off as 1 / rank ** OFFENSE_SKEW
+OFFENSES = [
+    "INVESTIGATE PERSON", "SICK/INJURED/MEDICAL - PERSON", "M/V - LEAVING SCENE - PROPERTY DAMAGE",
+    "INVESTIGATE PROPERTY", "LARCENY THEFT FROM BUILDING", "VANDALISM", "ASSAULT - SIMPLE",
+    "TOWED MOTOR VEHICLE", "LARCENY SHOPLIFTING", "LARCENY THEFT FROM MV - NON-ACCESSORY",
+    "M/V ACCIDENT - PROPERTY DAMAGE", "VERBAL DISPUTE", "PROPERTY - LOST", "LARCENY ALL OTHERS",
+    "THREATS TO DO BODILY HARM", "M/V ACCIDENT - PERSONAL INJURY", "ASSAULT - AGGRAVATED",
+    "FRAUD - FALSE PRETENSE / SCHEME", "DRUGS - POSSESSION/ SALE/ MANUFACTURING/ USE", "AUTO THEFT",
+    "BURGLARY - RESIDENTIAL", "FRAUD - CREDIT CARD / ATM FRAUD", "ROBBERY", "FRAUD - IMPERSONATION",
+    "LARCENY THEFT OF MV PARTS & ACCESSORIES", "BURGLARY - COMMERCIAL", "LARCENY THEFT OF BICYCLE",
+    "FIREARM/WEAPON - FOUND OR CONFISCATED", "SUDDEN DEATH", "OPERATING UNDER THE INFLUENCE (OUI) ALCOHOL",
+    "WEAPON VIOLATION - CARRY/ POSSESSING/ SALE/ TRAFFICKING/ OTHER", "M/V ACCIDENT - INVOLVING PEDESTRIAN - INJURY",
+    "ANIMAL INCIDENTS (DOG BITES, LOST DOG, ETC)", "STOLEN PROPERTY - BUYING / RECEIVING / POSSESSING",
+    "LIQUOR/ALCOHOL - DRINKING IN PUBLIC", "SUICIDE / SUICIDE ATTEMPT", "FRAUD - WIRE", "SEXUAL ASSAULT",
+    "DRUGS - POSSESSION OF DRUG PARAPHERNALIA", "ARSON", "AUTO THEFT - MOTORCYCLE / SCOOTER",
+    "INTIMIDATING WITNESS", "DEATH INVESTIGATION", "PROSTITUTION", "BOMB THREAT", "ANIMAL ABUSE",
+    "KIDNAPPING/CUSTODIAL KIDNAPPING/ ABDUCTION", "MURDER, NON-NEGLIGENT MANSLAUGHTER",
+]
+OFFENSE_SKEW = 1.1
+
+# Relative number of incidents per hour of the day, 0-23 (midnight is high: unknown times are recorded as 00:00)
+HOUR_WEIGHTS = [6, 4, 3.5, 2.5, 1.8, 1.5, 2, 3, 4.5, 5, 5.5, 5.5, 6.5, 5.5, 5.5, 6, 6.5, 6.5, 6, 5.5, 5, 4.5, 4, 3.5]
+
+# Relative number of incidents per month, January-December (busier in summer)
+MONTH_WEIGHTS = [0.85, 0.8, 0.9, 0.92, 1.0, 1.05, 1.1, 1.12, 1.05, 1.03, 0.95, 0.9]
+
+# Share of incidents placed in a district hotspot, and hotspots per district
+HOTSPOT_SHARE = 0.3
+HOTSPOTS_PER_DISTRICT = 3
+
+# Share of incidents without coordinates
+NO_LOCATION = 0.04
+
+WEEKDAY_NAMES = np.array(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])
+
+
+def normalized(weights):
+    """Weights scaled to sum to 1."""
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def generate_chunk(rng, start, rows, years, hotspots):
+    """
+    Generate `rows` incidents.
+
+    Parameters:
+        rng (np.random.Generator): Random source for this chunk.
+        start (int): Number of the first incident (used in INCIDENT_NUMBER).
+        rows (int): Incidents to generate.
+        years (tuple): (first year, last year).
+        hotspots (np.ndarray): Hotspot centres, shape (districts, HOTSPOTS_PER_DISTRICT, 2).
+
+    Returns:
+        pd.DataFrame: One row per incident, in the boston_crime column layout.
+    """
+    names = list(DISTRICTS)
+    shares = np.array([DISTRICTS[name][0] for name in names])
+    centres = np.array([DISTRICTS[name][1:3] for name in names])
+
+    district = rng.choice(len(names), rows, p=normalized(shares))
+    offense = rng.choice(len(OFFENSES), rows, p=normalized(1 / np.arange(1, len(OFFENSES) + 1) ** OFFENSE_SKEW))
+
+    # Coordinates: spread around the district centre, or tight around one of its hotspots
+    lat = centres[district, 0] + rng.normal(0, 0.009, rows)
+    lon = centres[district, 1] + rng.normal(0, 0.012, rows)
+    in_hotspot = rng.random(rows) < HOTSPOT_SHARE
+    spot = hotspots[district[in_hotspot], rng.integers(HOTSPOTS_PER_DISTRICT, size=in_hotspot.sum())]
+    lat[in_hotspot] = spot[:, 0] + rng.normal(0, 0.0015, in_hotspot.sum())
+    lon[in_hotspot] = spot[:, 1] + rng.normal(0, 0.002, in_hotspot.sum())
+    missing = rng.random(rows) < NO_LOCATION
+    lat[missing] = np.nan
+    lon[missing] = np.nan
+
+    # Date: any year, seasonal month, any day of that month
+    year = rng.integers(years[0], years[1] + 1, rows)
+    month = rng.choice(12, rows, p=normalized(MONTH_WEIGHTS)) + 1
+    month_start = (year - 1970) * 12 + (month - 1)
+    days_in_month = (np.array(month_start + 1, dtype="datetime64[M]").astype("datetime64[D]")
+                     - np.array(month_start, dtype="datetime64[M]").astype("datetime64[D]")).astype(np.int64)
+    day = np.array(month_start, dtype="datetime64[M]").astype("datetime64[D]") + (rng.random(rows) * days_in_month).astype(np.int64)
+    hour = rng.choice(24, rows, p=normalized(HOUR_WEIGHTS))
+    occurred = pd.to_datetime(day) + pd.to_timedelta(hour * 3600 + rng.integers(60, size=rows) * 60, unit="s")
+
+    district_names = np.array(names, dtype=object)[district]
+    district_names[rng.random(rows) < NO_DISTRICT] = None
+    streets = np.array([DISTRICTS[name][3] for name in names], dtype=object)
+    street = streets[district, rng.choice(4, rows, p=[0.4, 0.3, 0.2, 0.1])]
+
+    df = pd.DataFrame({
+        "INCIDENT_NUMBER": [f"S{start + i}" for i in range(rows)],
+        "OFFENSE_CODE": 100 + offense * 17,
+        "OFFENSE_CODE_GROUP": None,
+        "OFFENSE_DESCRIPTION": np.array(OFFENSES, dtype=object)[offense],
+        "DISTRICT": district_names,
+        "REPORTING_AREA": rng.integers(1, 900, rows).astype(str),
+        "SHOOTING": np.where(rng.random(rows) < 0.005, "1", "0"),
+        "OCCURRED_ON_DATE": occurred.strftime("%Y-%m-%d %H:%M:%S+00"),
+        "YEAR": year,
+        "MONTH": month,
+        "DAY_OF_WEEK": WEEKDAY_NAMES[occurred.dayofweek],
+        "HOUR": hour,
+        "UCR_PART": None,
+        "STREET": street,
+        "Lat": lat,
+        "Long": lon,
+    })
+    df["Location"] = ("(" + df["Lat"].round(8).astype(str) + ", " + df["Long"].round(8).astype(str) + ")").where(~missing)
+    return df
+
+
+def generate_database(db_path, rows, seed=0, years=(2015, 2025), chunk_rows=500_000):
+    """
+    Write a database with `rows` synthetic incidents.
+
+    Parameters:
+        db_path (str): Output file; it must not exist yet.
+        rows (int): Number of incidents (1M to 50M is the intended range).
+        seed (int): Random seed; the same seed and size give the same data.
+        years (tuple): (first year, last year) of the incidents.
+        chunk_rows (int): Incidents generated and loaded per transaction.
+
+    Returns:
+        float: Seconds it took.
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists, the generator only writes new databases.")
+    started = time.perf_counter()
+    create_database(db_path)
+
+    # Hotspot centres are fixed by the seed, near each district's centre
+    rng = np.random.default_rng(seed)
+    centres = np.array([DISTRICTS[name][1:3] for name in DISTRICTS])
+    hotspots = centres[:, None, :] + rng.normal(0, [0.006, 0.008], (len(centres), HOTSPOTS_PER_DISTRICT, 2))
+
+    for start in range(0, rows, chunk_rows):
+        chunk_rng = np.random.default_rng([seed, start])
+        ingest(db_path, [generate_chunk(chunk_rng, start, min(chunk_rows, rows - start), years, hotspots)])
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("ANALYZE")
+    conn.close()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_path")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    seconds = generate_database(args.db_path, args.rows, args.seed, chunk_rows=args.chunk_rows)
+    print(f"Wrote {args.rows:,} incidents to {args.db_path} in {seconds:.1f} s")
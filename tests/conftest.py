@@ -0,0 +1,31 @@
+"""
+Shared fixtures: small synthetic databases built with benchmarks/synthetic_data.py.
+
+Run from the repository root with: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_data import generate_database  # noqa: E402
+
+YEARS = (2020, 2024)
+
+
+@pytest.fixture(scope="session")
+def crime_db(tmp_path_factory):
+    """A database with a few thousand incidents in YEARS."""
+    path = str(tmp_path_factory.mktemp("crime") / "crime.db")
+    generate_database(path, 5_000, seed=1, years=YEARS)
+    return path
+
+
+@pytest.fixture(scope="session")
+def empty_db(tmp_path_factory):
+    """A database with the full schema and no incidents."""
+    path = str(tmp_path_factory.mktemp("empty") / "empty.db")
+    generate_database(path, 0)
+    return path
@@ -0,0 +1,27 @@
+import sqlite3
+
+import pytest
+
+from CRIME_API import ConnectionPool
+
+
+def test_close_also_closes_connections_returned_later(crime_db):
+    pool = ConnectionPool(crime_db, max_size=2)
+    idle, checked_out = pool.acquire(), pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    pool.release(checked_out)
+
+    for conn in (idle, checked_out):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert pool._opened == 0
+
+
+def test_closed_pool_opens_no_new_connections(crime_db):
+    pool = ConnectionPool(crime_db, max_size=2)
+    pool.close()
+    with pytest.raises(RuntimeError, match="pool is closed"):
+        pool.acquire()
+    assert pool._opened == 0
@@ -0,0 +1,43 @@
+import pytest
+
+from CRIME_API import Crime_API
+
+
+@pytest.fixture
+def api(crime_db):
+    api = Crime_API(crime_db, cache=None)
+    yield api
+    api.close()
+
+
+def test_top_crimes_for_a_year_without_incidents(api):
+    df = api.fetch_boston_top_crimes(1999)
+    assert df.empty
+    assert list(df.columns) == ["Crime", "crime_count"]
+
+
+def test_top_crimes_are_sorted_and_limited(api):
+    df = api.fetch_boston_top_crimes(2022, 5)
+    assert len(df) == 5
+    assert df["crime_count"].is_monotonic_decreasing
+
+
+@pytest.mark.parametrize("year", [1999, 2022])
+def test_year_overview_shapes(api, year):
+    overview = api.fetch_year_overview(year)
+    assert set(overview) == {"top_crimes", "top_districts", "day_of_week", "monthly"}
+    for df in overview.values():
+        assert df["crime_count"].dtype == "int64"
+    assert len(overview["day_of_week"]) == 7
+    if year == 1999:
+        assert overview["top_crimes"].empty and overview["top_districts"].empty and overview["monthly"].empty
+        assert overview["day_of_week"]["crime_count"].sum() == 0
+
+
+def test_year_overview_on_an_empty_database(empty_db):
+    api = Crime_API(empty_db, cache=None)
+    try:
+        overview = api.fetch_year_overview(2024)
+    finally:
+        api.close()
+    assert overview["top_districts"].empty and overview["monthly"].empty
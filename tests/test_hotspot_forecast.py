@@ -0,0 +1,51 @@
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Crime_ETL import INCIDENT_COLUMNS, ingest
+from Hotspot_Forecast import build_forecast, load_model
+
+
+def forecast_state(db_path):
+    """The feature rows and the stored model of a database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        features = pd.read_sql("SELECT * FROM crime_forecast_features ORDER BY WEEK, CELL_Y, CELL_X", conn)
+        return features, load_model(conn)
+    finally:
+        conn.close()
+
+
+def incident(number, occurred_on, lat, long):
+    row = dict.fromkeys(INCIDENT_COLUMNS)
+    timestamp = pd.Timestamp(occurred_on)
+    row.update(INCIDENT_NUMBER=number, OFFENSE_DESCRIPTION="VANDALISM", DISTRICT="B2",
+               OCCURRED_ON_DATE=f"{occurred_on}+00", YEAR=timestamp.year, MONTH=timestamp.month,
+               DAY_OF_WEEK=timestamp.day_name(), HOUR=timestamp.hour, Lat=lat, Long=long)
+    return row
+
+
+@pytest.mark.parametrize("occurred_on, lat, long", [
+    # A week after every synthetic incident, so the load also moves the forecast week on
+    ("2025-01-08 10:00:00", 42.3601, -71.0589),  # downtown, a cell that already has incidents
+    ("2025-01-08 10:00:00", 42.6000, -70.7000),  # out at sea, a cell nothing was ever reported in
+    ("2005-06-01 10:00:00", None, None),         # years before the data and without a location, so not counted
+])
+def test_incremental_refresh_matches_a_rebuild(crime_db, tmp_path, occurred_on, lat, long):
+    db_path = str(tmp_path / "forecast.db")
+    shutil.copyfile(crime_db, db_path)
+    build_forecast(db_path)
+    ingest(db_path, [pd.DataFrame([incident("NEW-1", occurred_on, lat, long)], columns=INCIDENT_COLUMNS)])
+    incremental_features, incremental_model = forecast_state(db_path)
+
+    build_forecast(db_path)
+    rebuilt_features, rebuilt_model = forecast_state(db_path)
+
+    pd.testing.assert_frame_equal(incremental_features, rebuilt_features)
+    for name in ("first_week", "next_week", "rows"):
+        assert incremental_model[name] == rebuilt_model[name]
+    for name in ("xtx", "xty", "weights"):
+        np.testing.assert_allclose(incremental_model[name], rebuilt_model[name], rtol=1e-9)
@@ -0,0 +1,48 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from CRIME_API import Crime_API
+from Parquet_Backend import Parquet_Crime_API, export_parquet, summarize_year
+
+
+@pytest.fixture(scope="module")
+def apis(crime_db, tmp_path_factory):
+    parquet_dir = str(tmp_path_factory.mktemp("parquet"))
+    export_parquet(crime_db, parquet_dir)
+    sqlite_api, parquet_api = Crime_API(crime_db, cache=None), Parquet_Crime_API(parquet_dir, cache=None)
+    yield sqlite_api, parquet_api
+    sqlite_api.close()
+    parquet_api.close()
+
+
+def test_unique_crime_types_match_sqlite(apis):
+    sqlite_api, parquet_api = apis
+    assert parquet_api.get_unique_crime_types() == sqlite_api.get_unique_crime_types()
+
+
+def test_only_the_shared_backend_surface_is_inherited(apis):
+    _, parquet_api = apis
+    for name in ["execute_query", "get_db_connection", "pool", "time_cube", "dimensions", "decode"]:
+        assert not hasattr(parquet_api, name)
+    assert not isinstance(parquet_api, Crime_API)
+
+
+def test_async_twins_run_the_parquet_methods(apis):
+    sqlite_api, parquet_api = apis
+    found = asyncio.run(parquet_api.search_crime_types_async("larceny"))
+    assert found and found == sqlite_api.search_crime_types("larceny")
+
+
+def test_year_overview_for_a_year_without_incidents(apis):
+    _, parquet_api = apis
+    overview = parquet_api.fetch_year_overview(1999)
+    assert overview["top_crimes"].empty and overview["top_districts"].empty
+
+
+def test_summarize_year_without_counts():
+    counts = pd.DataFrame(columns=["Crime", "DISTRICT", "DAY_OF_WEEK", "MONTH", "crime_count"])
+    overview = summarize_year(counts, 1999)
+    assert overview["top_crimes"].empty and overview["top_districts"].empty and overview["monthly"].empty
+    assert overview["day_of_week"]["crime_count"].tolist() == [0] * 7
@@ -0,0 +1,43 @@
+from Query_Cache import DiskCache, QueryCache
+
+
+def test_result_of_a_query_that_outlived_its_data_is_not_cached():
+    cache = QueryCache()
+    cache.check_signature("db", "v1")
+    key = ("db", "fetch_top_districts", (2024,), ())
+
+    def compute():
+        # The database is replaced while the query runs
+        cache.check_signature("db", "v2")
+        return "old result"
+
+    assert cache.get_or_compute(key, compute) == "old result"
+    assert cache.get(key) is None
+    assert cache.get_or_compute(key, lambda: "new result") == "new result"
+    assert cache.get(key) == "new result"
+
+
+def test_unchanged_signature_keeps_results():
+    cache = QueryCache()
+    cache.check_signature("db", "v1")
+    key = ("db", "fetch_sankey_data", (), ())
+    cache.get_or_compute(key, lambda: [1, 2, 3])
+    cache.check_signature("db", "v1")
+    assert cache.get(key) == [1, 2, 3]
+
+
+def test_result_of_a_query_that_outlived_a_clear_is_not_cached(tmp_path):
+    cache = QueryCache(shared=DiskCache(str(tmp_path / "cache.db")))
+    cache.check_signature("db", "v1")
+    key = ("db", "fetch_crime_by_month_all_years", (), ())
+    cache.get_or_compute(key, lambda: "shared result")
+
+    def compute():
+        cache.clear()
+        return "old result"
+
+    other = ("db", "fetch_sankey_data", (), ())
+    assert cache.get_or_compute(other, compute) == "old result"
+    assert cache.get(other) is None
+    # The shared copy is gone too, so the next miss computes again
+    assert cache.get_or_compute(key, lambda: "new result") == "new result"
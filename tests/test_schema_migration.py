@@ -0,0 +1,22 @@
+import sqlite3
+
+from Schema_Migration import create_database, migrate
+from benchmarks.index_benchmark import build_legacy_table
+
+
+def schema(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY type, name").fetchall()
+    conn.close()
+    return rows
+
+
+def test_new_and_migrated_databases_have_the_same_incident_schema(tmp_path):
+    new, migrated = str(tmp_path / "new.db"), str(tmp_path / "migrated.db")
+    create_database(new)
+    build_legacy_table(migrated, 100)
+    migrate(migrated)
+
+    # The two summary tables from the first release only come with Boston_Crime__Database.sql
+    first_release = {"crime_count_by_district_year", "crime_category_counts"}
+    assert [row for row in schema(new) if row[2] not in first_release] == schema(migrated)